@@ -3,6 +3,9 @@
 """
 Script pentru actualizarea campului 'seria' din context_json
 cu seriile noi pentru toate documentele modificate
+
+Necesar doar pentru documentele redenumite cu versiunea veche a modifica_serii.py;
+comanda rename_document_series actualizează context_json în aceeași trecere.
 """
 
 import sqlite3
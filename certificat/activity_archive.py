@@ -0,0 +1,149 @@
+"""
+Arhivarea jurnalului de activitate (ActivityLog).
+
+Înregistrările vechi sunt mutate din tabela "fierbinte" în fișiere NDJSON
+comprimate gzip, câte unul pe lună (ex: activitylog_2025-03.ndjson.gz).
+Pe PostgreSQL tabela poate fi partiționată lunar (RANGE pe timestamp), caz în
+care lunile complet expirate sunt eliminate cu DROP pe partiție, nu rând cu rând.
+"""
+import gzip
+import json
+import os
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection
+
+from .models import ActivityLog
+
+
+ARCHIVE_FILENAME = "activitylog_{month}.ndjson.gz"
+
+
+def table_name():
+    return ActivityLog._meta.db_table
+
+
+def archive_fields():
+    """Coloanele exportate: toate câmpurile concrete (FK ca *_id) + username."""
+    fields = [f.attname for f in ActivityLog._meta.concrete_fields]
+    return fields + ["user__username"]
+
+
+def month_key(value):
+    """Cheia lunii (UTC) pentru un timestamp: '2025-03'."""
+    if value.tzinfo is not None:
+        value = value.astimezone(dt_timezone.utc)
+    return value.strftime("%Y-%m")
+
+
+def serialize_row(row):
+    data = dict(row)
+    data["username"] = data.pop("user__username", None)
+    return json.dumps(data, ensure_ascii=False, default=_json_default)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def append_rows(output_dir, rows):
+    """
+    Adaugă rândurile în fișierele lunare. Fiecare apel scrie un membru gzip nou
+    (formatul gzip permite concatenarea), deci fișierele pot fi completate între rulări.
+    Returnează numărul de rânduri scrise pe lună.
+    """
+    by_month = {}
+    for row in rows:
+        by_month.setdefault(month_key(row["timestamp"]), []).append(row)
+
+    os.makedirs(output_dir, exist_ok=True)
+    written = {}
+    for month, month_rows in by_month.items():
+        path = os.path.join(output_dir, ARCHIVE_FILENAME.format(month=month))
+        with open(path, "ab") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="ab") as gz:
+                for row in month_rows:
+                    gz.write(serialize_row(row).encode("utf-8"))
+                    gz.write(b"\n")
+            raw.flush()
+            os.fsync(raw.fileno())
+        written[month] = len(month_rows)
+    return written
+
+
+def iter_batches(queryset, batch_size):
+    """Parcurge queryset-ul în loturi după pk (keyset), fără OFFSET."""
+    last_pk = 0
+    fields = archive_fields()
+    while True:
+        batch = list(
+            queryset.filter(pk__gt=last_pk).order_by("pk").values(*fields)[:batch_size]
+        )
+        if not batch:
+            return
+        last_pk = batch[-1]["id"]
+        yield batch
+
+
+# --- Partiționare PostgreSQL ---
+
+def is_postgres():
+    return connection.vendor == "postgresql"
+
+
+def partition_name(year, month):
+    return f"{table_name()}_p{year:04d}{month:02d}"
+
+
+def month_bounds(year, month):
+    start = datetime(year, month, 1, tzinfo=dt_timezone.utc)
+    end = datetime(year + (month // 12), (month % 12) + 1, 1, tzinfo=dt_timezone.utc)
+    return start, end
+
+
+def add_months(year, month, delta):
+    index = year * 12 + (month - 1) + delta
+    return index // 12, index % 12 + 1
+
+
+def is_partitioned(cursor):
+    if not is_postgres():
+        return False
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = %s",
+        [table_name()],
+    )
+    return cursor.fetchone() is not None
+
+
+def list_month_partitions(cursor):
+    """Returnează [(nume_partiție, început, sfârșit)] pentru partițiile lunare existente."""
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = %s ORDER BY c.relname",
+        [table_name()],
+    )
+    prefix = f"{table_name()}_p"
+    result = []
+    for (name,) in cursor.fetchall():
+        suffix = name[len(prefix):] if name.startswith(prefix) else ""
+        if len(suffix) != 6 or not suffix.isdigit():
+            continue  # ex: partiția DEFAULT
+        start, end = month_bounds(int(suffix[:4]), int(suffix[4:]))
+        result.append((name, start, end))
+    return result
+
+
+def create_month_partition_sql(year, month):
+    start, end = month_bounds(year, month)
+    qn = connection.ops.quote_name
+    return (
+        f"CREATE TABLE IF NOT EXISTS {qn(partition_name(year, month))} "
+        f"PARTITION OF {qn(table_name())} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
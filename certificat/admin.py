@@ -2,7 +2,6 @@
 from django.urls import path
 from django.contrib import admin
 from django.utils.html import format_html
-from .views import generate_docx_aviz as generate_docx
 from .models import Certificat  # Adăugați această linie
 from .models import DailyQuote
 
@@ -10,6 +9,8 @@ class CertificatAdmin(admin.ModelAdmin):
     #change_list_template = "certificat/admin/certificat_change_list.html"  # personalizat
 
     def get_urls(self):
+        # Import la cerere: autodiscover-ul admin nu mai încarcă toate view-urile la pornire
+        from .views.generation import generate_docx_aviz as generate_docx
         urls = super().get_urls()
         custom_urls = [
             path("generate_docx/", self.admin_site.admin_view(generate_docx), name="generate_docx"),
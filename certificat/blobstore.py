@@ -0,0 +1,229 @@
+"""
+Stocare PDF adresată prin conținut (SHA-256), cu deduplicare.
+
+Fiecare PDF generat, regenerat sau restaurat este scris o singură dată, ca
+generated_docs/blobs/<aa>/<sha256>.pdf, și are un rând PdfBlob cu numărul de
+documente care îl referă (refcount). GeneratedDocument.pdf_file indică direct
+fișierul blob-ului, deci URL-urile și căile existente funcționează neschimbat.
+
+Fișierul se șterge doar când refcount ajunge la 0. Documentele mai vechi, cu
+fișier propriu (fără blob), sunt tratate ca înainte, cu diferența că fișierul
+se șterge doar dacă niciun alt document nu îl mai folosește. Comanda
+dedupe_generated_pdfs le mută în blob-uri și recalculează refcount-urile.
+Ștergerile în masă trec prin purge.py (detach_blobs + unreferenced_files).
+"""
+import hashlib
+from collections import Counter, defaultdict
+
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Count, F, ProtectedError
+from django.db.models.functions import Greatest
+
+from .models import GeneratedDocument, PdfBlob
+
+
+BLOB_DIR = "generated_docs/blobs"
+
+
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def blob_name(sha256):
+    return f"{BLOB_DIR}/{sha256[:2]}/{sha256}.pdf"
+
+
+def is_blob_file(name):
+    return bool(name) and name.startswith(BLOB_DIR + "/")
+
+
+def acquire(content, refs=1):
+    """
+    Blob-ul pentru conținutul dat, cu refcount mărit cu `refs`.
+    Fișierul se scrie doar dacă nu există deja (conținut identic = un singur fișier).
+    """
+    sha = content_hash(content)
+    name = blob_name(sha)
+    for _ in range(3):
+        with transaction.atomic():
+            blob, _created = PdfBlob.objects.get_or_create(sha256=sha, defaults={"file": name, "size": len(content)})
+            # Incrementarea blochează rândul: un release concurent nu mai poate șterge fișierul
+            if not PdfBlob.objects.filter(pk=blob.pk).update(refcount=F("refcount") + refs):
+                continue  # rândul tocmai a fost șters de un release (refcount 0) - reluăm
+            if not default_storage.exists(name):
+                saved = default_storage.save(name, ContentFile(content))
+                if saved != name:
+                    # Alt proces a scris același conținut între timp; păstrăm un singur fișier
+                    default_storage.delete(saved)
+            blob.refresh_from_db()
+            return blob
+    raise RuntimeError(f"Nu s-a putut obține blob-ul PDF {sha}.")
+
+
+def store_file(path):
+    """
+    Copiază fișierul local în blob-ul conținutului său, dacă nu există deja (fără rând PdfBlob).
+    Sigur pentru thread-uri; returnează (sha256, nume în storage, dimensiune).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    sha = digest.hexdigest()
+    name = blob_name(sha)
+    if not default_storage.exists(name):
+        with open(path, "rb") as f:
+            saved = default_storage.save(name, File(f))
+        if saved != name:
+            # Alt thread/proces a scris același conținut între timp; păstrăm un singur fișier
+            default_storage.delete(saved)
+    return sha, name, size
+
+
+def acquire_bulk(files):
+    """
+    Varianta în bloc a acquire() pentru fișiere deja scrise cu store_file():
+    files = {sha256: (nume, dimensiune, referințe)}. Creează rândurile lipsă cu un
+    singur INSERT, mărește refcount-urile cu câte un UPDATE per număr de referințe
+    și returnează {sha256: blob_id}. Trebuie apelată în tranzacția care creează documentele.
+    """
+    if not files:
+        return {}
+    PdfBlob.objects.bulk_create(
+        [PdfBlob(sha256=sha, file=name, size=size) for sha, (name, size, _refs) in files.items()],
+        ignore_conflicts=True,
+    )
+    ids = dict(PdfBlob.objects.filter(sha256__in=list(files)).values_list("sha256", "id"))
+    by_refs = defaultdict(list)
+    for sha, (_name, _size, refs) in files.items():
+        by_refs[refs].append(ids[sha])
+    for refs, blob_ids in by_refs.items():
+        PdfBlob.objects.filter(pk__in=blob_ids).update(refcount=F("refcount") + refs)
+    return ids
+
+
+def attach_pdf(doc, content):
+    """
+    Leagă documentul de blob-ul conținutului și eliberează fișierul anterior.
+    Pentru un document deja salvat, legătura se scrie imediat în DB; un document
+    nou trebuie salvat de apelant (ca după pdf_file.save(..., save=False)).
+    """
+    sha = content_hash(content)
+    if doc.blob_id and doc.blob.sha256 == sha:
+        return doc.blob
+    previous_blob_id = doc.blob_id
+    previous_name = doc.pdf_file.name if doc.pdf_file else None
+
+    blob = acquire(content)
+    doc.blob = blob
+    doc.pdf_file.name = blob.file.name
+    if doc.pk:
+        GeneratedDocument.objects.filter(pk=doc.pk).update(blob=blob, pdf_file=blob.file.name)
+
+    if previous_blob_id:
+        release_blobs({previous_blob_id: 1})
+    elif previous_name and previous_name != blob.file.name:
+        delete_unreferenced_files([previous_name])
+    return blob
+
+
+def release_blobs(counts):
+    """Scade refcount-ul blob-urilor ({blob_id: n}); șterge blob-urile ajunse la 0. Returnează fișierele șterse."""
+    deleted = 0
+    for blob_id, n in Counter(counts).items():
+        with transaction.atomic():
+            PdfBlob.objects.filter(pk=blob_id).update(refcount=Greatest(F("refcount") - n, 0))
+            blob = PdfBlob.objects.select_for_update().filter(pk=blob_id, refcount=0).first()
+            if blob is None:
+                continue
+            try:
+                with transaction.atomic():
+                    blob.delete()
+            except ProtectedError:
+                # Refcount desincronizat: documente încă legate - corectăm în loc să ștergem
+                actual = GeneratedDocument.objects.filter(blob_id=blob_id).count()
+                PdfBlob.objects.filter(pk=blob_id).update(refcount=actual)
+                print(f"WARN: Refcount blob {blob.sha256} corectat la {actual}.")
+                continue
+            # Fișierul se șterge cât timp rândul este încă blocat: după commit, un acquire()
+            # concurent ar recrea rândul, ar găsi fișierul pe disc și nu l-ar mai scrie.
+            try:
+                default_storage.delete(blob.file.name)
+                deleted += 1
+            except Exception as e:
+                print(f"WARN: Nu s-a putut șterge fișierul blob {blob.file.name}: {e}")
+    return deleted
+
+
+def unreferenced_files(names):
+    """Dintre fișierele legacy (fără blob) date, cele pe care nu le mai folosește niciun document."""
+    names = {n for n in names if n and not is_blob_file(n)}
+    if not names:
+        return []
+    still_used = set(GeneratedDocument.objects.filter(pdf_file__in=names).values_list("pdf_file", flat=True))
+    return sorted(names - still_used)
+
+
+def delete_unreferenced_files(names):
+    """Șterge fișierele legacy (fără blob) pe care nu le mai folosește niciun document."""
+    deleted = 0
+    for name in unreferenced_files(names):
+        try:
+            if default_storage.exists(name):
+                default_storage.delete(name)
+                deleted += 1
+        except Exception as e:
+            print(f"WARN: Nu s-a putut șterge fișierul {name}: {e}")
+    return deleted
+
+
+def detach_blobs(counts):
+    """
+    Varianta în bloc a release_blobs, pentru ștergeri în masă: scade refcount-urile
+    ({blob_id: n}) cu câte un UPDATE per valoare n și șterge rândurile PdfBlob ajunse
+    la 0. Fișierele NU sunt șterse - se returnează numele lor, pentru apelant.
+    """
+    counts = Counter(counts)
+    if not counts:
+        return []
+    by_refs = defaultdict(list)
+    for blob_id, n in counts.items():
+        by_refs[n].append(blob_id)
+    with transaction.atomic():
+        for n, blob_ids in by_refs.items():
+            PdfBlob.objects.filter(pk__in=blob_ids).update(refcount=Greatest(F("refcount") - n, 0))
+        zero = dict(PdfBlob.objects.select_for_update()
+                    .filter(pk__in=list(counts), refcount=0).values_list("pk", "file"))
+        if not zero:
+            return []
+        # Refcount desincronizat: blob-uri la 0 încă legate de documente - corectăm în loc să ștergem
+        in_use = dict(GeneratedDocument.objects.filter(blob_id__in=list(zero))
+                      .values_list("blob_id").annotate(n=Count("id")))
+        for blob_id, actual in in_use.items():
+            PdfBlob.objects.filter(pk=blob_id).update(refcount=actual)
+            print(f"WARN: Refcount blob #{blob_id} corectat la {actual}.")
+        doomed = [blob_id for blob_id in zero if blob_id not in in_use]
+        PdfBlob.objects.filter(pk__in=doomed).delete()
+    return [zero[blob_id] for blob_id in doomed]
+
+
+def recount():
+    """Recalculează refcount-urile din documente. Returnează numărul de blob-uri corectate."""
+    actual = dict(GeneratedDocument.objects.filter(blob__isnull=False)
+                  .values_list("blob_id").annotate(n=Count("id")))
+    fixed = 0
+    for blob_id, refcount in PdfBlob.objects.values_list("id", "refcount"):
+        if actual.get(blob_id, 0) != refcount:
+            PdfBlob.objects.filter(pk=blob_id).update(refcount=actual.get(blob_id, 0))
+            fixed += 1
+    return fixed
+
+
+def delete_orphan_blobs():
+    """Șterge blob-urile cu refcount 0 (rămase după erori). Returnează fișierele șterse."""
+    return release_blobs({blob_id: 0 for blob_id in PdfBlob.objects.filter(refcount=0).values_list("id", flat=True)})
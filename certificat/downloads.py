@@ -0,0 +1,150 @@
+"""
+Servire protejată a fișierelor din MEDIA (PDF-uri generate, manuale).
+
+Django verifică permisiunile, apoi transferul propriu-zis este predat
+proxy-ului din față, în funcție de PROTECTED_DOWNLOAD_BACKEND:
+
+- "nginx":  header X-Accel-Redirect către o locație `internal` (PROTECTED_DOWNLOAD_PREFIX)
+- "apache": header X-Sendfile cu calea absolută (mod_xsendfile)
+- "python" (implicit, local/dev): fișierul este trimis de Django, în bucăți,
+  cu suport pentru Range (un singur interval, 206/416) și If-Range
+
+În toate variantele răspunsul are ETag și Last-Modified, iar cererile
+condiționale (If-None-Match / If-Modified-Since) primesc 304 fără transfer.
+
+Exemplu nginx:
+
+    location /protected-media/ {
+        internal;
+        alias /cale/catre/media/;
+    }
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags
+
+BACKEND_PYTHON = "python"
+BACKEND_NGINX = "nginx"
+BACKEND_APACHE = "apache"
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def backend():
+    return getattr(settings, "PROTECTED_DOWNLOAD_BACKEND", BACKEND_PYTHON).lower()
+
+
+def file_etag(size, mtime, content_hash=None):
+    """ETag puternic: hash-ul conținutului dacă îl știm (blob), altfel dimensiune + mtime."""
+    if content_hash:
+        return f'"{content_hash}"'
+    return f'"{size:x}-{int(mtime * 1_000_000):x}"'
+
+
+def content_disposition(filename, as_attachment):
+    disposition = "attachment" if as_attachment else "inline"
+    ascii_name = filename.encode("ascii", "ignore").decode("ascii").replace('"', "") or "download"
+    return f"{disposition}; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(filename)}"
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusiv pentru un header Range cu un singur interval; None dacă
+    header-ul lipsește sau nu e suportat (=> răspuns complet); ValueError dacă e nesatisfiabil.
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None  # intervale multiple / unități necunoscute: trimitem fișierul complet
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise ValueError("Interval gol")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Interval în afara fișierului")
+    return start, end
+
+
+def _iter_range(fh, start, end):
+    try:
+        fh.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = fh.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        fh.close()
+
+
+def serve_file(request, name, filename=None, content_type=None, as_attachment=True, content_hash=None,
+               storage=None):
+    """Răspunsul pentru fișierul `name` din storage; permisiunile trebuie verificate de apelant."""
+    storage = storage or default_storage
+    path = storage.path(name)
+    stat = os.stat(path)
+    filename = filename or os.path.basename(name)
+    content_type = content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    etag = file_etag(stat.st_size, stat.st_mtime, content_hash)
+
+    conditional = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if conditional is not None:
+        return conditional
+
+    mode = backend()
+    if mode in (BACKEND_NGINX, BACKEND_APACHE):
+        response = HttpResponse(content_type=content_type)
+        if mode == BACKEND_NGINX:
+            prefix = getattr(settings, "PROTECTED_DOWNLOAD_PREFIX", "/protected-media/")
+            response["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + quote(name.replace(os.sep, "/"))
+        else:
+            response["X-Sendfile"] = path
+        # Range/206 sunt tratate de proxy
+    else:
+        response = _python_response(request, path, stat.st_size, content_type, etag)
+
+    response["Content-Disposition"] = content_disposition(filename, as_attachment)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    response["Accept-Ranges"] = "bytes"
+    response["Cache-Control"] = "private, max-age=0, must-revalidate"
+    return response
+
+
+def _python_response(request, path, size, content_type, etag):
+    range_header = request.META.get("HTTP_RANGE")
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if range_header and if_range and etag not in parse_etags(if_range):
+        range_header = None  # fișierul s-a schimbat între timp: trimitem tot
+
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    start, end = byte_range if byte_range else (0, size - 1)
+    response = StreamingHttpResponse(_iter_range(open(path, "rb"), start, end), content_type=content_type,
+                                     status=206 if byte_range else 200)
+    response["Content-Length"] = str(max(end - start + 1, 0))
+    if byte_range:
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return response
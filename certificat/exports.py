@@ -0,0 +1,221 @@
+"""
+Exportul documentelor generate (CSV / XLSX), pentru view-ul export_generated_documents
+și comanda cu același nume.
+
+Rândurile sunt citite prin ORM cu values_list(...).iterator(chunk_size=...) - pe
+PostgreSQL un cursor server-side - și scrise din mers: nici lista de documente,
+nici fișierul rezultat nu sunt ținute în memorie, deci exporturile pe mai mulți
+ani rulează în memorie constantă.
+
+- CSV: UTF-8 cu BOM (se deschide corect în Excel), ca vechiul export_documente.py;
+- XLSX: un singur sheet, scris direct în arhiva ZIP (inline strings), fără
+  openpyxl.
+
+Cu positions=True, pozițiile din context_json (pozitie1..3) sunt aplatizate în
+coloane (specie, soi, serie, cantitate, UM pentru fiecare poziție).
+"""
+import csv
+import json
+import zipfile
+from datetime import datetime, time, timedelta
+from xml.sax.saxutils import escape
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import GeneratedDocument
+from .services.bundles import _ZipStream
+from .utils import gestiune_series_prefixes
+
+
+FORMAT_CSV = "csv"
+FORMAT_XLSX = "xlsx"
+FORMATS = (FORMAT_CSV, FORMAT_XLSX)
+CONTENT_TYPES = {
+    FORMAT_CSV: "text/csv; charset=utf-8",
+    FORMAT_XLSX: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+CHUNK_SIZE = 2000
+POSITIONS = 3
+POSITION_FIELDS = [("specia", "Specie"), ("soi", "Soi"), ("serie", "Serie lot"),
+                   ("cantitate", "Cantitate"), ("um", "UM")]
+
+COLUMNS = ["document_series", "aviz_number", "created_at", "partner", "generated_by__username", "status"]
+HEADERS = ["Seria", "Număr Aviz", "Data", "Produs/Partener", "Utilizator", "Status"]
+
+
+def day_start(day):
+    """Începutul zilei `day` în fusul orar curent, ca datetime aware."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_documents(queryset=None, date_from=None, date_to=None, gestiune=None, status=None, user=None,
+                     include_deleted=False):
+    """
+    Aplică filtrele exportului. Datele sunt inclusive (după data locală); gestiunea se
+    filtrează după prefixele de serie ale plajelor ei, ca în lista de documente.
+    """
+    queryset = GeneratedDocument.objects.all() if queryset is None else queryset
+    if not include_deleted:
+        queryset = queryset.filter(is_deleted=False)
+    # Intervale pe created_at (început de zi local), nu __date: conversia coloanei la dată
+    # ar împiedica folosirea indexului
+    if date_from:
+        queryset = queryset.filter(created_at__gte=day_start(date_from))
+    if date_to:
+        queryset = queryset.filter(created_at__lt=day_start(date_to + timedelta(days=1)))
+    if status:
+        queryset = queryset.filter(status=status)
+    if user:
+        queryset = queryset.filter(generated_by__username=user)
+    if gestiune:
+        prefixes = gestiune_series_prefixes(gestiune)
+        if not prefixes:
+            return queryset.none()
+        prefix_q = Q()
+        for pref in prefixes:
+            prefix_q |= Q(document_series__startswith=pref)
+        queryset = queryset.filter(prefix_q)
+    return queryset
+
+
+def headers(positions=False):
+    if not positions:
+        return list(HEADERS)
+    extra = [f"{label} {index}" for index in range(1, POSITIONS + 1) for _, label in POSITION_FIELDS]
+    return HEADERS + extra
+
+
+def position_values(context_json):
+    """Valorile pozițiilor 1..3 din context_json (goale dacă lipsesc sau JSON-ul e invalid)."""
+    try:
+        context = json.loads(context_json) if context_json else {}
+    except (TypeError, ValueError):
+        context = {}
+    if not isinstance(context, dict):
+        context = {}
+    values = []
+    for index in range(1, POSITIONS + 1):
+        position = context.get(f"pozitie{index}")
+        if not isinstance(position, dict):
+            position = {}
+        values.extend(position.get(key, "") for key, _ in POSITION_FIELDS)
+    return values
+
+
+def iter_rows(queryset, positions=False, chunk_size=CHUNK_SIZE):
+    """Rândurile exportului (fără header), cele mai noi primele."""
+    columns = COLUMNS + (["context_json"] if positions else [])
+    rows = queryset.order_by("-created_at", "-pk").values_list(*columns).iterator(chunk_size=chunk_size)
+    for row in rows:
+        created_at = timezone.localtime(row[2]).strftime("%Y-%m-%d %H:%M:%S") if row[2] else ""
+        values = [row[0] or "", row[1], created_at, row[3] or "", row[4] or "", row[5]]
+        if positions:
+            values.extend(position_values(row[6]))
+        yield values
+
+
+class _Echo:
+    """Pseudo-fișier pentru csv.writer: întoarce linia în loc să o scrie."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows, header):
+    writer = csv.writer(_Echo())
+    yield "\ufeff" + writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+# --- XLSX ---
+
+XLSX_STATIC_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Documente" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+SHEET_HEAD = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+              '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+SHEET_TAIL = '</sheetData></worksheet>'
+# Caractere de control nepermise în XML 1.0
+XML_ILLEGAL = dict.fromkeys(c for c in range(32) if c not in (9, 10, 13))
+
+
+def _cell(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c t="n"><v>{value}</v></c>'
+    text = escape(str(value).translate(XML_ILLEGAL))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _sheet_row(values):
+    return "<row>" + "".join(_cell(value) for value in values) + "</row>"
+
+
+def iter_xlsx(rows, header, flush_rows=500):
+    """Generator cu octeții unui fișier XLSX; sheet-ul este comprimat din mers."""
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_STATIC_PARTS.items():
+            archive.writestr(name, content)
+        with archive.open("xl/worksheets/sheet1.xml", mode="w", force_zip64=True) as sheet:
+            pending = [SHEET_HEAD, _sheet_row(header)]
+            for row in rows:
+                pending.append(_sheet_row(row))
+                if len(pending) >= flush_rows:
+                    sheet.write("".join(pending).encode("utf-8"))
+                    pending = []
+                    data = stream.take()
+                    if data:
+                        yield data
+            pending.append(SHEET_TAIL)
+            sheet.write("".join(pending).encode("utf-8"))
+    yield stream.take()
+
+
+def iter_export(queryset, export_format=FORMAT_CSV, positions=False, chunk_size=CHUNK_SIZE):
+    """Conținutul exportului, în bucăți (str pentru CSV, bytes pentru XLSX)."""
+    rows = iter_rows(queryset, positions=positions, chunk_size=chunk_size)
+    if export_format == FORMAT_XLSX:
+        return iter_xlsx(rows, headers(positions))
+    if export_format == FORMAT_CSV:
+        return iter_csv(rows, headers(positions))
+    raise ValueError(f"Format de export necunoscut: {export_format}")
+
+
+def export_filename(export_format):
+    return f"export_documente_{timezone.localtime().strftime('%Y%m%d_%H%M%S')}.{export_format}"
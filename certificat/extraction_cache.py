@@ -0,0 +1,159 @@
+"""
+Cache pe disc (SQLite) pentru datele extrase din PDF-urile de backup.
+
+Comenzile scan_series_from_pdfs și restore_generated_documents citesc aceleași
+fișiere la fiecare rulare; extracția (text + tabele) este partea scumpă. Aici
+se păstrează rezultatul per fișier, ca JSON, împreună cu dimensiunea, mtime și
+SHA-256 al conținutului:
+
+- dimensiune + mtime identice => rezultatul din cache, fără a citi fișierul;
+- altfel se calculează SHA-256: același conținut (fișier atins, copiat sau
+  redenumit) => rezultatul din cache, cu cheia actualizată;
+- altfel fișierul este nou sau modificat și trebuie extras din nou.
+
+Fiecare intrare are un namespace (extractorul care a produs-o + versiunile
+PyPDF2/pdfplumber), deci o schimbare de extractor sau de bibliotecă invalidează
+automat datele vechi. Fișierul cache: PDF_EXTRACTION_CACHE_FILE.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from importlib import metadata
+
+from django.conf import settings
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS extraction (
+    namespace TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    data TEXT NOT NULL,
+    extracted_at REAL NOT NULL,
+    PRIMARY KEY (namespace, path)
+);
+CREATE INDEX IF NOT EXISTS idx_extraction_sha ON extraction (namespace, sha256);
+"""
+COMMIT_EVERY = 200
+CHUNK_SIZE = 1024 * 1024
+
+
+def parser_signature():
+    """Versiunile bibliotecilor de extracție; fac parte din namespace."""
+    parts = []
+    for dist in ("PyPDF2", "pdfplumber"):
+        try:
+            parts.append(f"{dist}-{metadata.version(dist)}")
+        except metadata.PackageNotFoundError:
+            parts.append(f"{dist}-none")
+    return "+".join(parts)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Cache pentru un extractor (`name`, ex: "scan-v1"). enabled=False => nu citește și nu
+    scrie nimic; refresh=True => ignoră intrările existente, dar le rescrie.
+    """
+
+    def __init__(self, name, path=None, enabled=True, refresh=False):
+        self.namespace = f"{name}:{parser_signature()}"
+        self.enabled = enabled
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+        self._hashed = {}  # cale -> (size, mtime_ns, sha256) calculat în get(), refolosit de put()
+        self._conn = None
+        if enabled:
+            db_path = str(path or getattr(settings, "PDF_EXTRACTION_CACHE_FILE"))
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, timeout=30)
+            self._conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get(self, path):
+        """Datele extrase pentru fișier sau None (fișier nou/modificat => trebuie extras)."""
+        if not self.enabled:
+            return None
+        if self.refresh:
+            self.misses += 1
+            return None
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, sha256, data FROM extraction WHERE namespace = ? AND path = ?",
+            (self.namespace, path),
+        ).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            self.hits += 1
+            return json.loads(row[3])
+
+        # Metadatele diferă: comparăm conținutul (aceeași cale sau alt fișier cu același conținut)
+        sha = self._sha256(path, stat)
+        if not (row and row[2] == sha):
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, sha256, data FROM extraction WHERE namespace = ? AND sha256 = ? LIMIT 1",
+                (self.namespace, sha),
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._hashed.pop(path, None)
+        self._write(path, stat, sha, row[3])
+        return json.loads(row[3])
+
+    def put(self, path, data):
+        """Memorează rezultatul extracției (trebuie să fie serializabil JSON)."""
+        if not self.enabled:
+            return
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        self._write(path, stat, self._sha256(path, stat), json.dumps(data, ensure_ascii=False))
+
+    def _sha256(self, path, stat):
+        known = self._hashed.pop(path, None)
+        if known and known[:2] == (stat.st_size, stat.st_mtime_ns):
+            return known[2]
+        sha = file_sha256(path)
+        self._hashed[path] = (stat.st_size, stat.st_mtime_ns, sha)
+        return sha
+
+    def _write(self, path, stat, sha, data):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO extraction (namespace, path, size, mtime_ns, sha256, data, extracted_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.namespace, path, stat.st_size, stat.st_mtime_ns, sha, data, time.time()),
+        )
+        self._pending += 1
+        if self._pending >= COMMIT_EVERY:
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+
+    def summary(self):
+        if not self.enabled:
+            return "extraction cache disabled"
+        return f"extraction cache: {self.hits} hit(s), {self.misses} miss(es)"
@@ -6,6 +6,7 @@ from .models import (
     Role, Gestiune, TipologieProdus, UserProfile, DocumentRange,
     SpecieMapping, SerieExtraData, GeneratedDocument, UserManual
 )
+from .permissions import get_capabilities
 # Importăm FormHelper
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, HTML # Opțional, dacă vrei să adaugi HTML custom
@@ -116,12 +117,12 @@ class DocumentRangeForm(forms.ModelForm):
         self.helper.form_tag = False
 
         if user:
-            user_profile = getattr(user, 'userprofile', None)
-            if user_profile and user_profile.role.name.lower() != 'superadmin' and user_profile.gestiune:
-                self.fields['gestiune'].queryset = Gestiune.objects.filter(pk=user_profile.gestiune.pk)
+            caps = get_capabilities(user)
+            if not caps.is_superadmin and caps.gestiune_id:
+                self.fields['gestiune'].queryset = Gestiune.objects.filter(pk=caps.gestiune_id)
                 self.fields['gestiune'].disabled = True
                 if not self.is_bound:
-                     self.initial['gestiune'] = user_profile.gestiune
+                     self.initial['gestiune'] = caps.gestiune_id
                 self.fields['gestiune'].help_text = "Gestiunea este asignată automat contului tău."
 
 class SpecieMappingManualForm(forms.ModelForm):
@@ -0,0 +1,73 @@
+"""
+Cache pentru panourile paginii de administrare (fragmente de șablon versionate).
+
+Fiecare panou (utilizatori, roluri, gestiuni, ...) este randat în administrare.html
+într-un bloc {% cache %} a cărui cheie conține versiunea panoului. Versiunile sunt
+contoare în cache-ul Django, crescute de signals.py la salvarea/ștergerea modelelor
+din PANELS; un fragment vechi nu mai este găsit și expiră singur după
+ADMIN_FRAGMENT_CACHE_TTL. Listele sunt transmise șablonului ca QuerySet-uri leneșe
+(sau SimpleLazyObject), deci interogările rulează doar la o ratare de cache.
+
+Jurnalul de activitate nu are versiune în cache: se scrie la fiecare cerere, așa că
+fragmentul lui folosește ca versiune id-ul ultimei înregistrări (latest_activity_id).
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import (ActivityLog, DocumentRange, Gestiune, Role, SpecieMapping, TipologieProdus, UserManual,
+                     UserProfile)
+
+
+CACHE_PREFIX = "admin-frag"
+
+# Panou -> modelele afișate în el
+PANELS = {
+    "users": (User, UserProfile, Role, Gestiune),
+    "roles": (Role,),
+    "gestiuni": (Gestiune,),
+    "tipologii": (TipologieProdus,),
+    "manuals": (UserManual,),
+    "ranges": (DocumentRange, Gestiune, TipologieProdus),
+    "speciemapping": (SpecieMapping, TipologieProdus),
+}
+
+
+def cache_ttl():
+    return int(getattr(settings, "ADMIN_FRAGMENT_CACHE_TTL", 600))
+
+
+def _version_key(panel):
+    return f"{CACHE_PREFIX}:version:{panel}"
+
+
+def versions():
+    """Versiunea curentă a fiecărui panou (un singur get_many), pentru cheile {% cache %}."""
+    keys = {panel: _version_key(panel) for panel in PANELS}
+    found = cache.get_many(list(keys.values()))
+    return {panel: found.get(key, 0) for panel, key in keys.items()}
+
+
+def latest_activity_id():
+    return ActivityLog.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+
+def _bump(panel):
+    key = _version_key(panel)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def invalidate(*panels):
+    """Crește versiunea panourilor după commit (altfel o cerere concurentă ar pune în cache datele vechi)."""
+    def bump():
+        for panel in panels:
+            _bump(panel)
+    transaction.on_commit(bump)
+
+
+def invalidate_for_model(model):
+    invalidate(*[panel for panel, models in PANELS.items() if model in models])
@@ -0,0 +1,176 @@
+"""
+Instrumentare cereri și etape critice (hot path).
+
+- InstrumentationMiddleware măsoară durata fiecărei cereri și numărul de
+  interogări DB și adaugă header-ul Server-Timing.
+- timed("etapa") măsoară o etapă (preluare feed, alocare range, randare DOCX,
+  conversie PDF, scriere fișier) și o atașează cererii curente.
+- Ultimele cereri sunt păstrate într-un buffer circular (per proces) din care
+  se calculează p50/p95/p99 pe view și pe etapă (vezi snapshot()).
+- Duratele etapelor alimentează și histograma Prometheus din metrics.py.
+"""
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+from . import metrics
+
+
+# Etape standard folosite în view-uri
+STAGE_FEED_FETCH = "feed_fetch"
+STAGE_RANGE_ALLOCATION = "range_allocation"
+STAGE_DOCX_RENDER = "docx_render"
+STAGE_PDF_CONVERSION = "pdf_conversion"
+STAGE_STORAGE_WRITE = "storage_write"
+
+_local = threading.local()
+_lock = threading.Lock()
+_requests = deque(maxlen=getattr(settings, "INSTRUMENTATION_BUFFER_SIZE", 2000))
+# Etape măsurate în afara unei cereri HTTP (ex: comenzi de management)
+_orphan_spans = deque(maxlen=getattr(settings, "INSTRUMENTATION_BUFFER_SIZE", 2000))
+
+
+class Span:
+    """O etapă măsurată. ms este disponibil după ieșirea din blocul with."""
+    __slots__ = ("stage", "ms")
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.ms = None
+
+
+class RequestTrace:
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.view_name = None
+        self.started = time.perf_counter()
+        self.spans = []
+        self.query_count = 0
+        self.total_ms = None
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+
+def current_trace():
+    return getattr(_local, "trace", None)
+
+
+def elapsed_ms():
+    """Milisecunde scurse de la începutul cererii curente (None în afara unei cereri)."""
+    trace = current_trace()
+    return int(trace.elapsed_ms()) if trace else None
+
+
+@contextmanager
+def timed(stage):
+    """
+    Măsoară un bloc de cod ca etapă:
+
+        with timed(STAGE_DOCX_RENDER) as span:
+            ...
+        log_activity(..., duration_ms=span.ms)
+    """
+    span = Span(stage)
+    start = time.perf_counter()
+    try:
+        yield span
+    finally:
+        seconds = time.perf_counter() - start
+        span.ms = int(seconds * 1000)
+        metrics.STAGE_SECONDS.observe(seconds, stage=stage)
+        trace = current_trace()
+        if trace is not None:
+            trace.spans.append((stage, span.ms))
+        else:
+            with _lock:
+                _orphan_spans.append((stage, span.ms))
+
+
+class InstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trace = RequestTrace(request.method, request.path)
+        _local.trace = trace
+
+        def count_queries(execute, sql, params, many, context):
+            trace.query_count += 1
+            return execute(sql, params, many, context)
+
+        try:
+            with connection.execute_wrapper(count_queries):
+                response = self.get_response(request)
+        finally:
+            _local.trace = None
+
+        trace.total_ms = trace.elapsed_ms()
+        match = getattr(request, "resolver_match", None)
+        trace.view_name = (match.view_name if match else None) or "<neasociat>"
+        with _lock:
+            _requests.append(trace)
+
+        timings = [f"total;dur={trace.total_ms:.1f}", f"db;desc=\"{trace.query_count} queries\""]
+        timings += [f"{stage};dur={ms}" for stage, ms in trace.spans]
+        response["Server-Timing"] = ", ".join(timings)
+        metrics.flush()
+        return response
+
+
+def percentile(values, pct):
+    """Percentila prin metoda nearest-rank; values trebuie să fie sortate."""
+    if not values:
+        return None
+    rank = max(1, math.ceil(pct / 100.0 * len(values)))
+    return values[min(rank, len(values)) - 1]
+
+
+def _summary(values):
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": values[-1] if values else None,
+    }
+
+
+def snapshot():
+    """Statistici p50/p95/p99 (ms) pe view și pe etapă din bufferul procesului curent."""
+    with _lock:
+        traces = list(_requests)
+        orphans = list(_orphan_spans)
+
+    per_view, per_view_queries, per_stage = {}, {}, {}
+    for trace in traces:
+        per_view.setdefault(trace.view_name, []).append(round(trace.total_ms, 1))
+        per_view_queries.setdefault(trace.view_name, []).append(trace.query_count)
+        for stage, ms in trace.spans:
+            per_stage.setdefault(stage, []).append(ms)
+    for stage, ms in orphans:
+        per_stage.setdefault(stage, []).append(ms)
+
+    views = {}
+    for name, values in per_view.items():
+        views[name] = _summary(values)
+        views[name]["queries"] = _summary(per_view_queries[name])
+    return {
+        "buffer_size": _requests.maxlen,
+        "requests_recorded": len(traces),
+        "views": views,
+        "stages": {stage: _summary(values) for stage, values in per_stage.items()},
+    }
+
+
+def reset():
+    with _lock:
+        _requests.clear()
+        _orphan_spans.clear()
@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from certificat import activity_archive
+from certificat.models import ActivityLog
+
+
+class Command(BaseCommand):
+    help = (
+        "Move ActivityLog rows older than N days into monthly NDJSON/gzip archives "
+        "(activitylog_YYYY-MM.ndjson.gz) and delete them from the live table in batches. "
+        "On a partitioned Postgres table, fully expired monthly partitions are dropped. Use --yes to confirm."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None, help="Retention in days (default: settings.ACTIVITY_LOG_RETENTION_DAYS)")
+        parser.add_argument("--batch-size", dest="batch_size", type=int, default=5000, help="Rows exported/deleted per batch")
+        parser.add_argument("--output-dir", dest="output_dir", default=None, help="Archive directory (default: settings.ACTIVITY_LOG_ARCHIVE_DIR)")
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be archived")
+        parser.add_argument("--yes", action="store_true", help="Confirm archival and deletion")
+
+    def handle(self, *args, **options):
+        days = options["days"]
+        if days is None:
+            days = getattr(settings, "ACTIVITY_LOG_RETENTION_DAYS", 180)
+        if days < 1:
+            raise CommandError("--days must be >= 1")
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be >= 1")
+        output_dir = str(options["output_dir"] or getattr(settings, "ACTIVITY_LOG_ARCHIVE_DIR"))
+
+        cutoff = timezone.now() - timedelta(days=days)
+        expired = ActivityLog.objects.filter(timestamp__lt=cutoff)
+        total = expired.count()
+        if total == 0:
+            self.stdout.write(self.style.WARNING(f"No ActivityLog rows older than {cutoff:%Y-%m-%d %H:%M}."))
+            return
+
+        self.stdout.write(self.style.WARNING(f"{total} ActivityLog rows older than {cutoff:%Y-%m-%d %H:%M} -> {output_dir}"))
+
+        with connection.cursor() as cursor:
+            partitioned = activity_archive.is_partitioned(cursor)
+            droppable = []
+            if partitioned:
+                droppable = [p for p in activity_archive.list_month_partitions(cursor) if p[2] <= cutoff]
+
+        if options["dry_run"]:
+            for name, start, end in droppable:
+                self.stdout.write(f"[DRY-RUN] Would export and DROP partition {name} ({start:%Y-%m})")
+            self.stdout.write(f"[DRY-RUN] Would archive {total} rows in batches of {batch_size}.")
+            return
+
+        if not options["yes"]:
+            raise CommandError("Refusing to archive without --yes. Re-run with --yes to confirm.")
+
+        archived = 0
+        per_month = {}
+
+        # 1) Partiții lunare complet expirate: export + DROP (fără DELETE rând cu rând)
+        for name, start, end in droppable:
+            month_qs = ActivityLog.objects.filter(timestamp__gte=start, timestamp__lt=end)
+            for batch in activity_archive.iter_batches(month_qs, batch_size):
+                self._merge(per_month, activity_archive.append_rows(output_dir, batch))
+                archived += len(batch)
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE {connection.ops.quote_name(name)}")
+            self.stdout.write(f"Dropped partition {name}")
+
+        # 2) Restul (luna parțială sau tabelă nepartiționată): export + DELETE pe lot
+        # Rândurile sunt scrise și sincronizate pe disc înainte de ștergere; o întrerupere
+        # între cei doi pași poate duplica un lot în arhivă, dar nu pierde date.
+        for batch in activity_archive.iter_batches(expired, batch_size):
+            self._merge(per_month, activity_archive.append_rows(output_dir, batch))
+            pks = [row["id"] for row in batch]
+            with transaction.atomic():
+                ActivityLog.objects.filter(pk__in=pks).delete()
+            archived += len(batch)
+            self.stdout.write(f"Archived {archived}/{total}")
+
+        for month in sorted(per_month):
+            self.stdout.write(f"  {month}: {per_month[month]} rows")
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} ActivityLog rows into {output_dir}."))
+
+    @staticmethod
+    def _merge(totals, written):
+        for month, count in written.items():
+            totals[month] = totals.get(month, 0) + count
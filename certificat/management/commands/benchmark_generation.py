@@ -0,0 +1,343 @@
+import json
+import os
+import platform
+import queue
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from certificat import instrumentation, pdf_backends
+from certificat.forms import SerieExtraDataForm
+from certificat.models import (
+    DocumentRange, GeneratedDocument, Gestiune, Role, SerieExtraData, SpecieMapping, TipologieProdus,
+)
+
+
+SCENARIOS = ("generate", "regenerate", "list", "home")
+SPECII = ["Grau", "Porumb", "Floarea soarelui", "Rapita", "Orz", "Soia"]
+TIPOLOGII = ["General", "Cereale", "Oleaginoase"]
+AVIZ_BASE = 900000
+
+# Un PDF minimal valid, folosit de convertorul simulat (--pdf fake)
+FAKE_PDF = (
+    b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+    b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 595 842]>>endobj\n"
+    b"trailer<</Root 1 0 R>>\n%%EOF\n"
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the aviz pipeline (generate, regenerate, document list, home) against a throwaway "
+        "test database seeded with synthetic data and a locally served fake feed. Prints a JSON report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--avize", type=int, default=20, help="Number of distinct avize to generate")
+        parser.add_argument("--positions", type=int, default=4, help="Feed positions (series) per aviz")
+        parser.add_argument("--concurrency", type=int, default=4, help="Parallel test clients (threads)")
+        parser.add_argument("--iterations", type=int, default=50, help="Requests for the list/home scenarios")
+        parser.add_argument("--seed-docs", dest="seed_docs", type=int, default=500, help="Extra pre-existing documents for list/home")
+        parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma separated subset of: {', '.join(SCENARIOS)}")
+        parser.add_argument("--pdf", choices=["fake", "real"], default="fake",
+                            help="fake: stub converter writing a tiny PDF (isolates the pipeline); real: configured LibreOffice/Word backend")
+        parser.add_argument("--fake-pdf-ms", dest="fake_pdf_ms", type=int, default=0, help="Simulated conversion latency for --pdf fake")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducible data")
+        parser.add_argument("--output", default=None, help="Write the JSON report to this file instead of stdout")
+
+    def handle(self, *args, **options):
+        scenarios = [s.strip() for s in options["scenarios"].split(",") if s.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        if options["concurrency"] < 1 or options["avize"] < 1 or options["positions"] < 1:
+            raise CommandError("--avize, --positions and --concurrency must be >= 1")
+        if "regenerate" in scenarios and "generate" not in scenarios:
+            raise CommandError("The 'regenerate' scenario needs 'generate' (it regenerates the generated documents).")
+
+        random.seed(options["seed"])
+        workdir = tempfile.mkdtemp(prefix="ddcf_bench_")
+        old_db_name = connection.settings_dict["NAME"]
+        feed_server = None
+        restore_pdf = None
+
+        setup_test_environment()
+        # Mesajele print() din view-uri (DEBUG/WARN) merg pe stderr cât rulează benchmark-ul; raportul
+        # JSON este scris la final pe self.stdout (fluxul original), deci poate fi trimis direct unui parser
+        with redirect_stdout(sys.stderr):
+            try:
+                self._create_database(workdir)
+                feed_records = self._build_feed(options["avize"], options["positions"])
+                feed_server, feed_url = self._start_feed_server(feed_records)
+                restore_pdf = self._configure_pdf(options["pdf"], options["fake_pdf_ms"])
+
+                with override_settings(AVIZ_FEED_URL=feed_url, MEDIA_ROOT=os.path.join(workdir, "media")):
+                    user = self._seed(options["avize"], options["positions"], options["seed_docs"])
+                    instrumentation.reset()
+                    report = self._run(user, scenarios, options)
+                    report["stages"] = instrumentation.snapshot()["stages"]
+                    pdf_backend = pdf_backends.get_backend().name
+            finally:
+                if restore_pdf:
+                    restore_pdf()
+                if feed_server:
+                    feed_server.shutdown()
+                connections.close_all()
+                # Doar dacă conexiunea a trecut pe baza de test: dacă create_test_db a eșuat înainte
+                # (ex. sys.exit(2) fără drept CREATEDB), NAME este încă baza reală și nu trebuie ștearsă
+                if connection.settings_dict["NAME"] != old_db_name:
+                    connection.creation.destroy_test_db(old_db_name, verbosity=0)
+                teardown_test_environment()
+                shutil.rmtree(workdir, ignore_errors=True)
+
+        report["meta"] = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "host": platform.node(),
+            "python": platform.python_version(),
+            "db_vendor": connection.vendor,
+            "db_transaction_mode": connection.settings_dict.get("OPTIONS", {}).get("transaction_mode"),
+            "pdf_backend": pdf_backend,
+            "options": {k: options[k] for k in ("avize", "positions", "concurrency", "iterations", "seed_docs",
+                                                "pdf", "fake_pdf_ms", "seed")},
+            "scenarios": scenarios,
+        }
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                f.write(output)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    # --- Pregătire mediu ---
+
+    def _create_database(self, workdir):
+        test_settings = connection.settings_dict.setdefault("TEST", {})
+        # Schema se creează direct din modele, independent de istoricul migrărilor
+        test_settings["MIGRATE"] = False
+        if connection.vendor == "sqlite":
+            # Fișier (nu :memory:) pentru ca thread-urile să partajeze baza de date
+            test_settings["NAME"] = os.path.join(workdir, "benchmark.sqlite3")
+            sqlite_options = connection.settings_dict.setdefault("OPTIONS", {})
+            sqlite_options["timeout"] = 30
+            # BEGIN IMMEDIATE: tranzacțiile cer lock-ul de scriere de la început și așteaptă (timeout)
+            # în loc să eșueze cu "database is locked" când o citire încearcă să devină scriere
+            # (cazul generărilor concurente cu tranzacțiile implicite DEFERRED)
+            sqlite_options["transaction_mode"] = "IMMEDIATE"
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+    def _build_feed(self, avize, positions):
+        records = []
+        for a in range(avize):
+            aviz = AVIZ_BASE + a
+            for p in range(positions):
+                specie = SPECII[(a + p) % len(SPECII)]
+                records.append({
+                    "AVIZ": str(aviz), "PARTENER": f"Partener Benchmark {a % 7}",
+                    "ARTICOL": f"{specie} soi {p}", "SERIE": f"LOT{aviz}{p:02d}",
+                    "CANT": str(random.randint(100, 5000)), "SPECIE": specie, "UM": "kg",
+                    "soi": f"{specie} soi {p}", "nr_referinta": f"REF{aviz}{p:02d}",
+                })
+        return records
+
+    def _start_feed_server(self, records):
+        body = json.dumps(records).encode("utf-8")
+
+        class FeedHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server, f"http://127.0.0.1:{server.server_address[1]}/feed.json"
+
+    def _configure_pdf(self, mode, fake_ms):
+        if mode == "real":
+            backend = pdf_backends.get_backend()
+            if not backend.available:
+                raise CommandError(f"--pdf real requested, but PDF conversion is not available: {backend.detail}")
+            return None
+
+        def fake_convert(docx_path, pdf_path):
+            if fake_ms:
+                time.sleep(fake_ms / 1000.0)
+            with open(pdf_path, "wb") as f:
+                f.write(FAKE_PDF)
+
+        previous = pdf_backends.set_backend(
+            pdf_backends.PdfBackend("benchmark_fake", True, "Convertor simulat (benchmark)", convert_func=fake_convert))
+        return lambda: pdf_backends.set_backend(previous)
+
+    def _seed(self, avize, positions, seed_docs):
+        gestiune = Gestiune.objects.create(nume="Gestiune Benchmark", locatie="Local", cod_inregistrare="BENCH-001")
+        for index, nume in enumerate(TIPOLOGII):
+            tip = TipologieProdus.objects.create(nume=nume)
+            prefix = f"B{index}"
+            DocumentRange.objects.create(gestiune=gestiune, tipologie=tip,
+                                         numar_inceput=f"{prefix}000001", numar_final=f"{prefix}999999")
+        tipologii = {t.nume: t for t in TipologieProdus.objects.all()}
+        SpecieMapping.objects.bulk_create([
+            SpecieMapping(specie=s, tipologie=tipologii["Cereale" if i % 2 == 0 else "Oleaginoase"])
+            for i, s in enumerate(SPECII)
+        ])
+
+        extra_fields = [f for f in SerieExtraDataForm.Meta.fields if f != "serie"]
+        SerieExtraData.objects.bulk_create([
+            SerieExtraData(serie=f"LOT{AVIZ_BASE + a}{p:02d}", **{f: f"{f}-{a}-{p}" for f in extra_fields})
+            for a in range(avize) for p in range(positions)
+        ])
+
+        role, _ = Role.objects.get_or_create(name="utilizator")
+        user = User.objects.create_user("benchmark", "benchmark@example.com", "benchmark")
+        profile = user.userprofile
+        profile.role = role
+        profile.gestiune = gestiune
+        profile.ok_aviz = profile.ok_doc_generate = profile.vede_toate_documentele = True
+        profile.save()
+
+        docs = []
+        for i in range(seed_docs):
+            specie = SPECII[i % len(SPECII)]
+            context = {
+                "aviz": str(100000 + i), "seria": f"S{i:07d}",
+                "pozitie1": {"articol": f"{specie} soi {i % 5}", "serie": f"OLD{i:06d}", "specia": specie,
+                             "cantitate": 100 + i, "um": "kg", "tipologie": "Cereale"},
+            }
+            docs.append(GeneratedDocument(
+                aviz_number=str(100000 + i), generated_by=user, partner=f"Partener {i % 13}",
+                document_series=f"S{i:07d}", status="finalizat", context_json=json.dumps(context),
+            ))
+        GeneratedDocument.objects.bulk_create(docs, batch_size=500)
+        return user
+
+    # --- Execuție ---
+
+    def _run(self, user, scenarios, options):
+        results = {}
+        if "generate" in scenarios:
+            jobs = [("POST", reverse("generate_docx_aviz"), {"aviz_number": str(AVIZ_BASE + a), "action": "generate"})
+                    for a in range(options["avize"])]
+            results["generate"] = self._execute(user, jobs, options["concurrency"], ok_location="document-preview")
+        if "regenerate" in scenarios:
+            avize = [str(AVIZ_BASE + a) for a in range(options["avize"])]
+            docs = GeneratedDocument.objects.filter(aviz_number__in=avize, is_deleted=False).order_by("id")
+            jobs = [("POST", reverse("edit_generated_document", args=[doc.id]), self._regenerate_payload(doc))
+                    for doc in docs]
+            results["regenerate"] = self._execute(user, jobs, options["concurrency"], ok_location="document-preview")
+        if "list" in scenarios:
+            filters = [{}, {"aviz": str(AVIZ_BASE)}, {"serie": "S00001"}, {"partener": "Partener 3"},
+                       {"lot": "OLD0001"}, {"articol": "Grau"}, {"page": "3"}]
+            url = reverse("generated_documents_list")
+            jobs = [("GET", url, filters[i % len(filters)]) for i in range(options["iterations"])]
+            results["list"] = self._execute(user, jobs, options["concurrency"])
+        if "home" in scenarios:
+            jobs = [("GET", reverse("home"), {}) for _ in range(options["iterations"])]
+            results["home"] = self._execute(user, jobs, options["concurrency"])
+        return {"scenarios": results}
+
+    def _regenerate_payload(self, doc):
+        context = json.loads(doc.context_json or "{}")
+        series = [context[k]["serie"] for k in ("pozitie1", "pozitie2", "pozitie3")
+                  if isinstance(context.get(k), dict) and context[k].get("serie")]
+        extras = SerieExtraData.objects.filter(serie__in=series).order_by("id")
+        data = {"action": "generate", "form-TOTAL_FORMS": str(len(extras)), "form-INITIAL_FORMS": str(len(extras)),
+                "form-MIN_NUM_FORMS": "0", "form-MAX_NUM_FORMS": "1000"}
+        for i, extra in enumerate(extras):
+            data[f"form-{i}-id"] = str(extra.id)
+            for field in SerieExtraDataForm.Meta.fields:
+                data[f"form-{i}-{field}"] = getattr(extra, field) or ""
+        return data
+
+    def _execute(self, user, jobs, concurrency, ok_location=None):
+        work = queue.Queue()
+        for job in jobs:
+            work.put(job)
+        samples, lock = [], threading.Lock()
+
+        def worker():
+            client = Client()
+            client.force_login(user)
+            conn = connections["default"]
+            try:
+                while True:
+                    try:
+                        method, url, data = work.get_nowait()
+                    except queue.Empty:
+                        return
+                    counter = {"queries": 0}
+
+                    def count(execute, sql, params, many, context):
+                        counter["queries"] += 1
+                        return execute(sql, params, many, context)
+
+                    start = time.perf_counter()
+                    error = None
+                    try:
+                        with conn.execute_wrapper(count):
+                            response = client.post(url, data) if method == "POST" else client.get(url, data)
+                        status = response.status_code
+                        if status >= 400:
+                            error = f"HTTP {status}"
+                        elif ok_location and ok_location not in response.get("Location", ""):
+                            error = f"redirect -> {response.get('Location', '-')}"
+                    except Exception as e:
+                        status, error = None, f"{type(e).__name__}: {e}"
+                    elapsed = (time.perf_counter() - start) * 1000
+                    with lock:
+                        samples.append((elapsed, counter["queries"], error))
+            finally:
+                conn.close()
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(min(concurrency, len(jobs)) or 1)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - started
+
+        latencies = sorted(s[0] for s in samples)
+        queries = sorted(s[1] for s in samples)
+        errors = [s[2] for s in samples if s[2]]
+        return {
+            "requests": len(samples),
+            "errors": len(errors),
+            "error_samples": sorted(set(errors))[:5],
+            "wall_seconds": round(wall, 3),
+            "throughput_rps": round(len(samples) / wall, 2) if wall else None,
+            "latency_ms": self._summary(latencies),
+            "queries_per_request": self._summary(queries),
+        }
+
+    @staticmethod
+    def _summary(values):
+        if not values:
+            return {}
+        return {
+            "mean": round(sum(values) / len(values), 2),
+            "p50": round(instrumentation.percentile(values, 50), 2),
+            "p95": round(instrumentation.percentile(values, 95), 2),
+            "p99": round(instrumentation.percentile(values, 99), 2),
+            "max": round(values[-1], 2),
+        }
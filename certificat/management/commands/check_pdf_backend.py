@@ -0,0 +1,56 @@
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from certificat import pdf_backends
+
+
+class Command(BaseCommand):
+    help = (
+        "Detect the DOCX -> PDF conversion backend (MS Word/COM, LibreOffice, docx2pdf), refresh the "
+        "backend cache file and optionally run a test conversion of the aviz template. Exit code 1 if unavailable."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--convert", action="store_true", help="Also convert certificat/template.docx as an end-to-end check")
+        parser.add_argument("--use-cache", dest="use_cache", action="store_true", help="Accept a cached detection result instead of re-probing")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        backend = pdf_backends.get_backend(refresh=not options["use_cache"])
+        probe_ms = int((time.perf_counter() - started) * 1000)
+
+        self.stdout.write(f"Backend: {backend.name}")
+        self.stdout.write(f"Available: {backend.available}")
+        if backend.command:
+            self.stdout.write(f"Command: {backend.command}")
+        self.stdout.write(f"Detail: {backend.detail}")
+        self.stdout.write(f"Probe time: {probe_ms} ms")
+        cache_file = getattr(settings, "PDF_BACKEND_CACHE_FILE", None)
+        self.stdout.write(f"Cache file: {cache_file or '-'}")
+
+        if not backend.available:
+            raise CommandError("PDF conversion is NOT available on this machine.")
+
+        if options["convert"]:
+            template_path = os.path.join(settings.BASE_DIR, "certificat", "template.docx")
+            if not os.path.exists(template_path):
+                raise CommandError(f"Template not found: {template_path}")
+            with tempfile.TemporaryDirectory() as tmpdir:
+                pdf_path = os.path.join(tmpdir, "check.pdf")
+                started = time.perf_counter()
+                try:
+                    with pdf_backends.com_context():
+                        pdf_backends.convert(template_path, pdf_path)
+                except Exception as e:
+                    raise CommandError(f"Test conversion failed: {type(e).__name__}: {e}")
+                elapsed_ms = int((time.perf_counter() - started) * 1000)
+                size = os.path.getsize(pdf_path) if os.path.exists(pdf_path) else 0
+            if not size:
+                raise CommandError("Test conversion produced no PDF output.")
+            self.stdout.write(f"Test conversion: OK ({size} bytes, {elapsed_ms} ms)")
+
+        self.stdout.write(self.style.SUCCESS("PDF backend OK."))
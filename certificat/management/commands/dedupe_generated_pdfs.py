@@ -0,0 +1,83 @@
+from collections import defaultdict
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from certificat import blobstore
+from certificat.models import GeneratedDocument, PdfBlob
+
+
+class Command(BaseCommand):
+    help = (
+        "Move legacy GeneratedDocument PDFs (one file per document) into the content-addressed blob store, "
+        "storing byte-identical files once, then recompute blob refcounts and delete unreferenced blobs. "
+        "Use --dry-run to see the expected savings, --yes to apply."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--yes", action="store_true", help="Confirm changes without prompt")
+        parser.add_argument("--dry-run", action="store_true", help="Hash the legacy files and report duplicates without changing anything")
+        parser.add_argument("--limit", type=int, default=0, help="Process at most N legacy files (0 = all)")
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        if not dry_run and not options["yes"]:
+            raise CommandError("Refusing to modify files without --yes. Re-run with --yes (or --dry-run).")
+
+        # Documente legacy grupate după fișier (restaurările repetate pot partaja același fișier)
+        docs_by_file = defaultdict(list)
+        legacy_qs = (GeneratedDocument.objects.filter(blob__isnull=True).exclude(pdf_file="")
+                     .exclude(pdf_file__isnull=True).values_list("id", "pdf_file"))
+        for doc_id, name in legacy_qs.iterator():
+            docs_by_file[name].append(doc_id)
+        names = sorted(docs_by_file)
+        if options["limit"]:
+            names = names[:options["limit"]]
+        self.stdout.write(f"Legacy files referenced by documents: {len(names)}")
+
+        seen_hashes = set(PdfBlob.objects.values_list("sha256", flat=True)) if dry_run else set()
+        migrated = missing = duplicates = 0
+        bytes_total = bytes_saved = 0
+        for name in names:
+            if not default_storage.exists(name):
+                missing += 1
+                self.stderr.write(f"Missing file, left unchanged: {name} (docs {docs_by_file[name]})")
+                continue
+            with default_storage.open(name, "rb") as f:
+                content = f.read()
+            bytes_total += len(content)
+            sha = blobstore.content_hash(content)
+
+            if dry_run:
+                if sha in seen_hashes:
+                    duplicates += 1
+                    bytes_saved += len(content)
+                seen_hashes.add(sha)
+                continue
+
+            doc_ids = docs_by_file[name]
+            with transaction.atomic():
+                existed = PdfBlob.objects.filter(sha256=sha).exists()
+                blob = blobstore.acquire(content, refs=len(doc_ids))
+                GeneratedDocument.objects.filter(id__in=doc_ids).update(blob=blob, pdf_file=blob.file.name)
+            if existed:
+                duplicates += 1
+                bytes_saved += len(content)
+            blobstore.delete_unreferenced_files([name])
+            migrated += 1
+
+        if dry_run:
+            self.stdout.write(
+                f"[DRY-RUN] {len(names) - missing} files ({bytes_total / 1_048_576:.1f} MB), "
+                f"{duplicates} duplicates of already stored content, {bytes_saved / 1_048_576:.1f} MB would be freed; "
+                f"{missing} missing."
+            )
+            return
+
+        fixed = blobstore.recount()
+        orphans = blobstore.delete_orphan_blobs()
+        self.stdout.write(self.style.SUCCESS(
+            f"Migrated {migrated} files ({duplicates} duplicates, {bytes_saved / 1_048_576:.1f} MB freed), "
+            f"{missing} missing; refcounts fixed: {fixed}; orphan blobs deleted: {orphans}."
+        ))
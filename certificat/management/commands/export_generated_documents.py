@@ -0,0 +1,92 @@
+import os
+import sys
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from certificat import exports
+from certificat.models import GeneratedDocument, Gestiune
+
+
+class Command(BaseCommand):
+    help = (
+        "Export GeneratedDocument records to CSV or XLSX. Rows are streamed from the database in chunks "
+        "and written as they arrive, so the export runs in constant memory. Deleted documents are skipped "
+        "unless --include-deleted is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", dest="export_format", choices=exports.FORMATS, default=exports.FORMAT_CSV,
+                            help="Output format (default: csv)")
+        parser.add_argument("--output", default=None,
+                            help="Output file ('-' for stdout; default: export_documente_<timestamp>.<format>)")
+        parser.add_argument("--date-from", dest="date_from", default=None, help="Only documents created on/after YYYY-MM-DD")
+        parser.add_argument("--date-to", dest="date_to", default=None, help="Only documents created on/before YYYY-MM-DD")
+        parser.add_argument("--gestiune-id", dest="gestiune_id", type=int, default=None,
+                            help="Only documents whose series belong to this gestiune's ranges")
+        parser.add_argument("--status", choices=[value for value, _ in GeneratedDocument.STATUS_CHOICES],
+                            default=None, help="Only documents with this status")
+        parser.add_argument("--user", default=None, help="Only documents generated by this username")
+        parser.add_argument("--positions", action="store_true",
+                            help="Add species/variety/lot/quantity/UM columns for positions 1-3 from context_json")
+        parser.add_argument("--include-deleted", dest="include_deleted", action="store_true",
+                            help="Include soft-deleted documents")
+        parser.add_argument("--chunk-size", dest="chunk_size", type=int, default=exports.CHUNK_SIZE,
+                            help="Rows fetched per database round-trip")
+
+    def _parse_date(self, value, option):
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            raise CommandError(f"{option} must be in format YYYY-MM-DD")
+
+    def handle(self, *args, **options):
+        export_format = options["export_format"]
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be >= 1")
+        date_from = self._parse_date(options["date_from"], "--date-from")
+        date_to = self._parse_date(options["date_to"], "--date-to")
+
+        gestiune = None
+        if options["gestiune_id"] is not None:
+            gestiune = Gestiune.objects.filter(pk=options["gestiune_id"]).first()
+            if gestiune is None:
+                raise CommandError(f"Gestiune id={options['gestiune_id']} not found")
+
+        queryset = exports.filter_documents(
+            date_from=date_from, date_to=date_to, gestiune=gestiune, status=options["status"],
+            user=options["user"], include_deleted=options["include_deleted"],
+        )
+        chunks = exports.iter_export(queryset, export_format, positions=options["positions"],
+                                     chunk_size=options["chunk_size"])
+
+        output = options["output"] or exports.export_filename(export_format)
+        started = time.perf_counter()
+        if output == "-":
+            if export_format == exports.FORMAT_XLSX:
+                target = sys.stdout.buffer
+                for chunk in chunks:
+                    target.write(chunk)
+            else:
+                for chunk in chunks:
+                    self.stdout.write(chunk, ending="")
+            return
+
+        if export_format == exports.FORMAT_XLSX:
+            handle = open(output, "wb")
+        else:
+            handle = open(output, "w", encoding="utf-8", newline="")
+        try:
+            with handle:
+                for chunk in chunks:
+                    handle.write(chunk)
+        except BaseException:
+            os.remove(output)
+            raise
+
+        elapsed = time.perf_counter() - started
+        size = os.path.getsize(output)
+        self.stdout.write(self.style.SUCCESS(f"Exported documents to {output} ({size} bytes) in {elapsed:.1f}s."))
@@ -0,0 +1,66 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from certificat.models import TipologieProdus
+from certificat.services import species as species_import
+from certificat.services.generation import FeedError
+from certificat.utils import log_activity
+
+
+class Command(BaseCommand):
+    help = (
+        "Create SpecieMapping rows for species found in the aviz feed that are not mapped yet. Each new "
+        "species gets the suggested tipologie (normalized-name match against existing mappings and "
+        "tipologie names, else 'General'); all rows are inserted with one bulk_create. Use --yes to confirm."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--feed-file", dest="feed_file", default=None,
+                            help="Read the feed from a local JSON mirror instead of downloading it")
+        parser.add_argument("--refresh", action="store_true", help="Ignore the cached feed species and download again")
+        parser.add_argument("--default-tipologie", dest="default_tipologie", default=None,
+                            help="Tipologie name for species without a suggestion (default: skip them)")
+        parser.add_argument("--yes", action="store_true", help="Confirm changes without prompt")
+        parser.add_argument("--dry-run", action="store_true", help="Show the new species and suggestions without saving")
+
+    def handle(self, *args, **options):
+        default_tip = None
+        if options["default_tipologie"]:
+            default_tip = TipologieProdus.objects.filter(nume__iexact=options["default_tipologie"]).first()
+            if default_tip is None:
+                raise CommandError(f"Tipologie '{options['default_tipologie']}' not found")
+
+        try:
+            species = species_import.feed_species(refresh=options["refresh"], feed_file=options["feed_file"])
+        except (FeedError, OSError, json.JSONDecodeError) as e:
+            raise CommandError(f"Could not read the feed: {e}")
+
+        suggestions = species_import.suggest_mappings(species)
+        if not suggestions:
+            self.stdout.write(self.style.SUCCESS(f"No new species ({len(species)} species in feed, all mapped)."))
+            return
+
+        tip_names = dict(TipologieProdus.objects.values_list("id", "nume"))
+        pairs, skipped = [], []
+        for row in suggestions:
+            tip_id = row["tipologie_id"] or (default_tip.pk if default_tip else None)
+            if tip_id is None:
+                skipped.append(row["specie"])
+                self.stdout.write(f"[SKIP] '{row['specie']}' -> no suggestion")
+                continue
+            pairs.append((row["specie"], tip_id))
+            reason = row["reason"] or "--default-tipologie"
+            prefix = "[DRY-RUN] " if options["dry_run"] else ""
+            self.stdout.write(f"{prefix}'{row['specie']}' -> '{tip_names.get(tip_id)}' ({reason})")
+
+        self.stdout.write(self.style.WARNING(f"{len(pairs)} new mappings, {len(skipped)} skipped."))
+        if options["dry_run"] or not pairs:
+            return
+        if not options["yes"]:
+            raise CommandError("Refusing to import without --yes. Re-run with --yes to confirm.")
+
+        created = species_import.import_mappings(pairs)
+        log_activity(None, "SPECIEMAP_IMPORT_CMD", f"Import specii (comandă): {len(created)} mapări adăugate.",
+                     payload={"species": created, "skipped": skipped})
+        self.stdout.write(self.style.SUCCESS(f"Created {len(created)} SpecieMapping rows."))
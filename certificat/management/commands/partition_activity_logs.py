@@ -0,0 +1,116 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from certificat import activity_archive
+from certificat.models import ActivityLog
+
+
+class Command(BaseCommand):
+    help = (
+        "PostgreSQL only: convert the ActivityLog table to monthly RANGE partitions on timestamp "
+        "(--convert) and/or create partitions for the coming months. Run monthly (e.g. from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--convert", action="store_true", help="Convert the existing table into a partitioned table (one-time)")
+        parser.add_argument("--months-ahead", dest="months_ahead", type=int, default=3, help="Create partitions for the current month plus N months ahead")
+        parser.add_argument("--keep-legacy", dest="keep_legacy", action="store_true", help="With --convert: keep the old table as <table>_legacy instead of dropping it")
+        parser.add_argument("--dry-run", action="store_true", help="Print the SQL without executing it")
+
+    def handle(self, *args, **options):
+        if not activity_archive.is_postgres():
+            raise CommandError(f"Partitioning requires PostgreSQL (current backend: {connection.vendor}).")
+        if options["months_ahead"] < 0:
+            raise CommandError("--months-ahead must be >= 0")
+
+        with connection.cursor() as cursor:
+            partitioned = activity_archive.is_partitioned(cursor)
+
+        statements = []
+        if options["convert"]:
+            if partitioned:
+                raise CommandError("ActivityLog table is already partitioned.")
+            statements += self._convert_statements(options["keep_legacy"], options["months_ahead"])
+        elif not partitioned:
+            raise CommandError("ActivityLog table is not partitioned. Run with --convert first.")
+        else:
+            now = timezone.now()
+            for delta in range(options["months_ahead"] + 1):
+                year, month = activity_archive.add_months(now.year, now.month, delta)
+                statements.append(activity_archive.create_month_partition_sql(year, month))
+
+        if options["dry_run"]:
+            for sql in statements:
+                self.stdout.write(sql + ";")
+            return
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+        self.stdout.write(self.style.SUCCESS(f"Executed {len(statements)} statements."))
+
+    def _convert_statements(self, keep_legacy, months_ahead):
+        qn = connection.ops.quote_name
+        table = activity_archive.table_name()
+        legacy = f"{table}_legacy"
+        seq = f"{table}_id_seq"
+
+        # Intervalul de luni acoperit: de la cea mai veche înregistrare până la luna curentă + N
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT MIN(timestamp) FROM {qn(table)}")
+            oldest = cursor.fetchone()[0]
+            # Secvența coloanei id (serial sau identity) rămâne a tabelei vechi după RENAME
+            cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+            legacy_seq = cursor.fetchone()[0]
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s", [table])
+            legacy_indexes = [row[0] for row in cursor.fetchall()]
+        now = timezone.now()
+        start = oldest or now
+        start = start.astimezone(timezone.get_fixed_timezone(0))
+        months = (now.year - start.year) * 12 + (now.month - start.month) + months_ahead
+
+        # Cheia primară pe o tabelă partiționată trebuie să includă coloana de partiționare,
+        # deci devine (id, timestamp); id rămâne alocat dintr-o secvență proprie.
+        # Secvența veche este redenumită înainte ca noua tabelă să-și creeze propria {table}_id_seq:
+        # altfel CREATE SEQUENCE nu face nimic, noua tabelă ar folosi secvența deținută de
+        # tabela veche, iar DROP TABLE pe tabela veche ar eșua (și ar anula conversia).
+        statements = [f"ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}"]
+        if legacy_seq:
+            statements.append(f"ALTER SEQUENCE {legacy_seq} RENAME TO {qn(legacy + '_id_seq')}")
+        # Numele indecșilor sunt unice în schemă: cei ai tabelei vechi (inclusiv _pkey) sunt
+        # redenumiți ca noua tabelă să primească aceleași nume ca la migrate.
+        for index in legacy_indexes:
+            statements.append(f"ALTER INDEX {qn(index)} RENAME TO {qn(index[:56] + '_legacy')}")
+        statements += [
+            f"CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING DEFAULTS) PARTITION BY RANGE (timestamp)",
+            f"CREATE SEQUENCE {qn(seq)} AS bigint OWNED BY {qn(table)}.id",
+            f"ALTER TABLE {qn(table)} ALTER COLUMN id SET DEFAULT nextval('{seq}')",
+            f"ALTER TABLE {qn(table)} ADD PRIMARY KEY (id, timestamp)",
+        ]
+        for delta in range(months + 1):
+            year, month = activity_archive.add_months(start.year, start.month, delta)
+            statements.append(activity_archive.create_month_partition_sql(year, month))
+        statements += [
+            f"CREATE TABLE IF NOT EXISTS {qn(table + '_default')} PARTITION OF {qn(table)} DEFAULT",
+            f"INSERT INTO {qn(table)} SELECT * FROM {qn(legacy)}",
+            f"SELECT setval('{seq}', COALESCE((SELECT MAX(id) FROM {qn(table)}), 0) + 1, false)",
+        ]
+        # Indecșii și cheile străine se creează după copierea datelor
+        statements += self._index_and_fk_statements()
+        if not keep_legacy:
+            statements.append(f"DROP TABLE {qn(legacy)}")
+        return statements
+
+    def _index_and_fk_statements(self):
+        """
+        Indecșii (db_index, Meta.indexes, inclusiv _like pentru varchar) și cheile străine ale
+        modelului ActivityLog, cu SQL-ul și numele generate de Django, ca tabela partiționată
+        să aibă exact ce ar crea migrate.
+        """
+        with connection.schema_editor(collect_sql=True) as editor:
+            statements = [str(sql) for sql in editor._model_indexes_sql(ActivityLog)]
+            for field in ActivityLog._meta.local_fields:
+                if field.remote_field and field.db_constraint:
+                    statements.append(str(editor._create_fk_sql(ActivityLog, field, "_fk_%(to_table)s_%(to_column)s")))
+        return statements
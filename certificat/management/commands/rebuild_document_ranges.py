@@ -1,9 +1,18 @@
 import re
-from typing import Optional, Tuple
+from functools import reduce
+from operator import or_
+from typing import Dict, Iterable, Optional, Tuple
 
 from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import CharField, F, Func, Max, Q, Value
+from django.db.models.functions import Length
 
-from certificat.models import DocumentRange, GeneratedDocument, Gestiune, TipologieProdus
+from certificat import fragments
+from certificat.models import DocumentRange, GeneratedDocument
+
+
+TRAILING_DIGITS_RE = re.compile(r"^(.*?)(\d+)$")
 
 
 def split_prefix_and_number(identifier: str) -> Optional[Tuple[str, int, int]]:
@@ -15,7 +24,7 @@ def split_prefix_and_number(identifier: str) -> Optional[Tuple[str, int, int]]:
     """
     if not identifier:
         return None
-    m = re.search(r"^(.*?)(\d+)$", identifier.strip())
+    m = TRAILING_DIGITS_RE.search(identifier.strip())
     if not m:
         return None
     prefix = m.group(1)
@@ -27,6 +36,50 @@ def split_prefix_and_number(identifier: str) -> Optional[Tuple[str, int, int]]:
     return prefix, value, len(digits)
 
 
+def max_suffixes(prefixes: Iterable[str]) -> Dict[Tuple[str, int], int]:
+    """
+    Cel mai mare sufix numeric din GeneratedDocument.aviz_number (documente active), per
+    (prefix, lățime), pentru toate prefixele date - o singură interogare, nu una per plajă.
+
+    PostgreSQL: GROUP BY pe prefix/lățime calculate în DB (regexp_replace/substring), MAX pe
+    cifre (aceeași lățime => ordinea textului = ordinea numerică). Alte baze: o singură
+    trecere (iterator) peste avizele care încep cu unul din prefixe.
+    """
+    prefixes = set(prefixes)
+    if not prefixes:
+        return {}
+    docs = GeneratedDocument.objects.filter(is_deleted=False)
+    result: Dict[Tuple[str, int], int] = {}
+
+    if connection.vendor == "postgresql":
+        rows = (
+            docs.filter(aviz_number__regex=r"\d$")
+            .annotate(
+                aviz_prefix=Func(F("aviz_number"), Value(r"\d+$"), Value(""), function="REGEXP_REPLACE",
+                                 output_field=CharField()),
+                aviz_digits=Func(F("aviz_number"), Value(r"\d+$"), function="SUBSTRING", output_field=CharField()),
+            )
+            .filter(aviz_prefix__in=prefixes)
+            .values("aviz_prefix", width=Length("aviz_digits"))
+            .annotate(max_digits=Max("aviz_digits"))
+            .order_by()
+        )
+        for row in rows:
+            result[(row["aviz_prefix"], row["width"])] = int(row["max_digits"])
+        return result
+
+    startswith = reduce(or_, (Q(aviz_number__startswith=prefix) for prefix in prefixes))
+    for aviz in docs.filter(startswith).values_list("aviz_number", flat=True).iterator(chunk_size=5000):
+        m = TRAILING_DIGITS_RE.search(aviz or "")
+        if not m or m.group(1) not in prefixes:
+            continue
+        key = (m.group(1), len(m.group(2)))
+        value = int(m.group(2))
+        if value > result.get(key, -1):
+            result[key] = value
+    return result
+
+
 class Command(BaseCommand):
     help = (
         "Detect the last used number from GeneratedDocument.aviz_number for each DocumentRange, "
@@ -54,40 +107,20 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING("No DocumentRange rows match the filter."))
             return
 
-        updated = 0
-        inspected = 0
-        for dr in qs.order_by("gestiune__nume", "tipologie__nume", "id"):
-            inspected += 1
-            split = split_prefix_and_number(dr.numar_inceput or dr.numar_curent or dr.numar_final or "")
+        ranges = list(qs.order_by("gestiune__nume", "tipologie__nume", "id"))
+        splits = {dr.id: split_prefix_and_number(dr.numar_inceput or dr.numar_curent or dr.numar_final or "") for dr in ranges}
+        last_used = max_suffixes(split[0] for split in splits.values() if split)
+
+        changed = []
+        for dr in ranges:
+            split = splits[dr.id]
             if not split:
                 self.stdout.write(self.style.WARNING(f"[ID:{dr.id}] Cannot parse numeric suffix from range start/end for gestiune='{dr.gestiune}', tipologie='{dr.tipologie}'. Skipping."))
                 continue
             prefix, _, width = split
 
-            # Find all documents whose aviz_number matches the prefix and end with digits
-            candidates = list(
-                GeneratedDocument.objects.filter(aviz_number__startswith=prefix, is_deleted=False)
-                .values_list("aviz_number", flat=True)
-            )
-
-            max_value = None
-            for aviz in candidates:
-                m = re.search(r"^(.*?)(\d+)$", aviz)
-                if not m:
-                    continue
-                aviz_prefix, num_str = m.group(1), m.group(2)
-                if aviz_prefix != prefix:
-                    continue
-                # Respect width to avoid matching other series with different padding
-                if len(num_str) != width:
-                    continue
-                try:
-                    num_val = int(num_str)
-                except ValueError:
-                    continue
-                if max_value is None or num_val > max_value:
-                    max_value = num_val
-
+            # Respect width to avoid matching other series with different padding
+            max_value = last_used.get((prefix, width))
             computed_curent = None
             if max_value is not None:
                 computed_curent = f"{prefix}{str(max_value).zfill(width)}"
@@ -98,9 +131,12 @@ class Command(BaseCommand):
 
             if apply_changes and computed_curent and computed_curent != dr.numar_curent:
                 dr.numar_curent = computed_curent
-                dr.save(update_fields=["numar_curent"])
-                updated += 1
-
-        self.stdout.write(self.style.SUCCESS(f"Done. inspected={inspected}, updated={updated}"))
+                dr.refresh_projection()
+                changed.append(dr)
 
+        if changed:
+            DocumentRange.objects.bulk_update(changed, ["numar_curent", *DocumentRange.PROJECTION_FIELDS], batch_size=500)
+            # bulk_update nu trimite post_save
+            fragments.invalidate("ranges")
 
+        self.stdout.write(self.style.SUCCESS(f"Done. inspected={len(ranges)}, updated={len(changed)}"))
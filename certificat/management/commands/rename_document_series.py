@@ -0,0 +1,335 @@
+import csv
+import json
+import os
+from datetime import datetime
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from certificat import blobstore
+from certificat.models import GeneratedDocument
+from certificat.utils import log_activity
+
+
+BATCH_SIZE = 500
+
+
+def read_mapping(path, old_column, new_column, header=True):
+    """
+    Perechile (serie veche, serie nouă) din fișierul .xlsx sau .csv (coloane numerotate de la 1).
+    Rândurile fără ambele valori sau cu serii identice sunt ignorate.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        try:
+            import openpyxl
+        except ImportError:
+            raise CommandError("Reading .xlsx mappings requires openpyxl (pip install openpyxl), or export it to CSV")
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        rows = list(workbook.active.iter_rows(values_only=True))
+        workbook.close()
+    elif ext in (".csv", ".txt"):
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            sample = f.read(4096)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+            except csv.Error:
+                dialect = csv.excel
+            rows = list(csv.reader(f, dialect))
+    else:
+        raise CommandError(f"Unsupported mapping file type '{ext}' (use .xlsx or .csv)")
+
+    if header:
+        rows = rows[1:]
+    mapping = {}
+    for line, row in enumerate(rows, start=2 if header else 1):
+        old = row[old_column - 1] if len(row) >= old_column else None
+        new = row[new_column - 1] if len(row) >= new_column else None
+        old = str(old).strip() if old is not None else ""
+        new = str(new).strip() if new is not None else ""
+        if not old or not new or old == new:
+            continue
+        if mapping.get(old, new) != new:
+            raise CommandError(f"Line {line}: series {old} is mapped to both {mapping[old]} and {new}")
+        mapping[old] = new
+    return mapping
+
+
+def renamed_file(name, old, new):
+    """Noul nume al unui PDF legacy dacă seria apare în numele fișierului, altfel None."""
+    if not name or blobstore.is_blob_file(name):
+        return None  # blob-urile sunt denumite după conținut; numele descărcat derivă din serie
+    directory, filename = os.path.split(name)
+    if old not in filename:
+        return None
+    return os.path.join(directory, filename.replace(old, new)).replace(os.sep, "/")
+
+
+def rename_context(context_json, new):
+    """(context_json nou, seria veche din context) sau (None, None) dacă nu are câmpul 'seria'."""
+    try:
+        context = json.loads(context_json) if context_json else None
+    except (TypeError, ValueError):
+        return None, None
+    if not isinstance(context, dict) or "seria" not in context:
+        return None, None
+    previous = context["seria"]
+    context["seria"] = new
+    return json.dumps(context, ensure_ascii=False), previous
+
+
+def move_file(source, target):
+    os.rename(default_storage.path(source), default_storage.path(target))
+
+
+class Journal:
+    """
+    Jurnalul unei redenumiri (JSON Lines), folosit de --rollback. Intrările unui lot sunt
+    scrise și sincronizate pe disc înainte de modificarea lotului, deci jurnalul acoperă
+    și un lot întrerupt; rollback-ul verifică starea curentă a fiecărui document/fișier.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def open(self, **header):
+        self._file = open(self.path, "a", encoding="utf-8")
+        self.write({"type": "start", "at": timezone.now().isoformat(), **header})
+
+    def write(self, *entries):
+        for entry in entries:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def entries(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entry = json.loads(line)
+                    if entry.get("type") == "doc":
+                        yield entry
+
+
+class Command(BaseCommand):
+    help = (
+        "Rename GeneratedDocument series from an .xlsx/.csv mapping (old series -> new series). "
+        "document_series, context_json['seria'] and legacy PDF file names are updated together, "
+        "in chunked transactions, with a JSON Lines journal that --rollback can undo. "
+        "Replaces modifica_serii.py + actualizeaza_context_json.py. Use --yes to confirm."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("mapping", nargs="?", help="Mapping file (.xlsx or .csv)")
+        parser.add_argument("--old-column", dest="old_column", type=int, default=3,
+                            help="1-based column with the old series (default: 3, column C)")
+        parser.add_argument("--new-column", dest="new_column", type=int, default=4,
+                            help="1-based column with the new series (default: 4, column D)")
+        parser.add_argument("--no-header", dest="no_header", action="store_true", help="The first row is data, not a header")
+        parser.add_argument("--include-deleted", dest="include_deleted", action="store_true", help="Rename soft-deleted documents too")
+        parser.add_argument("--allow-existing", dest="allow_existing", action="store_true",
+                            help="Proceed even if a new series is already used by another document")
+        parser.add_argument("--batch-size", dest="batch_size", type=int, default=BATCH_SIZE, help="Documents per transaction")
+        parser.add_argument("--journal", default=None,
+                            help="Journal file (default: rename_series_journal_<timestamp>.jsonl)")
+        parser.add_argument("--rollback", default=None, metavar="JOURNAL", help="Undo the renames recorded in JOURNAL")
+        parser.add_argument("--dry-run", action="store_true", help="Show what would be renamed without performing it")
+        parser.add_argument("--yes", action="store_true", help="Confirm changes without prompt")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be >= 1")
+        if options["rollback"]:
+            return self._rollback(options["rollback"], options)
+        if not options["mapping"]:
+            raise CommandError("Missing mapping file (or --rollback JOURNAL)")
+        if not os.path.exists(options["mapping"]):
+            raise CommandError(f"Mapping file not found: {options['mapping']}")
+        if options["old_column"] < 1 or options["new_column"] < 1:
+            raise CommandError("--old-column/--new-column are 1-based")
+
+        mapping = read_mapping(options["mapping"], options["old_column"], options["new_column"],
+                               header=not options["no_header"])
+        if not mapping:
+            self.stdout.write(self.style.WARNING("No series mappings found."))
+            return
+        self.stdout.write(f"Read {len(mapping)} series mappings from {options['mapping']}.")
+
+        queryset = GeneratedDocument.objects.filter(document_series__in=list(mapping))
+        if not options["include_deleted"]:
+            queryset = queryset.filter(is_deleted=False)
+        total = queryset.count()
+        missing = set(mapping) - set(queryset.values_list("document_series", flat=True).distinct())
+        for old in sorted(missing):
+            self.stdout.write(self.style.WARNING(f"No documents with series {old}"))
+
+        # Seriile noi deja folosite de documente care nu sunt redenumite acum
+        taken = sorted(
+            GeneratedDocument.objects.filter(document_series__in=set(mapping.values()) - set(mapping))
+            .values_list("document_series", flat=True).distinct()
+        )
+        if taken:
+            message = f"{len(taken)} new series already exist: {', '.join(taken[:10])}{' ...' if len(taken) > 10 else ''}"
+            if not options["allow_existing"] and not options["dry_run"]:
+                raise CommandError(message + " (use --allow-existing to proceed)")
+            self.stdout.write(self.style.WARNING(message))
+
+        self.stdout.write(self.style.WARNING(f"Will rename the series of {total} GeneratedDocument records."))
+        if options["dry_run"]:
+            rows = queryset.order_by("pk").values_list("pk", "aviz_number", "document_series", "pdf_file").iterator()
+            for pk, aviz, series, name in rows:
+                new_name = renamed_file(name, series, mapping[series])
+                self.stdout.write(f"[DRY-RUN] id={pk}, aviz={aviz}: {series} -> {mapping[series]}"
+                                  + (f", file {name} -> {new_name}" if new_name else ""))
+            return
+        if not total:
+            return
+        if not options["yes"]:
+            raise CommandError("Refusing to rename without --yes. Re-run with --yes to confirm.")
+
+        journal = Journal(options["journal"] or f"rename_series_journal_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+        journal.open(mapping_file=os.path.abspath(options["mapping"]), mappings=len(mapping))
+        documents = files = 0
+        try:
+            last_pk = 0
+            while True:
+                # Keyset după pk: documentele redenumite nu mai corespund filtrului, dar pk-ul avansează oricum
+                rows = list(queryset.filter(pk__gt=last_pk).order_by("pk")
+                            .values_list("pk", "document_series", "context_json", "pdf_file")[:options["batch_size"]])
+                if not rows:
+                    break
+                last_pk = rows[-1][0]
+                renamed, moved = self._rename_batch(rows, mapping, journal)
+                documents += renamed
+                files += moved
+                self.stdout.write(f"  {documents}/{total} documents renamed, {files} files renamed")
+        finally:
+            journal.close()
+
+        log_activity(None, "SERIES_RENAME",
+                     f"Redenumire serii din {os.path.basename(options['mapping'])}: {documents} documente, {files} fișiere.",
+                     payload={"mappings": len(mapping), "documents": documents, "files": files,
+                              "journal": os.path.abspath(journal.path)})
+        self.stdout.write(self.style.SUCCESS(
+            f"Renamed {documents} documents and {files} PDF files. Journal: {journal.path} "
+            f"(undo with --rollback {journal.path})"))
+
+    def _rename_batch(self, rows, mapping, journal):
+        names = [name for _, _, _, name in rows if name]
+        shared = {name for name, n in GeneratedDocument.objects.filter(pdf_file__in=names)
+                  .values_list("pdf_file").annotate(n=Count("pk")) if n > 1}
+
+        changes, entries, moves = [], [], []
+        for pk, old, context_json, name in rows:
+            new = mapping[old]
+            new_context, previous_seria = rename_context(context_json, new)
+            new_name = renamed_file(name, old, new)
+            if new_name and not default_storage.exists(name):
+                new_name = None  # fișier lipsă: se redenumește doar seria
+            elif new_name and (name in shared or default_storage.exists(new_name)):
+                self.stdout.write(self.style.WARNING(f"id={pk}: file {name} is shared or {new_name} exists; kept"))
+                new_name = None
+            changes.append((pk, new, new_context, new_name))
+            entries.append({"type": "doc", "id": pk, "series": [old, new],
+                            "seria": [previous_seria, new] if new_context else None,
+                            "pdf": [name, new_name] if new_name else None})
+            if new_name:
+                moves.append((name, new_name))
+
+        journal.write(*entries)
+        done = []
+        try:
+            for source, target in moves:
+                move_file(source, target)
+                done.append((source, target))
+            with transaction.atomic():
+                docs = []
+                for pk, new, new_context, new_name in changes:
+                    doc = GeneratedDocument(pk=pk, document_series=new)
+                    fields = ["document_series"]
+                    if new_context is not None:
+                        doc.context_json = new_context
+                        fields.append("context_json")
+                    if new_name:
+                        doc.pdf_file.name = new_name
+                        fields.append("pdf_file")
+                    docs.append((doc, tuple(fields)))
+                # bulk_update pe grupuri cu aceleași câmpuri
+                groups = {}
+                for doc, fields in docs:
+                    groups.setdefault(fields, []).append(doc)
+                for fields, group in groups.items():
+                    GeneratedDocument.objects.bulk_update(group, list(fields))
+        except Exception:
+            for source, target in reversed(done):
+                try:
+                    move_file(target, source)
+                except OSError as e:
+                    self.stderr.write(f"Could not move {target} back to {source}: {e}")
+            raise
+        journal.write({"type": "commit", "last_id": rows[-1][0], "documents": len(changes)})
+        return len(changes), len(done)
+
+    def _rollback(self, path, options):
+        if not os.path.exists(path):
+            raise CommandError(f"Journal not found: {path}")
+        entries = list(Journal.entries(path))
+        self.stdout.write(self.style.WARNING(f"Will roll back {len(entries)} journal entries from {path}."))
+        if not options["dry_run"] and not options["yes"]:
+            raise CommandError("Refusing to roll back without --yes. Re-run with --yes to confirm.")
+
+        documents = files = 0
+        batch_size = options["batch_size"]
+        for start in range(0, len(entries), batch_size):
+            batch = entries[start:start + batch_size]
+            current = {pk: (series, context_json, name) for pk, series, context_json, name in
+                       GeneratedDocument.objects.filter(pk__in=[e["id"] for e in batch])
+                       .values_list("pk", "document_series", "context_json", "pdf_file")}
+            with transaction.atomic():
+                for entry in batch:
+                    pk = entry["id"]
+                    old, new = entry["series"]
+                    pdf = entry.get("pdf")
+                    # Fișierul: mutat înapoi dacă rollback-ul nu a fost deja făcut (și în cazul unui lot întrerupt)
+                    if pdf and default_storage.exists(pdf[1]) and not default_storage.exists(pdf[0]):
+                        if options["dry_run"]:
+                            self.stdout.write(f"[DRY-RUN] Would move {pdf[1]} -> {pdf[0]}")
+                        else:
+                            move_file(pdf[1], pdf[0])
+                        files += 1
+                    if pk not in current or current[pk][0] != new:
+                        continue  # document șters sau deja readus / modificat ulterior
+                    updates = {"document_series": old}
+                    if entry.get("seria"):
+                        try:
+                            context = json.loads(current[pk][1])
+                        except (TypeError, ValueError):
+                            context = None
+                        if isinstance(context, dict) and context.get("seria") == new:
+                            context["seria"] = entry["seria"][0]
+                            updates["context_json"] = json.dumps(context, ensure_ascii=False)
+                    if pdf and current[pk][2] == pdf[1]:
+                        updates["pdf_file"] = pdf[0]
+                    if options["dry_run"]:
+                        self.stdout.write(f"[DRY-RUN] Would restore id={pk}: {new} -> {old}")
+                    else:
+                        GeneratedDocument.objects.filter(pk=pk).update(**updates)
+                    documents += 1
+        if options["dry_run"]:
+            return
+        log_activity(None, "SERIES_RENAME_ROLLBACK",
+                     f"Anulare redenumire serii ({os.path.basename(path)}): {documents} documente, {files} fișiere.",
+                     payload={"documents": documents, "files": files, "journal": os.path.abspath(path)})
+        self.stdout.write(self.style.SUCCESS(f"Rolled back {documents} documents and {files} PDF files."))
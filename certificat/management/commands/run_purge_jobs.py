@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from certificat import purge
+from certificat.models import PurgeJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued document purge jobs (created from the 'Delete documents' admin page). "
+        "Use it from cron/a worker when PURGE_RUN_IN_WEB is disabled, or to resume jobs interrupted by a restart."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stale-minutes", dest="stale_minutes", type=int, default=purge.STALE_AFTER_MINUTES,
+                            help="Requeue running jobs without progress for this many minutes (0 = never)")
+        parser.add_argument("--batch-size", dest="batch_size", type=int, default=purge.PURGE_BATCH_SIZE, help="Documents deleted per batch")
+        parser.add_argument("--workers", type=int, default=None, help="Threads unlinking files (default: settings.PURGE_FILE_WORKERS)")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be >= 1")
+        if options["stale_minutes"] < 0:
+            raise CommandError("--stale-minutes must be >= 0")
+
+        if options["stale_minutes"]:
+            requeued = purge.requeue_stale(options["stale_minutes"])
+            if requeued:
+                self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale purge job(s)."))
+
+        job_ids = list(PurgeJob.objects.filter(status=PurgeJob.STATUS_QUEUED).order_by("created_at").values_list("pk", flat=True))
+        if not job_ids:
+            self.stdout.write("No queued purge jobs.")
+            return
+
+        for job_id in job_ids:
+            job = purge.run_job(job_id, batch_size=options["batch_size"], workers=options["workers"])
+            if job is None:
+                self.stdout.write(f"Job #{job_id} was picked up by another process, skipped.")
+            elif job.status == PurgeJob.STATUS_DONE:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Job #{job_id}: deleted {job.documents_deleted} documents and {job.files_deleted} files."))
+            else:
+                self.stdout.write(self.style.ERROR(f"Job #{job_id} failed: {job.error}"))
@@ -1,91 +1,62 @@
 import os
 import re
-from collections import defaultdict
+import time
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Optional, Tuple
-import unicodedata
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
 
-from certificat.models import GeneratedDocument, SpecieMapping, TipologieProdus, Gestiune, DocumentRange
+from certificat import pdfparse
+from certificat.extraction_cache import ExtractionCache
 
-
-SERIES_RE = re.compile(r"^(?:[A-Z]{1,4}\d{4,8}|\d{1,3}[A-Z]{1,4}\d{3,8})$")
+# Modelele se importă în handle(): procesele din --workers importă acest modul doar pentru
+# funcțiile de extracție, fără Django configurat (pe Windows pornesc cu spawn, nu fork).
 
 
-def _normalize_text(value: Optional[str]) -> Optional[str]:
-    if not value:
-        return value
-    # Lowercase and remove diacritics for robust comparisons
-    nfkd = unicodedata.normalize('NFKD', value)
-    ascii_only = ''.join([c for c in nfkd if not unicodedata.combining(c)])
-    return ascii_only.lower().strip()
+SERIES_RE = re.compile(r"^(?:[A-Z]{1,4}\d{4,8}|\d{1,3}[A-Z]{1,4}\d{3,8})$")
 
 
-def extract_series_and_specia_from_pdf(path: str) -> Tuple[Optional[str], List[str]]:
+def scan_pdf(path: str) -> Tuple[str, dict]:
+    """Extracția pentru un fișier, rulată în procesele din --workers: doar date simple, fără ORM."""
     try:
-        from PyPDF2 import PdfReader  # type: ignore
+        data = pdfparse.extract(path)
     except Exception:
-        return None
-    try:
-        reader = PdfReader(path)
-        text = []
-        for page in reader.pages[:2]:
-            try:
-                t = page.extract_text() or ""
-            except Exception:
-                t = ""
-            if t:
-                text.append(t)
-        full = "\n".join(text)
-        if not full:
-            return None, []
-        # Prefer explicit labels
-        for pat in [
-            r"(?i)\b(?:seria|serie|lot)\s*[:#-]?\s*((?:[A-Z]{1,4}\d{4,8}|\d{1,3}[A-Z]{1,4}\d{3,8}))",
-            r"(?i)\b((?:[A-Z]{1,4}\d{5,8}|\d{1,3}[A-Z]{1,4}\d{3,8}))\b",
-        ]:
-            m = re.search(pat, full)
-            if m:
-                serie_val = m.group(1).strip()
-                break
+        data = {}
+    return os.path.basename(path), data
+
+
+def iter_scan_results(paths: List[str], workers: int, cache: ExtractionCache):
+    """
+    (nume, date extrase) pentru fiecare cale, în ordinea primită. Fișierele din cache
+    nu mai sunt deschise; restul se extrag (în paralel pentru workers > 1) și se memorează.
+    """
+    cached: Dict[str, Tuple[str, dict]] = {}
+    misses: List[str] = []
+    for path in paths:
+        data = cache.get(path)
+        if data is None:
+            misses.append(path)
         else:
-            serie_val = None
-
-        # Try to infer species list with pdfplumber tables for accuracy
-        species: List[str] = []
-        try:
-            import pdfplumber  # type: ignore
-            with pdfplumber.open(path) as pdf:
-                for page in pdf.pages[:2]:
-                    tables = page.extract_tables() or []
-                    for table in tables:
-                        rows = [[(cell or '').strip() for cell in row] for row in table if any((cell or '').strip() for cell in row)]
-                        if not rows:
-                            continue
-                        for row in rows:
-                            if row and _normalize_text(row[0] if row[0] else '').startswith('specia'):
-                                # collect values from columns 2..n
-                                for cell in row[1:]:
-                                    val = (cell or '').strip()
-                                    if val:
-                                        species.append(val)
-                                break
-                        if species:
-                            break
-                if not species:
-                    # fallback to text-based single capture
-                    m = re.search(r"(?is)\bSpecia\b[:\-]?\s*([^\n\r]+)", full)
-                    if m:
-                        species = [m.group(1).strip()]
-        except Exception:
-            # Fallback to text if pdfplumber unavailable
-            m = re.search(r"(?is)\bSpecia\b[:\-]?\s*([^\n\r]+)", full)
-            if m:
-                species = [m.group(1).strip()]
-        return serie_val, species
-    except Exception:
-        return None
+            cached[path] = (os.path.basename(path), data)
+
+    pool = None
+    if workers > 1 and len(misses) > 1:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        extracted = pool.map(scan_pdf, misses, chunksize=max(1, min(32, len(misses) // (workers * 4))))
+    else:
+        extracted = map(scan_pdf, misses)
+    try:
+        for path in paths:
+            if path in cached:
+                yield cached[path]
+                continue
+            result = next(extracted)
+            cache.put(path, result[1])
+            yield result
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
 
 
 def split_series(series: str) -> Optional[Tuple[str, int, int]]:
@@ -123,16 +94,56 @@ class Command(BaseCommand):
         )
         parser.add_argument("--limit", type=int, default=None, help="Limit number of PDFs processed (for testing)")
         parser.add_argument("--apply", action="store_true", help="Create/Update DocumentRange for the computed groups")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Extract PDFs in N parallel processes (default 1 = sequential). DB lookups stay in the main process.",
+        )
+        parser.add_argument("--no-cache", dest="no_cache", action="store_true", help="Do not read or write the extraction cache")
+        parser.add_argument("--refresh-cache", dest="refresh_cache", action="store_true", help="Re-extract every PDF and overwrite its cache entry")
 
     def handle(self, *args, **options):
+        from certificat.models import GeneratedDocument, SpecieMapping, TipologieProdus, Gestiune, DocumentRange
+
         base = str(settings.BASE_DIR)
         default_dirs = [os.path.join(base, "generated_docs_bkp"), os.path.join(settings.MEDIA_ROOT, "generated_docs")]
         scan_dirs: List[str] = options["dirs"] or default_dirs
         limit = options["limit"]
+        workers = options["workers"]
+        if workers < 1:
+            raise CommandError("--workers must be >= 1")
 
         # Map: (gestiune_id or None, tipologie_id or None, prefix, width) -> (max_value, sample_series, sample_aviz)
         aggreg: Dict[Tuple[Optional[int], Optional[int], str, int], Tuple[int, str, Optional[str]]] = {}
 
+        # Hărți preîncărcate o singură dată, în locul interogărilor per fișier
+        doc_by_filename: Dict[str, Tuple[Optional[int], str]] = {}
+        doc_rows = (
+            GeneratedDocument.objects.exclude(pdf_file__isnull=True).exclude(pdf_file="")
+            .order_by("pk").values_list("pdf_file", "aviz_number", "generated_by__userprofile__gestiune_id")
+        )
+        for pdf_name, aviz, gest_id in doc_rows.iterator():
+            doc_by_filename.setdefault(os.path.basename(pdf_name), (gest_id, aviz))
+        gest_names: Dict[int, str] = dict(Gestiune.objects.values_list("id", "nume"))
+        gest_by_name: Dict[str, int] = {}
+        for gest_id, nume in sorted(gest_names.items()):
+            gest_by_name.setdefault(nume, gest_id)
+        tip_names: Dict[int, str] = dict(TipologieProdus.objects.values_list("id", "nume"))
+        general_tip_id = next((tid for tid, nume in sorted(tip_names.items()) if nume.lower() == 'general'), None)
+        species_maps: List[Tuple[str, str, int]] = [
+            (specie, pdfparse.normalize_text(specie) or '', tip_id)
+            for specie, tip_id in SpecieMapping.objects.order_by("pk").values_list("specie", "tipologie_id")
+        ]
+        species_exact: Dict[str, int] = {}
+        for specie, _norm, tip_id in species_maps:
+            species_exact.setdefault(specie.lower(), tip_id)
+        general_only_gestiuni = {
+            SERIES_PREFIX_TO_GESTIUNE['5TM'],
+            SERIES_PREFIX_TO_GESTIUNE['IL'],
+            SERIES_PREFIX_TO_GESTIUNE['AB'],
+        }
+
         def resolve_gestiune_by_prefix(series: str) -> Optional[int]:
             split = split_series(series)
             if not split:
@@ -146,48 +157,31 @@ class Command(BaseCommand):
                     break
             if not cand:
                 return None
-            try:
-                gest = Gestiune.objects.filter(nume=cand).first()
-                return gest.id if gest else None
-            except Exception:
-                return None
+            return gest_by_name.get(cand)
 
         def resolve_tipologie(species: List[str], gest_id: Optional[int]) -> Optional[int]:
             if not species:
                 return None
-            try:
-                # Reguli speciale: Ghiroda (5TM), Slobozia (IL), Alba Iulia (AB) doar 'General'
-                if gest_id:
-                    gest = Gestiune.objects.filter(id=gest_id).first()
-                    if gest and gest.nume in (
-                        SERIES_PREFIX_TO_GESTIUNE['5TM'],
-                        SERIES_PREFIX_TO_GESTIUNE['IL'],
-                        SERIES_PREFIX_TO_GESTIUNE['AB'],
-                    ):
-                        tip = TipologieProdus.objects.filter(nume__iexact='General').first()
-                        return tip.id if tip else None
-                # Normalize and try to resolve each species; return a single tipologie if all agree
-                tip_ids = set()
-                for spec in species:
-                    spec_norm = _normalize_text(spec) or ''
-                    # Try exact-insensitive
-                    m = SpecieMapping.objects.filter(specie__iexact=spec.strip()).select_related('tipologie').first()
-                    if not m:
-                        # Try icontains on normalized
-                        all_maps = SpecieMapping.objects.select_related('tipologie').all()
-                        chosen = None
-                        for mm in all_maps:
-                            if _normalize_text(mm.specie) == spec_norm or (_normalize_text(mm.specie) in spec_norm):
-                                chosen = mm
-                                break
-                        m = chosen
-                    if m:
-                        tip_ids.add(m.tipologie_id)
-                if len(tip_ids) == 1:
-                    return tip_ids.pop()
-                return None
-            except Exception:
-                return None
+            # Reguli speciale: Ghiroda (5TM), Slobozia (IL), Alba Iulia (AB) doar 'General'
+            if gest_id and gest_names.get(gest_id) in general_only_gestiuni:
+                return general_tip_id
+            # Normalize and try to resolve each species; return a single tipologie if all agree
+            tip_ids = set()
+            for spec in species:
+                spec_norm = pdfparse.normalize_text(spec) or ''
+                # Try exact-insensitive
+                tip_id = species_exact.get(spec.strip().lower())
+                if tip_id is None:
+                    # Try contains on normalized
+                    for _specie, norm, mapped_tip_id in species_maps:
+                        if norm == spec_norm or norm in spec_norm:
+                            tip_id = mapped_tip_id
+                            break
+                if tip_id is not None:
+                    tip_ids.add(tip_id)
+            if len(tip_ids) == 1:
+                return tip_ids.pop()
+            return None
 
         def update_agg(gest_id: Optional[int], tipologie_id: Optional[int], series: str, aviz: Optional[str]):
             split = split_series(series)
@@ -199,36 +193,30 @@ class Command(BaseCommand):
             if cur is None or value > cur[0]:
                 aggreg[key] = (value, series, aviz)
 
-        processed = 0
+        paths: List[str] = []
         for directory in scan_dirs:
             if not os.path.isdir(directory):
                 continue
             for name in sorted(os.listdir(directory)):
-                if limit and processed >= limit:
-                    break
-                if not name.lower().endswith(".pdf"):
-                    continue
-                path = os.path.join(directory, name)
-                series, species = extract_series_and_specia_from_pdf(path)
+                if name.lower().endswith(".pdf"):
+                    paths.append(os.path.join(directory, name))
+        if limit:
+            paths = paths[:limit]
+
+        started = time.perf_counter()
+        processed = 0
+        with_series = 0
+        cache = ExtractionCache(pdfparse.CACHE_NAME, enabled=not options["no_cache"], refresh=options["refresh_cache"])
+        try:
+            for name, data in iter_scan_results(paths, workers, cache):
+                processed += 1
+                series, species = data.get("document_series"), data.get("species") or []
                 if not series:
                     continue
+                with_series += 1
 
-                # Try to map to a gestiune using existing DB entries (and capture aviz)
-                gest_id: Optional[int] = None
-                aviz_number: Optional[str] = None
-                try:
-                    # Match by filename if present in media
-                    gd = (
-                        GeneratedDocument.objects.filter(pdf_file__endswith=name)
-                        .select_related("generated_by__userprofile__gestiune")
-                        .first()
-                    )
-                    if gd and getattr(getattr(gd.generated_by, "userprofile", None), "gestiune", None):
-                        gest_id = gd.generated_by.userprofile.gestiune_id
-                    if gd:
-                        aviz_number = gd.aviz_number
-                except Exception:
-                    pass
+                # Try to map to a gestiune using existing DB entries (and capture aviz), matched by filename
+                gest_id, aviz_number = doc_by_filename.get(name, (None, None))
 
                 # If still not known, infer from prefix mapping
                 if gest_id is None:
@@ -246,7 +234,14 @@ class Command(BaseCommand):
                         aviz_number = docid if SERIES_RE.match(token or '') else token
 
                 update_agg(gest_id, tipologie_id, series, aviz_number)
-                processed += 1
+        finally:
+            cache.close()
+        elapsed = time.perf_counter() - started
+        rate = processed / elapsed if elapsed > 0 else 0.0
+        self.stdout.write(
+            f"Scanned {processed} PDFs in {elapsed:.1f}s ({rate:.1f} files/s, workers={workers}); "
+            f"with series: {with_series}; {cache.summary()}"
+        )
 
         if not aggreg:
             self.stdout.write(self.style.WARNING("No series found in provided directories."))
@@ -260,16 +255,10 @@ class Command(BaseCommand):
             next_series = f"{prefix}{str(next_val).zfill(width)}"
             gest_name = "(necunoscut)"
             if gest_id:
-                try:
-                    gest_name = Gestiune.objects.get(id=gest_id).nume
-                except Exception:
-                    gest_name = f"id={gest_id}"
+                gest_name = gest_names.get(gest_id, f"id={gest_id}")
             tip_name = "(n/a)"
             if tip_id:
-                try:
-                    tip_name = TipologieProdus.objects.get(id=tip_id).nume
-                except Exception:
-                    tip_name = f"id={tip_id}"
+                tip_name = tip_names.get(tip_id, f"id={tip_id}")
             base_line = f"Gestiune={gest_name} | Tipologie={tip_name} | prefix='{prefix}' width={width} -> last='{prefix}{str(max_val).zfill(width)}' next='{next_series}'"
             # For Tipologie n/a, append aviz sample if available
             if tip_id is None and sample_aviz:
@@ -323,6 +312,6 @@ class Command(BaseCommand):
                     created += 1
             self.stdout.write(self.style.SUCCESS(f"Applied: created={created}, updated={updated}"))
 
-        self.stdout.write(self.style.SUCCESS(f"Done. scanned={processed}, groups={len(aggreg)}"))
+        self.stdout.write(self.style.SUCCESS(f"Done. scanned={processed}, with_series={with_series}, groups={len(aggreg)}, {rate:.1f} files/s"))
 
 
@@ -0,0 +1,232 @@
+"""
+Registru de metrici în format Prometheus (text exposition 0.0.4).
+
+Fiecare proces (worker gunicorn) își ține valorile în memorie și le scrie
+atomic în METRICS_DIR/metrics_<pid>.json (flush() e apelat de middleware după
+fiecare cerere care a modificat ceva). Endpoint-ul /metrics însumează toate
+fișierele, deci valorile sunt corecte indiferent de workerul care răspunde.
+Un proces nou cu același pid pornește de la valorile din fișierul existent,
+astfel încât contoarele nu scad.
+"""
+import json
+import math
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+
+
+_lock = threading.Lock()
+_registry = {}
+_values = {}
+_state = {"dirty": False, "loaded": False}
+
+DEFAULT_SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+DEFAULT_BYTES_BUCKETS = (10_000, 100_000, 500_000, 1_000_000, 5_000_000, 10_000_000, 50_000_000)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry[name] = self
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: etichete așteptate {self.labelnames}, primite {tuple(labels)}")
+        return json.dumps([self.name, [str(labels[n]) for n in self.labelnames]], ensure_ascii=False)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            _values[key] = _values.get(key, 0) + amount
+            _state["dirty"] = True
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_SECONDS_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            # [contor per bucket (necumulativ)..., sumă, număr]
+            data = _values.setdefault(key, [0] * len(self.buckets) + [0, 0])
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    data[i] += 1
+                    break
+            data[-2] += value
+            data[-1] += 1
+            _state["dirty"] = True
+
+
+class Gauge(_Metric):
+    """Gauge calculat la momentul scrape-ului de funcția collect() -> {labels_tuple: valoare}."""
+    kind = "gauge"
+
+    def __init__(self, name, documentation, collect, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+
+# --- Definiții metrici ---
+
+AVIZ_REQUESTS = Counter(
+    "ddcf_aviz_requests_total", "Cereri de procesare aviz primite.", ["action"])
+AVIZE_PROCESSED = Counter(
+    "ddcf_avize_processed_total", "Avize procesate până la capăt, după rezultat.", ["action", "result"])
+DOCUMENT_PARTS = Counter(
+    "ddcf_document_parts_total", "Părți de document (documente) salvate, după status.", ["action", "status"])
+PDF_CONVERSION_FAILURES = Counter(
+    "ddcf_pdf_conversion_failures_total", "Conversii DOCX -> PDF eșuate, după tipul erorii.", ["error_type"])
+RANGE_EXHAUSTED = Counter(
+    "ddcf_range_allocation_failures_total", "Alocări eșuate de număr din plajă (epuizată/incompatibilă/lipsă).", ["reason"])
+STAGE_SECONDS = Histogram(
+    "ddcf_stage_duration_seconds", "Durata etapelor critice (feed, alocare range, DOCX, conversie PDF, scriere).", ["stage"])
+FEED_FETCH_BYTES = Histogram(
+    "ddcf_feed_fetch_bytes", "Dimensiunea răspunsului feed-ului extern de avize.", buckets=DEFAULT_BYTES_BUCKETS)
+
+
+def _queue_depth():
+    from .models import GeneratedDocument
+    count = GeneratedDocument.objects.filter(status='in procesare', is_deleted=False).count()
+    return {(): count}
+
+
+QUEUE_DEPTH = Gauge(
+    "ddcf_documents_in_processing", "Documente active cu status 'in procesare'.", _queue_depth)
+
+
+# --- Persistență multi-proces ---
+
+def metrics_dir():
+    return str(getattr(settings, "METRICS_DIR", os.path.join(settings.BASE_DIR, "metrics_data")))
+
+
+def _process_file():
+    return os.path.join(metrics_dir(), f"metrics_{os.getpid()}.json")
+
+
+def _read_file(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _load_previous():
+    # Valorile unui proces anterior cu același pid devin baza (contoarele nu trebuie să scadă)
+    previous = _read_file(_process_file())
+    for key, value in previous.items():
+        _values[key] = _merge_value(_values.get(key), value)
+    _state["loaded"] = True
+
+
+def _merge_value(current, other):
+    if current is None:
+        return list(other) if isinstance(other, list) else other
+    if isinstance(current, list):
+        return [a + b for a, b in zip(current, other)]
+    return current + other
+
+
+def flush():
+    """Scrie valorile procesului curent pe disc (atomic) dacă s-au modificat."""
+    if not _state["dirty"] and _state["loaded"]:
+        return
+    try:
+        directory = metrics_dir()
+        os.makedirs(directory, exist_ok=True)
+        with _lock:
+            if not _state["loaded"]:
+                _load_previous()
+            payload = json.dumps(_values)
+            _state["dirty"] = False
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics_", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(tmp_path, _process_file())
+    except Exception as e:
+        print(f"WARN: Nu s-au putut salva metricile: {e}")
+
+
+def _collect_all():
+    totals = {}
+    directory = metrics_dir()
+    try:
+        names = [n for n in os.listdir(directory) if n.startswith("metrics_") and n.endswith(".json")]
+    except FileNotFoundError:
+        names = []
+    for name in names:
+        for key, value in _read_file(os.path.join(directory, name)).items():
+            totals[key] = _merge_value(totals.get(key), value)
+    return totals
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render():
+    """Textul pentru /metrics, agregat din toate procesele."""
+    flush()
+    totals = _collect_all()
+    by_metric = {}
+    for key, value in totals.items():
+        name, label_values = json.loads(key)
+        by_metric.setdefault(name, []).append((tuple(label_values), value))
+
+    lines = []
+    for name in sorted(_registry):
+        metric = _registry[name]
+        lines.append(f"# HELP {name} {metric.documentation}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        if metric.kind == "gauge":
+            try:
+                samples = metric.collect()
+            except Exception as e:
+                print(f"WARN: Gauge {name} nu a putut fi calculat: {e}")
+                samples = {}
+            for label_values, value in samples.items():
+                lines.append(f"{name}{_labels_text(metric.labelnames, label_values)} {_format_number(value)}")
+            continue
+        for label_values, value in sorted(by_metric.get(name, [])):
+            if metric.kind == "counter":
+                lines.append(f"{name}{_labels_text(metric.labelnames, label_values)} {_format_number(value)}")
+                continue
+            cumulative = 0
+            for upper, count in zip(metric.buckets, value):
+                cumulative += count
+                le = ("le", _format_number(upper))
+                lines.append(f"{name}_bucket{_labels_text(metric.labelnames, label_values, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels_text(metric.labelnames, label_values)} {_format_number(value[-2])}")
+            lines.append(f"{name}_count{_labels_text(metric.labelnames, label_values)} {value[-1]}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,54 @@
+# Generated by Django 5.2 on 2026-10-18 23:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificat', '0019_alter_activitylog_action_type_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activitylog',
+            name='aviz_number',
+            field=models.CharField(blank=True, max_length=100, null=True, verbose_name='Număr Aviz'),
+        ),
+        migrations.AddField(
+            model_name='activitylog',
+            name='document',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='activity_logs', to='certificat.generateddocument', verbose_name='Document'),
+        ),
+        migrations.AddField(
+            model_name='activitylog',
+            name='duration_ms',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Durată (ms)'),
+        ),
+        migrations.AddField(
+            model_name='activitylog',
+            name='gestiune',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='activity_logs', to='certificat.gestiune', verbose_name='Gestiune'),
+        ),
+        migrations.AddField(
+            model_name='activitylog',
+            name='payload',
+            field=models.JSONField(blank=True, null=True, verbose_name='Date suplimentare'),
+        ),
+        migrations.AddField(
+            model_name='activitylog',
+            name='series',
+            field=models.CharField(blank=True, db_index=True, max_length=100, null=True, verbose_name='Serie Document'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['action_type', 'timestamp'], name='idx_log_action_time'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['aviz_number'], name='idx_log_aviz'),
+        ),
+    ]
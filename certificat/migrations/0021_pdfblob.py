@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-18 23:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificat', '0020_activitylog_structured_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PdfBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('file', models.FileField(max_length=255, upload_to='generated_docs/blobs/')),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('refcount', models.PositiveIntegerField(db_index=True, default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Fișier PDF (blob)',
+                'verbose_name_plural': 'Fișiere PDF (blob-uri)',
+            },
+        ),
+        migrations.AddField(
+            model_name='generateddocument',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='documents', to='certificat.pdfblob'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 23:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificat', '0021_pdfblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generateddocument',
+            name='render_fingerprint',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-18 23:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificat', '0022_generateddocument_render_fingerprint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurgeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'În așteptare'), ('running', 'În curs'), ('done', 'Finalizată'), ('failed', 'Eșuată')], db_index=True, default='queued', max_length=10)),
+                ('date_limit', models.DateField(blank=True, null=True, verbose_name='Până la data (inclusiv)')),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('documents_deleted', models.PositiveIntegerField(default=0)),
+                ('files_deleted', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='purge_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Job Ștergere Documente',
+                'verbose_name_plural': 'Joburi Ștergere Documente',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-19 00:08
+
+from django.db import migrations, models
+
+from certificat.numbering import next_in_range
+
+
+def populate_projection(apps, schema_editor):
+    DocumentRange = apps.get_model('certificat', 'DocumentRange')
+    ranges = list(DocumentRange.objects.all())
+    for dr in ranges:
+        candidate, remaining, error = next_in_range(dr.numar_inceput, dr.numar_final, dr.numar_curent)
+        dr.next_preview = candidate or error
+        dr.remaining = remaining
+    DocumentRange.objects.bulk_update(ranges, ['next_preview', 'remaining'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificat', '0023_purgejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentrange',
+            name='next_preview',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='documentrange',
+            name='remaining',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(populate_projection, migrations.RunPython.noop),
+    ]
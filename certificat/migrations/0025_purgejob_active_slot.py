@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+def fill_active_slot(apps, schema_editor):
+    # Un singur job activ poate păstra slotul (cel mai recent); restul primesc NULL
+    PurgeJob = apps.get_model('certificat', 'PurgeJob')
+    active = PurgeJob.objects.filter(status__in=['queued', 'running']).order_by('-created_at').first()
+    if active is not None:
+        PurgeJob.objects.filter(pk=active.pk).update(active_slot=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificat', '0024_documentrange_next_preview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purgejob',
+            name='active_slot',
+            field=models.BooleanField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_active_slot, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='purgejob',
+            name='active_slot',
+            field=models.BooleanField(default=True, editable=False, null=True, unique=True),
+        ),
+    ]
@@ -3,6 +3,8 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import RegexValidator
 
+from .numbering import next_in_range
+
 class Role(models.Model):
     ROLE_CHOICES = [
         ('utilizator', 'Utilizator'),
@@ -45,10 +47,34 @@ class DocumentRange(models.Model):
     numar_inceput = models.CharField(max_length=50)
     numar_final = models.CharField(max_length=50)
     numar_curent = models.CharField(max_length=50, default='')
+    # Proiecție recalculată la fiecare save() (vezi numbering.py): următorul număr de atribuit
+    # sau motivul pentru care lipsește ("Range epuizat", "Format incompatibil"), și câte numere
+    # mai sunt disponibile. Listele le citesc direct și pot sorta/filtra după remaining.
+    next_preview = models.CharField(max_length=50, blank=True, default='')
+    remaining = models.PositiveIntegerField(default=0, db_index=True)
+
+    SOURCE_FIELDS = ('numar_inceput', 'numar_final', 'numar_curent')
+    PROJECTION_FIELDS = ('next_preview', 'remaining')
 
     def __str__(self):
         return f"{self.gestiune} - {self.tipologie}"
 
+    def compute_next(self):
+        """(număr, rămase, eroare) calculate din câmpurile curente, vezi numbering.next_in_range."""
+        return next_in_range(self.numar_inceput, self.numar_final, self.numar_curent)
+
+    def refresh_projection(self):
+        candidate, remaining, error = self.compute_next()
+        self.next_preview = candidate or error
+        self.remaining = remaining
+
+    def save(self, *args, **kwargs):
+        self.refresh_projection()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(self.SOURCE_FIELDS):
+            kwargs['update_fields'] = set(update_fields) | set(self.PROJECTION_FIELDS)
+        super().save(*args, **kwargs)
+
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     role = models.ForeignKey(Role, on_delete=models.SET_NULL, null=True, blank=True)
@@ -112,9 +138,28 @@ class SerieExtraData(models.Model):
         verbose_name = "Date Extra Serie"
         verbose_name_plural = "Date Extra Serii"
 
+class PdfBlob(models.Model):
+    """Fișier PDF stocat o singură dată, adresat prin SHA-256 (vezi blobstore.py)."""
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to="generated_docs/blobs/", max_length=255)
+    size = models.PositiveBigIntegerField(default=0)
+    refcount = models.PositiveIntegerField(default=0, db_index=True)  # documente care referă fișierul
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Fișier PDF (blob)"
+        verbose_name_plural = "Fișiere PDF (blob-uri)"
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.refcount} ref.)"
+
 class GeneratedDocument(models.Model):
     aviz_number = models.CharField(max_length=100, db_index=True)  # nu mai e unic
     pdf_file = models.FileField(upload_to="generated_docs/", blank=True, null=True)
+    # Setat pentru PDF-urile stocate prin blobstore; pdf_file indică atunci fișierul blob-ului
+    blob = models.ForeignKey(PdfBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='documents')
+    # Hash context final + template la ultima randare; identic => regenerarea poate refolosi PDF-ul
+    render_fingerprint = models.CharField(max_length=64, blank=True, null=True)
     generated_by = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     context_json = models.TextField(blank=True, null=True)
@@ -166,6 +211,46 @@ class ActivityLog(models.Model):
     details = models.TextField(
         verbose_name="Detalii Acțiune"
     )
+    # Câmpuri structurate - permit filtrarea fără căutări icontains în details
+    aviz_number = models.CharField(
+        max_length=100,
+        blank=True,
+        null=True,
+        verbose_name="Număr Aviz"
+    )
+    document = models.ForeignKey(
+        GeneratedDocument,
+        on_delete=models.SET_NULL, # Log-ul rămâne chiar dacă documentul e șters definitiv
+        null=True,
+        blank=True,
+        related_name='activity_logs',
+        verbose_name="Document"
+    )
+    series = models.CharField(
+        max_length=100,
+        blank=True,
+        null=True,
+        db_index=True,
+        verbose_name="Serie Document"
+    )
+    gestiune = models.ForeignKey(
+        Gestiune,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='activity_logs',
+        verbose_name="Gestiune"
+    )
+    duration_ms = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Durată (ms)"
+    )
+    payload = models.JSONField(
+        null=True,
+        blank=True,
+        verbose_name="Date suplimentare"
+    )
     # Opțional: Adaugă IP, etc.
     # ip_address = models.GenericIPAddressField(null=True, blank=True)
 
@@ -177,6 +262,10 @@ class ActivityLog(models.Model):
         verbose_name = "Înregistrare Jurnal Activitate"
         verbose_name_plural = "Jurnal Activitate"
         ordering = ['-timestamp'] # Afișează cele mai recente prima dată
+        indexes = [
+            models.Index(fields=['action_type', 'timestamp'], name='idx_log_action_time'),
+            models.Index(fields=['aviz_number'], name='idx_log_aviz'),
+        ]
 
 
 class DailyQuote(models.Model):
@@ -207,4 +296,52 @@ class UserManual(models.Model):
     class Meta:
         verbose_name = "Manual Utilizare"
         verbose_name_plural = "Manuale Utilizare"
-        ordering = ['-upload_date']
\ No newline at end of file
+        ordering = ['-upload_date']
+
+class PurgeJob(models.Model):
+    """Ștergere în masă a documentelor generate, rulată în fundal (vezi purge.py)."""
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'În așteptare'),
+        (STATUS_RUNNING, 'În curs'),
+        (STATUS_DONE, 'Finalizată'),
+        (STATUS_FAILED, 'Eșuată'),
+    ]
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+    date_limit = models.DateField(null=True, blank=True, verbose_name="Până la data (inclusiv)")
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                                     related_name='purge_jobs')
+    total = models.PositiveIntegerField(default=0)
+    documents_deleted = models.PositiveIntegerField(default=0)
+    files_deleted = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Actualizat la fiecare lot; un job "running" fără progres recent este considerat abandonat
+    updated_at = models.DateTimeField(auto_now=True)
+    # True cât timp jobul este în așteptare/în curs, NULL după; unicitatea (NULL-urile nu intră
+    # în conflict) garantează un singur job activ chiar și la două cereri simultane
+    active_slot = models.BooleanField(null=True, default=True, unique=True, editable=False)
+
+    class Meta:
+        verbose_name = "Job Ștergere Documente"
+        verbose_name_plural = "Joburi Ștergere Documente"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Purge #{self.pk} ({self.status}) {self.documents_deleted}/{self.total}"
+
+    @property
+    def is_active(self):
+        return self.status in (self.STATUS_QUEUED, self.STATUS_RUNNING)
+
+    @property
+    def percent(self):
+        if not self.total:
+            return 100 if self.status == self.STATUS_DONE else 0
+        return min(100, int(self.documents_deleted * 100 / self.total))
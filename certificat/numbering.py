@@ -0,0 +1,50 @@
+"""
+Calculul următorului număr dintr-o plajă (DocumentRange), fără acces la baza de date.
+
+Folosit de DocumentRange.refresh_projection (coloanele next_preview/remaining) și de
+migrarea care le-a populat; de aceea nu importă modele.
+"""
+import re
+
+RANGE_EXHAUSTED = "Range epuizat"
+RANGE_INCOMPATIBLE = "Format incompatibil"
+# Mesajele care înseamnă "nu există un număr de atribuit"; "" = număr nerecunoscut
+RANGE_ERRORS = (RANGE_EXHAUSTED, RANGE_INCOMPATIBLE)
+
+SERIES_PATTERN = re.compile(r'^(.*?)(\d+)$')
+
+
+def next_in_range(numar_inceput, numar_final, numar_curent):
+    """
+    Următorul număr de atribuit: (număr, câte numere mai sunt disponibile, eroare).
+
+    Fără numar_curent se începe de la numar_inceput; altfel numar_curent + 1, cu același
+    prefix și aceeași lățime (zero-padding). Dacă nu există număr, eroarea este
+    RANGE_EXHAUSTED, RANGE_INCOMPATIBLE sau "" (format nerecunoscut) și rămân 0.
+    """
+    m = SERIES_PATTERN.match(numar_curent or numar_inceput or "")
+    if not m:
+        return None, 0, ""
+    prefix, num_str = m.groups()
+    num_len = len(num_str)
+    next_int = int(num_str) + 1 if numar_curent else int(num_str)
+
+    m_final = SERIES_PATTERN.match(numar_final or "")
+    if not m_final:
+        return None, 0, ""
+    prefix_final, final_num_str = m_final.groups()
+
+    if prefix != prefix_final or num_len == 0:
+        return None, 0, RANGE_INCOMPATIBLE
+
+    final_int = int(final_num_str)
+    if next_int > final_int:
+        return None, 0, RANGE_EXHAUSTED
+
+    return prefix + str(next_int).zfill(num_len), final_int - next_int + 1, None
+
+
+def preview(numar_inceput, numar_final, numar_curent):
+    """Textul afișat în liste: numărul următor sau motivul pentru care lipsește."""
+    candidate, _, error = next_in_range(numar_inceput, numar_final, numar_curent)
+    return candidate or error
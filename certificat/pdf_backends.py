@@ -0,0 +1,231 @@
+"""
+Backend-uri pentru conversia DOCX -> PDF, detectate leneș (la prima utilizare).
+
+Înainte, importul modulului views rula `soffice --version` pentru fiecare
+comandă candidată; acum nu se face nicio verificare la pornire. Prima conversie
+(sau comanda check_pdf_backend) alege backend-ul potrivit platformei:
+
+- Windows: MS Word prin COM (docx2pdf + pywin32)
+- Linux: LibreOffice headless (soffice/libreoffice)
+- alte sisteme: docx2pdf
+
+Rezultatul este păstrat în memorie per proces și, opțional, într-un fișier
+(PDF_BACKEND_CACHE_FILE, valabil PDF_BACKEND_CACHE_TTL secunde), astfel încât
+workerii noi nu repetă verificarea. Un backend indisponibil nu se persistă și se
+reverifică periodic.
+"""
+import json
+import os
+import platform
+import shutil
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+LIBREOFFICE_CANDIDATES = ['soffice', 'libreoffice', '/usr/bin/soffice', '/usr/bin/libreoffice']
+# Un rezultat negativ (backend indisponibil) se reverifică după acest interval, fără restart
+UNAVAILABLE_RETRY_SECONDS = 300
+
+_lock = threading.Lock()
+_backend = None
+_probed_at = 0.0
+
+
+class PdfBackend:
+    """Rezultatul detecției: numele backend-ului, disponibilitate și funcția de conversie."""
+
+    def __init__(self, name, available, detail="", command=None, convert_func=None, com=False):
+        self.name = name
+        self.available = available
+        self.detail = detail
+        self.command = command
+        self.com = com
+        self._convert = convert_func
+
+    def convert(self, input_path, output_path):
+        if not self.available or self._convert is None:
+            raise RuntimeError(f"Conversia PDF nu este disponibilă ({self.name}): {self.detail}")
+        return self._convert(input_path, output_path)
+
+    def as_dict(self):
+        return {"name": self.name, "available": self.available, "detail": self.detail, "command": self.command}
+
+
+# --- Detecție per platformă ---
+
+def _libreoffice_convert(command):
+    def convert(input_path, output_path):
+        output_dir = os.path.dirname(output_path)
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        cmd = [command, '--headless', '--convert-to', 'pdf', '--outdir', output_dir, input_path]
+        subprocess.run(cmd, check=True, timeout=60)
+
+        # LibreOffice generează fișierul cu același nume dar extensie .pdf
+        generated_pdf = os.path.splitext(os.path.basename(input_path))[0] + '.pdf'
+        generated_pdf_path = os.path.join(output_dir, generated_pdf)
+        if generated_pdf_path != output_path and os.path.exists(generated_pdf_path):
+            os.replace(generated_pdf_path, output_path)
+    return convert
+
+
+def _probe_libreoffice(known_command=None):
+    candidates = [known_command] if known_command else LIBREOFFICE_CANDIDATES
+    for cmd in candidates:
+        if not shutil.which(cmd):
+            continue
+        try:
+            result = subprocess.run([cmd, '--version'], check=True, stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE, timeout=10)
+        except (OSError, subprocess.SubprocessError):
+            continue
+        version = result.stdout.decode(errors='replace').strip()
+        print(f"INFO: PDF backend LibreOffice detectat ({cmd}): {version}")
+        return PdfBackend("libreoffice", True, version, command=cmd, convert_func=_libreoffice_convert(cmd))
+    return PdfBackend("libreoffice", False, "Comanda LibreOffice (soffice) nu a fost găsită în PATH.")
+
+
+def _probe_word_com():
+    try:
+        import pythoncom  # noqa: F401
+        import pywintypes  # noqa: F401
+        from docx2pdf import convert
+    except ImportError:
+        return PdfBackend("word_com", False, "pywin32/docx2pdf nu sunt instalate (MS Word via COM indisponibil).")
+    return PdfBackend("word_com", True, "MS Word via COM (docx2pdf)", convert_func=convert, com=True)
+
+
+def _probe_docx2pdf():
+    try:
+        from docx2pdf import convert
+    except ImportError:
+        return PdfBackend("docx2pdf", False, "docx2pdf nu este instalat.")
+    return PdfBackend("docx2pdf", True, f"docx2pdf pe {platform.system()} (backend necunoscut a priori)",
+                      convert_func=convert)
+
+
+def _probe(known_command=None):
+    system = platform.system()
+    if system == "Windows":
+        return _probe_word_com()
+    if system == "Linux":
+        return _probe_libreoffice(known_command)
+    return _probe_docx2pdf()
+
+
+# --- Cache în fișier (opțional) ---
+
+def _cache_file():
+    return getattr(settings, "PDF_BACKEND_CACHE_FILE", None)
+
+
+def _load_cached():
+    path = _cache_file()
+    if not path:
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    ttl = getattr(settings, "PDF_BACKEND_CACHE_TTL", 24 * 3600)
+    if data.get("platform") != platform.system() or time.time() - data.get("probed_at", 0) > ttl:
+        return None
+    if data.get("name") == "libreoffice":
+        command = data.get("command")
+        if not command or not shutil.which(command):
+            return None
+        return PdfBackend("libreoffice", True, data.get("detail", ""), command=command,
+                          convert_func=_libreoffice_convert(command))
+    # word_com / docx2pdf: doar importuri Python, fără subprocese - reluăm detecția
+    return _probe()
+
+
+def _store_cached(backend):
+    path = _cache_file()
+    # Doar rezultatele pozitive se persistă; un backend lipsă se reverifică (poate fi instalat între timp)
+    if not path or not backend.available:
+        return
+    data = dict(backend.as_dict(), platform=platform.system(), probed_at=time.time())
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"WARN: Nu s-a putut salva cache-ul backend-ului PDF ({path}): {e}")
+
+
+# --- API public ---
+
+def get_backend(refresh=False):
+    """Backend-ul curent; detecția rulează o singură dată per proces (sau la refresh=True)."""
+    global _backend, _probed_at
+    if _backend is not None and not refresh and not _needs_retry():
+        return _backend
+    with _lock:
+        if _backend is None or refresh or _needs_retry():
+            backend = None if refresh else _load_cached()
+            if backend is None:
+                backend = _probe()
+                _store_cached(backend)
+                if not backend.available:
+                    print(f"AVERTISMENT: Conversia PDF nu este disponibilă: {backend.detail}")
+            _backend = backend
+            _probed_at = time.time()
+    return _backend
+
+
+def _needs_retry():
+    return _backend is not None and not _backend.available and time.time() - _probed_at > UNAVAILABLE_RETRY_SECONDS
+
+
+def set_backend(backend):
+    """Înlocuiește backend-ul procesului (ex: convertor simulat în benchmark). Returnează pe cel anterior."""
+    global _backend, _probed_at
+    with _lock:
+        previous, _backend = _backend, backend
+        _probed_at = time.time()
+    return previous
+
+
+def is_available():
+    return get_backend().available
+
+
+def convert(input_path, output_path):
+    return get_backend().convert(input_path, output_path)
+
+
+def is_com_error(exc):
+    """True dacă excepția provine din COM (MS Word pe Windows)."""
+    if platform.system() != "Windows":
+        return False
+    try:
+        import pywintypes
+    except ImportError:
+        return False
+    return isinstance(exc, pywintypes.com_error)
+
+
+@contextmanager
+def com_context():
+    """Inițializează COM pe thread-ul curent cât durează conversia (doar pentru backend-ul Word)."""
+    backend = get_backend()
+    if not backend.com:
+        yield
+        return
+    import pythoncom
+    pythoncom.CoInitialize()
+    try:
+        yield
+    finally:
+        try:
+            pythoncom.CoUninitialize()
+        except Exception as e_uninit:
+            print(f"WARN: Eroare la CoUninitialize: {e_uninit}")
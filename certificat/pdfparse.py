@@ -0,0 +1,292 @@
+"""
+Parsarea PDF-urilor de aviz (backup-uri), comună comenzilor scan_series_from_pdfs
+și restore_generated_documents.
+
+Fiecare fișier este deschis o singură dată: cu pdfplumber se extrag, în aceeași
+trecere prin primele pagini, textul (TEXT_PAGES) și tabelele (TABLE_PAGES). Fără
+pdfplumber se folosește doar textul din PyPDF2.
+
+Câmpurile din text (partener, date LOT, dată, specie/soi) sunt căutate cu o
+singură expresie regulată compusă (FIELDS_RE), parcursă o dată; pentru fiecare
+câmp se păstrează prima potrivire, în ordinea de prioritate a variantelor.
+Rândurile tabelelor sunt clasificate după etichetă (ROW_LABELS), calculând
+textul rândului o singură dată.
+
+Modulul nu folosește ORM-ul sau setările Django, deci poate rula și în
+procesele din `scan_series_from_pdfs --workers`. Rezultatul lui extract() este
+serializabil JSON (vezi extraction_cache.py).
+"""
+import re
+import unicodedata
+
+
+# Namespace-ul în extraction_cache; se schimbă la orice modificare a rezultatului lui extract()
+CACHE_NAME = "pdfparse-v1"
+TEXT_PAGES = 3
+TABLE_PAGES = 2
+MAX_POSITIONS = 3
+
+# Serie: întâi cu etichetă explicită (oriunde în text), apoi orice token cu formatul unei serii
+SERIES_LABEL_RE = re.compile(r"(?i)\b(?:seria|serie|lot)\s*[:#-]?\s*((?:[A-Z]{1,4}\d{4,8}|\d{1,3}[A-Z]{1,4}\d{3,8}))")
+SERIES_ANY_RE = re.compile(r"(?i)\b((?:[A-Z]{1,4}\d{5,8}|\d{1,3}[A-Z]{1,4}\d{3,8}))\b")
+
+# (câmp, etichetă, valoare) - variantele aceluiași câmp sunt în ordinea priorității
+FIELD_PATTERNS = [
+    ("partner", r"Beneficiar\s*[:\-]?\s*", r"[^\n\r]{3,}"),
+    ("partner", r"(?:Client|Partener)\s*[:\-]?\s*", r"[^\n\r]{3,}"),
+    ("nr_ambalaje", r"\bnr\.?\s*ambalaje\s*[:\-]?\s*", r"[^\n\r]+"),
+    ("doc_oficial", r"\bdoc\.?\s*oficial\s*[:\-]?\s*", r"[^\n\r]+"),
+    ("etch_oficiale", r"\betch\.?\s*oficiale\s*[:\-]?\s*", r"[^\n\r]+"),
+    ("etch_oficiale", r"etichete\s*oficiale\s*[:\-]?\s*", r"[^\n\r]+"),
+    ("puritate", r"\bpuritate\s*[:\-]?\s*", r"[^\n\r%]+%?"),
+    ("sem_straine", r"\bsem\.?\s*straine\s*[:\-]?\s*", r"[^\n\r%]+%?"),
+    ("germinatie", r"\bgerminatie\s*[:\-]?\s*", r"[^\n\r%]+%?"),
+    ("masa_1000b", r"\bmasa\s*1000b\s*[:\-]?\s*", r"[^\n\r]+"),
+    ("stare_sanitara", r"\bstare\s*sanitara\s*[:\-]?\s*", r"[^\n\r]+"),
+    ("producator", r"\bproducator\s*[:\-]?\s*", r"[^\n\r]+"),
+    ("tara_productie", r"\btara\s*(?:de\s*)?productie\s*[:\-]?\s*", r"[^\n\r]+"),
+    ("samanta_tratata", r"\bsamanta\s*tratata\s*[:\-]?\s*", r"[^\n\r]+"),
+    ("garantie", r"\bgarantie\s*[:\-]?\s*", r"[^\n\r]+"),
+    ("umiditate", r"\bumiditate\s*[:\-]?\s*", r"[^\n\r%]+%?"),
+    ("specia", r"\bSpecia\b[:\-]?\s*", r"[^\n\r]+"),
+    ("soi", r"Soiul\s*\(hibridul\)\s*[:\-]?\s*", r"[^\n\r]+"),
+    ("doc_date", r"\bdata\s+", r"[0-3]?\d[./-][01]?\d[./-]\d{4}"),
+]
+# Căutare suprapusă (lookahead): o valoare lungă nu "consumă" etichetele de pe același rând
+FIELDS_RE = re.compile(
+    "(?i)(?=" + "|".join(f"{label}(?P<v{i}>{value})" for i, (_field, label, value) in enumerate(FIELD_PATTERNS)) + ")"
+)
+SERIES_EXTRA_FIELDS = [
+    "nr_ambalaje", "doc_oficial", "etch_oficiale", "puritate", "sem_straine", "germinatie", "masa_1000b",
+    "stare_sanitara", "producator", "tara_productie", "samanta_tratata", "garantie", "umiditate",
+]
+
+# Clasificarea rândurilor din tabel: (cheie, test(prima_celulă, rând_complet)), ambele lowercase
+ROW_LABELS = [
+    ("specia", lambda first, row: "specia" in first),
+    ("soi", lambda first, row: "soiul" in first or "hibridul" in first or "articol" in first),
+    ("cantitate", lambda first, row: "cantitatea" in first),
+    ("lot", lambda first, row: "lotului" in first),
+    ("nr_ambalaje", lambda first, row: "ambalaje" in first),
+    ("doc_oficial", lambda first, row: "document oficial" in first and "emitent" in row),
+    ("etch_oficiale", lambda first, row: "etichet" in first),
+    ("puritate", lambda first, row: "puritate fizică" in row or ("puritate" in first and "fiz" in row)),
+    ("sem_straine", lambda first, row: "semințe străine" in row or ("sem" in first and "straine" in row)),
+    ("germinatie", lambda first, row: "germina" in first),
+    ("masa_1000b", lambda first, row: "masa a 1000" in row or "masa 1000" in first),
+    ("stare_sanitara", lambda first, row: "stare sanitar" in row),
+    ("cold", lambda first, row: "cold test" in row),
+    ("producator", lambda first, row: "producator" in first or "producător" in first),
+    ("tara_productie", lambda first, row: "tara de productie" in row or "țara de productie" in row),
+    ("samanta_tratata", lambda first, row: "sămânța tratată" in row or "samanta tratata" in row),
+    ("garantie", lambda first, row: "garantie" in row or "valabilitate" in row),
+    ("umiditate", lambda first, row: "umiditate" in first or "%(h)" in row),
+]
+ROW_EXTRA_KEYS = [
+    "nr_ambalaje", "doc_oficial", "etch_oficiale", "puritate", "sem_straine", "germinatie", "masa_1000b",
+    "stare_sanitara", "cold", "producator", "tara_productie", "samanta_tratata", "garantie", "umiditate",
+]
+QTY_RE = re.compile(r"([0-9]+[\d\.,]*)\s*([A-Za-z%]+)?")
+
+
+def normalize_text(value):
+    if not value:
+        return value
+    # Lowercase and remove diacritics for robust comparisons
+    nfkd = unicodedata.normalize('NFKD', value)
+    ascii_only = ''.join([c for c in nfkd if not unicodedata.combining(c)])
+    return ascii_only.lower().strip()
+
+
+def available():
+    """True dacă există cel puțin o bibliotecă de extracție (pdfplumber sau PyPDF2)."""
+    for module in ("pdfplumber", "PyPDF2"):
+        try:
+            __import__(module)
+            return True
+        except ImportError:
+            continue
+    return False
+
+
+def _clean_rows(table):
+    return [[(cell or '').strip() for cell in row] for row in table if any((cell or '').strip() for cell in row)]
+
+
+def read_pdf(path):
+    """(text, tabele) din primele pagini, cu o singură deschidere a fișierului. Tabelele au celulele curățate."""
+    try:
+        import pdfplumber  # type: ignore
+    except ImportError:
+        pdfplumber = None
+
+    text_chunks, tables = [], []
+    if pdfplumber is not None:
+        with pdfplumber.open(path) as pdf:
+            for index, page in enumerate(pdf.pages[:TEXT_PAGES]):
+                try:
+                    text = page.extract_text() or ""
+                except Exception:
+                    text = ""
+                if text:
+                    text_chunks.append(text)
+                if index < TABLE_PAGES:
+                    try:
+                        page_tables = page.extract_tables() or []
+                    except Exception:
+                        page_tables = []
+                    tables.extend(rows for rows in map(_clean_rows, page_tables) if rows)
+        return "\n".join(text_chunks), tables
+
+    from PyPDF2 import PdfReader  # type: ignore
+    reader = PdfReader(path)
+    for page in reader.pages[:TEXT_PAGES]:
+        try:
+            text = page.extract_text() or ""
+        except Exception:
+            text = ""
+        if text:
+            text_chunks.append(text)
+    return "\n".join(text_chunks), tables
+
+
+def find_series(text):
+    for pattern in (SERIES_LABEL_RE, SERIES_ANY_RE):
+        m = pattern.search(text)
+        if m:
+            return m.group(1).strip()
+    return None
+
+
+def match_fields(text):
+    """{câmp: valoare} - prima potrivire pentru fiecare câmp, respectând prioritatea variantelor."""
+    first_by_pattern = {}
+    for m in FIELDS_RE.finditer(text):
+        index = int(m.lastgroup[1:])
+        if index not in first_by_pattern:
+            first_by_pattern[index] = m.group(m.lastgroup).strip()
+            if len(first_by_pattern) == len(FIELD_PATTERNS):
+                break
+    fields = {}
+    for index in sorted(first_by_pattern):
+        fields.setdefault(FIELD_PATTERNS[index][0], first_by_pattern[index])
+    return fields
+
+
+def species_from_tables(tables):
+    """Valorile de pe rândul "Specia" al primului tabel care îl conține."""
+    for rows in tables:
+        for row in rows:
+            if row and (normalize_text(row[0] if row[0] else '') or '').startswith('specia'):
+                values = [cell for cell in row[1:] if cell]
+                if values:
+                    return values
+                break
+    return []
+
+
+def parse_qty(text):
+    m = QTY_RE.search((text or '').strip())
+    if not m:
+        return None, None
+    val = m.group(1).replace(',', '.').strip()
+    try:
+        val_num = float(val)
+    except Exception:
+        val_num = None
+    unit = (m.group(2) or '').strip() or None
+    return val_num, unit
+
+
+def positions_from_tables(tables):
+    """
+    Pozițiile (max. MAX_POSITIONS coloane) din primul tabel cu rând "Specia":
+    (items, serii LOT, {serie LOT: date extra}).
+    """
+    for rows in tables:
+        index = {}
+        for idx, row in enumerate(rows):
+            first = (row[0] if row else '').lower()
+            joined = ' '.join(row).lower()
+            for key, test in ROW_LABELS:
+                if key not in index and test(first, joined):
+                    index[key] = idx
+        if "specia" not in index:
+            continue
+        num_cols = max(len(rows[index[key]]) - 1 for key in ("specia", "soi", "cantitate") if key in index)
+        if num_cols <= 0:
+            continue
+
+        def cell(key, col):
+            idx = index.get(key)
+            if idx is None or col >= len(rows[idx]):
+                return ''
+            return rows[idx][col].strip()
+
+        items, series_list, extras_by_serie = [], [], {}
+        for col in range(1, min(MAX_POSITIONS, num_cols) + 1):
+            item = {}
+            if cell("specia", col):
+                item['specia'] = cell("specia", col)
+            if cell("soi", col):
+                item['soi'] = cell("soi", col)
+            if "cantitate" in index and col < len(rows[index["cantitate"]]):
+                cantitate, um = parse_qty(rows[index["cantitate"]][col])
+                if cantitate is not None:
+                    item['cantitate'] = cantitate
+                if um:
+                    item['um'] = um
+            serie_val = cell("lot", col)
+            if serie_val:
+                series_list.append(serie_val)
+            extra = {key: cell(key, col) for key in ROW_EXTRA_KEYS if cell(key, col)}
+            if serie_val and extra:
+                extras_by_serie[serie_val] = extra
+            if item:
+                items.append(item)
+        if items:
+            return items, series_list, extras_by_serie
+    return [], [], {}
+
+
+def extract(path):
+    """
+    Toate datele unui PDF de aviz, într-o singură trecere (dict serializabil JSON):
+    document_series, species, partner, series_extra, items, series_list,
+    series_extras_by_serie, doc_date ("zz.ll.aaaa"). Dict gol dacă PDF-ul nu are text.
+    """
+    text, tables = read_pdf(path)
+    if not text:
+        return {}
+    fields = match_fields(text)
+    result = {}
+
+    series = find_series(text)
+    if series:
+        result["document_series"] = series
+    if fields.get("partner"):
+        result["partner"] = fields["partner"]
+    series_extra = {key: fields[key] for key in SERIES_EXTRA_FIELDS if key in fields}
+    if series_extra:
+        result["series_extra"] = series_extra
+
+    species = species_from_tables(tables)
+    if not species and fields.get("specia"):
+        species = [fields["specia"]]
+    result["species"] = species
+
+    items, series_list, extras_by_serie = positions_from_tables(tables)
+    if items:
+        if series_list:
+            result["series_list"] = series_list
+        if extras_by_serie:
+            result["series_extras_by_serie"] = extras_by_serie
+    elif fields.get("specia") or fields.get("soi"):
+        # Fallback: extracție simplă după etichete, pentru pozitie1
+        items = [{"specia": fields.get("specia"), "soi": fields.get("soi")}]
+    if items:
+        result["items"] = items
+
+    if fields.get("doc_date"):
+        result["doc_date"] = re.sub(r"[/-]", ".", fields["doc_date"])
+    return result
@@ -0,0 +1,167 @@
+"""
+Permisiunile utilizatorului curent, rezolvate o singură dată pe cerere.
+
+PermissionContextMiddleware atașează request.caps (Capabilities): rolul și
+flag-urile ok_* din UserProfile, gestiunea și vede_toate_documentele. Setul
+este păstrat în cache-ul Django (CACHES, partajat între procese) pentru
+PERMISSIONS_CACHE_TTL secunde, deci o cerere obișnuită nu mai face interogări
+pentru profil/rol. La o ratare de cache, profilul este citit cu
+select_related('role', 'gestiune') și atașat lui request.user, astfel încât și
+codul care folosește încă request.user.userprofile îl găsește fără interogări.
+
+Invalidare (signals.py): salvarea/ștergerea unui UserProfile crește versiunea
+utilizatorului; modificarea unui Role sau a unei Gestiuni crește generația
+globală. O intrare din cache este folosită doar dacă ambele coincid.
+
+Șablonul de rol (Role.ok_*) este copiat în toate profilurile cu acel rol de
+propagate_role, cu un singur UPDATE, la fiecare salvare a rolului.
+
+Șabloanele primesc `caps` prin context processorul capabilities_context.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject
+
+from .models import UserProfile
+
+
+CACHE_PREFIX = "perm-caps"
+GENERATION_KEY = f"{CACHE_PREFIX}:generation"
+FLAGS = ("ok_raportare", "ok_administrare", "ok_aviz", "ok_plaje", "ok_gestiuni", "ok_tipologii",
+         "ok_doc_generate", "vede_toate_documentele")
+
+
+class Capabilities:
+    """Ce poate face un utilizator; fără profil (sau anonim) toate flag-urile sunt False."""
+
+    def __init__(self, user_id=None, has_profile=False, role="", gestiune_id=None, gestiune_name="", **flags):
+        self.user_id = user_id
+        self.has_profile = has_profile
+        self.role = role or ""
+        self.gestiune_id = gestiune_id
+        self.gestiune_name = gestiune_name or ""
+        for flag in FLAGS:
+            setattr(self, flag, bool(flags.get(flag, False)))
+
+    @classmethod
+    def from_profile(cls, user_id, profile):
+        if profile is None:
+            return cls(user_id=user_id)
+        return cls(user_id=user_id, has_profile=True,
+                   role=profile.role.name.lower() if profile.role else "",
+                   gestiune_id=profile.gestiune_id,
+                   gestiune_name=profile.gestiune.nume if profile.gestiune else "",
+                   **{flag: getattr(profile, flag) for flag in FLAGS})
+
+    def to_dict(self):
+        data = {"user_id": self.user_id, "has_profile": self.has_profile, "role": self.role,
+                "gestiune_id": self.gestiune_id, "gestiune_name": self.gestiune_name}
+        data.update({flag: getattr(self, flag) for flag in FLAGS})
+        return data
+
+    @property
+    def is_superadmin(self):
+        return self.role == "superadmin"
+
+    @property
+    def is_admin(self):
+        return self.role == "admin"
+
+    @property
+    def is_admin_or_super(self):
+        return self.role in ("admin", "superadmin")
+
+    def __repr__(self):
+        return f"<Capabilities user={self.user_id} role={self.role or '-'}>"
+
+
+def cache_ttl():
+    return int(getattr(settings, "PERMISSIONS_CACHE_TTL", 300))
+
+
+def _user_key(user_id):
+    return f"{CACHE_PREFIX}:user:{user_id}"
+
+
+def _version_key(user_id):
+    return f"{CACHE_PREFIX}:version:{user_id}"
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def load_profile(user):
+    """Profilul cu rolul și gestiunea (o interogare), atașat și lui user.userprofile."""
+    profile = UserProfile.objects.select_related("role", "gestiune").filter(user_id=user.pk).first()
+    if profile is not None:
+        profile.user = user
+        user.userprofile = profile
+    return profile
+
+
+def get_capabilities(user):
+    if not user or not user.is_authenticated:
+        return Capabilities()
+    ttl = cache_ttl()
+    if ttl <= 0:
+        return Capabilities.from_profile(user.pk, load_profile(user))
+
+    key, version_key = _user_key(user.pk), _version_key(user.pk)
+    cached = cache.get_many([GENERATION_KEY, version_key, key])
+    # Versiunile sunt citite înaintea profilului: o invalidare concurentă lasă în cache
+    # o intrare cu versiune veche, care va fi ignorată la următoarea cerere
+    stamp = [cached.get(GENERATION_KEY, 0), cached.get(version_key, 0)]
+    entry = cached.get(key)
+    if entry and entry.get("stamp") == stamp:
+        return Capabilities(**entry["caps"])
+    caps = Capabilities.from_profile(user.pk, load_profile(user))
+    cache.set(key, {"stamp": stamp, "caps": caps.to_dict()}, ttl)
+    return caps
+
+
+def invalidate_user(user_id):
+    """Profilul utilizatorului s-a schimbat."""
+    _bump(_version_key(user_id))
+
+
+def invalidate_all():
+    """Un rol sau o gestiune s-a schimbat: toate seturile din cache devin invalide."""
+    _bump(GENERATION_KEY)
+
+
+def propagate_role(role):
+    """
+    Copiază flag-urile rolului în toate profilurile care îl au (un singur UPDATE).
+
+    QuerySet.update nu trimite post_save pentru profiluri, deci generația este
+    crescută aici; după commit, ca o cerere concurentă să nu pună din nou în cache
+    valorile vechi. Întoarce numărul de profiluri actualizate.
+    """
+    updated = UserProfile.objects.filter(role=role).update(**{flag: getattr(role, flag) for flag in FLAGS})
+    invalidate_all()
+    transaction.on_commit(invalidate_all)
+    return updated
+
+
+class PermissionContextMiddleware:
+    """Atașează request.caps (calculat la prima folosire). Trebuie pus după AuthenticationMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.caps = SimpleLazyObject(lambda: get_capabilities(request.user))
+        return self.get_response(request)
+
+
+def capabilities_context(request):
+    """Context processor: `caps` în toate șabloanele."""
+    caps = getattr(request, "caps", None)
+    if caps is None:
+        caps = SimpleLazyObject(lambda: get_capabilities(getattr(request, "user", None)))
+    return {"caps": caps}
@@ -0,0 +1,189 @@
+"""
+Ștergerea în masă a documentelor generate (pagina "Ștergere avize" și comanda
+purge_generated_documents).
+
+Documentele sunt parcurse în loturi după pk (keyset, doar values_list, fără
+instanțe de model). Pentru fiecare lot:
+
+1. rândurile lotului sunt blocate (SELECT ... FOR UPDATE), șterse printr-un singur
+   DELETE ... WHERE id IN (...), iar refcount-urile blob-urilor scad în bloc
+   (blobstore.detach_blobs) doar pentru rândurile blocate - un document șters
+   între timp de altcineva nu mai scade refcount-ul a doua oară;
+2. fișierele rămase fără referințe sunt șterse de pe disc în paralel, de un
+   pool de thread-uri: cele ale blob-urilor înainte de commit (cât timp rândurile
+   PdfBlob sunt blocate, ca în blobstore.release_blobs), cele legacy după commit.
+
+Din interfață, ștergerea nu mai rulează în cerere: se creează un PurgeJob, care
+pornește într-un thread de fundal (PURGE_RUN_IN_WEB) și/sau este preluat de
+comanda run_purge_jobs. Progresul (documente/fișiere șterse) se scrie în job
+după fiecare lot.
+"""
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+
+from . import blobstore
+from .models import GeneratedDocument, PurgeJob
+from .utils import log_activity
+
+
+PURGE_BATCH_SIZE = 500
+# Un job "running" fără progres de atâtea minute este considerat abandonat (proces oprit)
+STALE_AFTER_MINUTES = 30
+
+
+class PurgeBusy(Exception):
+    """Există deja o ștergere în așteptare sau în curs."""
+
+
+def file_workers():
+    return max(1, int(getattr(settings, "PURGE_FILE_WORKERS", 8)))
+
+
+def _unlink(name):
+    try:
+        default_storage.delete(name)
+        return 1
+    except Exception as e:
+        print(f"WARN: Nu s-a putut șterge fișierul {name}: {e}")
+        return 0
+
+
+def iter_batches(queryset, batch_size):
+    """Loturi de (pk, blob_id, pdf_file) în ordinea pk (keyset, fără OFFSET)."""
+    last_pk = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last_pk).order_by("pk")
+                    .values_list("pk", "blob_id", "pdf_file")[:batch_size])
+        if not rows:
+            return
+        last_pk = rows[-1][0]
+        yield rows
+
+
+def purge_documents(queryset, batch_size=None, workers=None, progress=None):
+    """
+    Șterge definitiv documentele din queryset și fișierele lor rămase fără referințe.
+    `progress(documente, fișiere)` este apelat după fiecare lot cu totalurile de până atunci.
+    Returnează (documente șterse, fișiere șterse).
+    """
+    batch_size = batch_size or PURGE_BATCH_SIZE
+    documents = files = 0
+    with ThreadPoolExecutor(max_workers=workers or file_workers(), thread_name_prefix="purge") as pool:
+        for rows in iter_batches(queryset, batch_size):
+            with transaction.atomic():
+                # Lotul citit mai sus nu era blocat: se șterg și se decrementează doar rândurile
+                # care încă există după blocare
+                locked = list(GeneratedDocument.objects.select_for_update()
+                              .filter(pk__in=[pk for pk, _, _ in rows]).values_list("pk", "blob_id", "pdf_file"))
+                pks = [pk for pk, _, _ in locked]
+                blob_counts = [blob_id for _, blob_id, _ in locked if blob_id]
+                legacy_names = [name for _, blob_id, name in locked if not blob_id and name]
+                GeneratedDocument.objects.filter(pk__in=pks).delete()
+                # Fișierele blob se șterg cât timp rândurile PdfBlob sunt blocate (vezi release_blobs)
+                files += sum(pool.map(_unlink, blobstore.detach_blobs(blob_counts)))
+                doomed = blobstore.unreferenced_files(legacy_names)
+            # Fișierele legacy se șterg doar după commit: un rollback nu lasă documente fără PDF
+            files += sum(pool.map(_unlink, doomed))
+            documents += len(pks)
+            if progress:
+                progress(documents, files)
+    return documents, files
+
+
+# --- Joburi de fundal ---
+
+def active_job():
+    return PurgeJob.objects.filter(status__in=[PurgeJob.STATUS_QUEUED, PurgeJob.STATUS_RUNNING]).first()
+
+
+def purge_queryset(date_limit=None):
+    """Documentele vizate: toate, sau cele create până la date_limit (inclusiv)."""
+    queryset = GeneratedDocument.objects.all()
+    if date_limit:
+        queryset = queryset.filter(created_at__date__lte=date_limit)
+    return queryset
+
+
+def enqueue(user, date_limit=None):
+    """
+    Creează jobul și îl pornește în fundal după commit. PurgeBusy dacă rulează deja unul;
+    două cereri simultane sunt separate de unicitatea PurgeJob.active_slot.
+    """
+    if active_job():
+        raise PurgeBusy()
+    try:
+        with transaction.atomic():
+            job = PurgeJob.objects.create(requested_by=user, date_limit=date_limit,
+                                          total=purge_queryset(date_limit).count())
+    except IntegrityError:
+        raise PurgeBusy()
+    if getattr(settings, "PURGE_RUN_IN_WEB", True):
+        transaction.on_commit(lambda: start_thread(job.pk))
+    return job
+
+
+def start_thread(job_id):
+    thread = threading.Thread(target=_thread_main, args=(job_id,), name=f"purge-job-{job_id}", daemon=True)
+    thread.start()
+    return thread
+
+
+def _thread_main(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        connections.close_all()
+
+
+def claim(job_id):
+    """Marchează jobul ca pornit; False dacă l-a preluat deja altcineva (thread sau comandă)."""
+    return bool(PurgeJob.objects.filter(pk=job_id, status=PurgeJob.STATUS_QUEUED)
+                .update(status=PurgeJob.STATUS_RUNNING, started_at=timezone.now(), updated_at=timezone.now()))
+
+
+def requeue_stale(minutes=STALE_AFTER_MINUTES):
+    """Repune în coadă joburile rămase "running" fără progres (ex: proces web repornit)."""
+    limit = timezone.now() - timedelta(minutes=minutes)
+    return PurgeJob.objects.filter(status=PurgeJob.STATUS_RUNNING, updated_at__lt=limit).update(
+        status=PurgeJob.STATUS_QUEUED)
+
+
+def run_job(job_id, batch_size=None, workers=None):
+    """Rulează jobul dacă e în așteptare. Returnează jobul actualizat sau None dacă nu a fost preluat."""
+    if not claim(job_id):
+        return None
+    job = PurgeJob.objects.get(pk=job_id)
+    queryset = purge_queryset(job.date_limit)
+    # La reluarea unui job întrerupt, contoarele continuă de unde au rămas
+    base_documents, base_files = job.documents_deleted, job.files_deleted
+    PurgeJob.objects.filter(pk=job_id).update(total=base_documents + queryset.count())
+
+    def progress(documents, files):
+        PurgeJob.objects.filter(pk=job_id).update(documents_deleted=base_documents + documents,
+                                                  files_deleted=base_files + files, updated_at=timezone.now())
+
+    try:
+        documents, files = purge_documents(queryset, batch_size=batch_size, workers=workers, progress=progress)
+    except Exception as e:
+        traceback.print_exc()
+        PurgeJob.objects.filter(pk=job_id).update(status=PurgeJob.STATUS_FAILED, error=str(e),
+                                                  finished_at=timezone.now(), active_slot=None)
+        log_activity(job.requested_by, "DELETE_ALL_DOCS_ERROR", f"Job ștergere #{job_id} eșuat: {e}",
+                     payload={"job_id": job_id})
+    else:
+        PurgeJob.objects.filter(pk=job_id).update(status=PurgeJob.STATUS_DONE, finished_at=timezone.now(),
+                                                  active_slot=None)
+        log_activity(job.requested_by, "DELETE_ALL_DOCS_SUCCESS",
+                     f"Job ștergere #{job_id}: au fost șterse {base_documents + documents} documente generate "
+                     f"și {base_files + files} fișiere.",
+                     payload={"job_id": job_id, "documents": base_documents + documents,
+                              "files": base_files + files})
+    job.refresh_from_db()
+    return job
@@ -0,0 +1 @@
+"""Servicii folosite de view-uri și de comenzile de management (fără dependențe de request)."""
@@ -0,0 +1,149 @@
+"""
+Pachetul de documente al unui aviz: un singur PDF (toate părțile, în ordinea
+seriilor) sau o arhivă ZIP cu părțile.
+
+- PDF-ul combinat este construit cu PyPDF2 o singură dată și păstrat în
+  storage la generated_docs/bundles/<cheie>.pdf; cheia derivă din hash-urile
+  SHA-256 ale părților, deci orice regenerare produce automat o cheie nouă.
+- ZIP-ul este construit din mers (stream), bucată cu bucată, fără a ține
+  fișierele în memorie.
+"""
+import hashlib
+import os
+import tempfile
+import time
+import zipfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+from ..blobstore import content_hash
+
+
+BUNDLE_DIR = "generated_docs/bundles"
+CHUNK_SIZE = 64 * 1024
+
+
+def part_hash(doc):
+    """SHA-256 al PDF-ului unei părți (din blob, sau calculat pentru fișierele legacy)."""
+    if doc.blob_id:
+        return doc.blob.sha256
+    digest = hashlib.sha256()
+    with default_storage.open(doc.pdf_file.name, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def bundle_name(docs):
+    key = content_hash("\n".join(part_hash(doc) for doc in docs).encode("ascii"))
+    return f"{BUNDLE_DIR}/{key}.pdf"
+
+
+def merged_pdf(docs):
+    """
+    Numele din storage al PDF-ului combinat pentru părțile date (în ordinea primită).
+    Returnează (nume, din_cache).
+    """
+    from PyPDF2 import PdfWriter
+
+    name = bundle_name(docs)
+    if default_storage.exists(name):
+        return name, True
+
+    writer = PdfWriter()
+    handles = []
+    try:
+        for doc in docs:
+            handle = default_storage.open(doc.pdf_file.name, "rb")
+            handles.append(handle)
+            writer.append(handle)
+        with tempfile.TemporaryFile() as tmp:
+            writer.write(tmp)
+            tmp.seek(0)
+            saved = default_storage.save(name, File(tmp))
+    finally:
+        for handle in handles:
+            handle.close()
+    if saved != name:
+        # Construit în paralel de altă cerere; păstrăm un singur exemplar
+        default_storage.delete(saved)
+    prune_cache()
+    return name, False
+
+
+def prune_cache(max_age_days=None):
+    """Șterge PDF-urile combinate create de mai mult de BUNDLE_CACHE_MAX_AGE_DAYS zile."""
+    max_age_days = max_age_days if max_age_days is not None else getattr(settings, "BUNDLE_CACHE_MAX_AGE_DAYS", 7)
+    try:
+        _dirs, files = default_storage.listdir(BUNDLE_DIR)
+    except (FileNotFoundError, NotImplementedError):
+        return 0
+    limit = time.time() - max_age_days * 86400
+    removed = 0
+    for filename in files:
+        name = f"{BUNDLE_DIR}/{filename}"
+        try:
+            if default_storage.get_modified_time(name).timestamp() < limit:
+                default_storage.delete(name)
+                removed += 1
+        except (OSError, NotImplementedError):
+            continue
+    return removed
+
+
+class _ZipStream:
+    """Destinație non-seekable pentru zipfile: acumulează octeții până sunt preluați de generator."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+
+    def write(self, data):
+        self._buffer += data
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def zip_entry_names(docs):
+    names, used = [], set()
+    for index, doc in enumerate(docs, start=1):
+        base = f"{index:02d}_{doc.document_series or 'NA'}"
+        name, suffix = f"{base}.pdf", 2
+        while name in used:
+            name, suffix = f"{base}_{suffix}.pdf", suffix + 1
+        used.add(name)
+        names.append(name)
+    return names
+
+
+def iter_zip(docs):
+    """Generator cu octeții unei arhive ZIP (fără compresie - PDF-urile sunt deja comprimate)."""
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        for doc, arcname in zip(docs, zip_entry_names(docs)):
+            with default_storage.open(doc.pdf_file.name, "rb") as source, \
+                    archive.open(arcname, mode="w", force_zip64=True) as target:
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                    target.write(chunk)
+                    data = stream.take()
+                    if data:
+                        yield data
+    # Header-ele de final (data descriptor, directorul central) sunt scrise la închiderea arhivei
+    yield stream.take()
+
+
+def download_filename(aviz, extension):
+    return f"aviz_{os.path.basename(str(aviz))}.{extension}"
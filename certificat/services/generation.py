@@ -0,0 +1,87 @@
+"""
+Serviciul de generare: preluarea feed-ului de avize, randarea template-ului DOCX
+și amprenta de randare (render fingerprint) folosită pentru a evita reconversiile.
+
+Dependențele grele (requests, docxtpl - care aduce python-docx, lxml și jinja2)
+sunt importate abia la prima utilizare, astfel încât importul view-urilor,
+rezolvarea URL-urilor, admin-ul și comenzile de management nu le încarcă.
+"""
+import hashlib
+import json
+import os
+
+from django.conf import settings
+
+from .. import metrics
+from ..instrumentation import timed, STAGE_FEED_FETCH, STAGE_DOCX_RENDER
+
+
+TEMPLATE_PATH = os.path.join(settings.BASE_DIR, "certificat", "template.docx")
+
+# {cale: (mtime, dimensiune, sha256)} - template-ul se recitește doar dacă s-a modificat pe disc
+_template_hashes = {}
+
+
+class FeedError(Exception):
+    """Eroare de rețea/HTTP la preluarea feed-ului extern de avize."""
+
+
+class FeedTimeout(FeedError):
+    """Serverul extern nu a răspuns în timp util."""
+
+
+def fetch_feed(headers=None, timeout=20, verify=True):
+    """
+    Descarcă și decodează feed-ul JSON de avize (settings.AVIZ_FEED_URL).
+
+    Ridică FeedTimeout / FeedError pentru erori de rețea sau HTTP și
+    json.JSONDecodeError dacă răspunsul nu este JSON valid.
+    """
+    import requests
+
+    with timed(STAGE_FEED_FETCH):
+        try:
+            response = requests.get(settings.AVIZ_FEED_URL, headers=headers, timeout=timeout, verify=verify)
+            response.raise_for_status()
+        except requests.exceptions.Timeout as e:
+            raise FeedTimeout(str(e)) from e
+        except requests.exceptions.RequestException as e:
+            raise FeedError(str(e)) from e
+        data_list = json.loads(response.content)
+    metrics.FEED_FETCH_BYTES.observe(len(response.content))
+    return data_list
+
+
+def render_docx(context, template_path=TEMPLATE_PATH):
+    """Randează template-ul DOCX cu contextul dat; returnează obiectul DocxTemplate (de salvat cu .save())."""
+    from docxtpl import DocxTemplate
+
+    if not os.path.exists(template_path):
+        raise FileNotFoundError(f"Template-ul DOCX nu a fost găsit la calea: {template_path}")
+    with timed(STAGE_DOCX_RENDER):
+        doc_template = DocxTemplate(template_path)
+        doc_template.render(context)
+    return doc_template
+
+
+def template_hash(template_path=TEMPLATE_PATH):
+    """SHA-256 al fișierului template (recalculat doar când mtime/dimensiunea se schimbă)."""
+    stat = os.stat(template_path)
+    cached = _template_hashes.get(template_path)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    with open(template_path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    _template_hashes[template_path] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+
+def render_fingerprint(context, template_path=TEMPLATE_PATH):
+    """
+    Amprenta unei randări: hash peste contextul final (serializat canonic) și
+    hash-ul template-ului. Aceeași amprentă => același PDF, conversia poate fi sărită.
+    """
+    payload = json.dumps(context, sort_keys=True, ensure_ascii=False, default=str)
+    digest = hashlib.sha256(template_hash(template_path).encode("ascii"))
+    digest.update(payload.encode("utf-8"))
+    return digest.hexdigest()
@@ -0,0 +1,133 @@
+"""
+Importul speciilor noi din feed-ul de avize în SpecieMapping.
+
+- feed_species: setul de specii din feed (câmpul SPECIE). Descărcarea este păstrată în
+  cache-ul Django SPECIES_FEED_CACHE_TTL secunde, deci formularul și salvarea lui nu mai
+  descarcă feed-ul de două ori; comanda import_species_mappings poate citi și o copie
+  locală a feed-ului (fișier JSON).
+- suggest_mappings: speciile nemapate (diferența față de SpecieMapping, o interogare) cu
+  tipologia sugerată după numele normalizat (pdfparse.normalize_text, ca în scan_series_from_pdfs).
+- import_mappings: salvează mapările alese cu un singur bulk_create.
+"""
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+
+from .. import fragments, pdfparse
+from ..models import SpecieMapping, TipologieProdus
+from .generation import fetch_feed
+
+
+FEED_SPECIES_CACHE_KEY = "speciemapping:feed-species"
+
+REASON_SAME_NAME = "aceeași specie (fără diacritice) este deja mapată"
+REASON_SIMILAR = "specie asemănătoare deja mapată"
+REASON_TIPOLOGIE = "numele tipologiei"
+REASON_GENERAL = "implicit (General)"
+
+
+def cache_ttl():
+    return int(getattr(settings, "SPECIES_FEED_CACHE_TTL", 600))
+
+
+def species_from_records(data_list):
+    return {str(item.get("SPECIE") or "").strip() for item in data_list if str(item.get("SPECIE") or "").strip()}
+
+
+def feed_species(refresh=False, feed_file=None, timeout=15):
+    """
+    Speciile din feed. Cu feed_file se citește fișierul JSON (fără cache); altfel se folosește
+    cache-ul, iar la ratare (sau refresh=True) feed-ul este descărcat. Ridică FeedError.
+    """
+    if feed_file:
+        with open(feed_file, encoding="utf-8") as handle:
+            return species_from_records(json.load(handle))
+    ttl = cache_ttl()
+    species = None if refresh or ttl <= 0 else cache.get(FEED_SPECIES_CACHE_KEY)
+    if species is None:
+        species = species_from_records(fetch_feed(timeout=timeout))
+        if ttl > 0:
+            cache.set(FEED_SPECIES_CACHE_KEY, sorted(species), ttl)
+    return set(species)
+
+
+def _suggest(specie, mapped, tipologii, general):
+    norm = pdfparse.normalize_text(specie) or ""
+    for mapped_norm, tip_id in mapped:
+        if mapped_norm == norm:
+            return tip_id, REASON_SAME_NAME
+    # Cea mai lungă specie mapată conținută în nume (sau invers), ex. "Grau dur" -> "Grau"
+    similar = [(len(mapped_norm), tip_id) for mapped_norm, tip_id in mapped
+               if mapped_norm and (mapped_norm in norm or norm in mapped_norm)]
+    if similar:
+        return max(similar)[1], REASON_SIMILAR
+    for tip_norm, tip_id in tipologii:
+        if tip_norm and tip_norm in norm:
+            return tip_id, REASON_TIPOLOGIE
+    return (general, REASON_GENERAL) if general else (None, "")
+
+
+def suggest_mappings(species):
+    """
+    Speciile din `species` care nu au încă mapare (comparație fără majuscule/spații), sortate,
+    ca listă de dicționare {specie, tipologie_id, reason}. Două interogări: mapările și tipologiile.
+    """
+    existing = list(SpecieMapping.objects.values_list("specie", "tipologie_id"))
+    existing_keys = {specie.strip().lower() for specie, _ in existing}
+    new_species = {}
+    for specie in sorted(s.strip() for s in species if s and s.strip()):
+        if specie.lower() not in existing_keys:
+            new_species.setdefault(specie.lower(), specie)
+    if not new_species:
+        return []
+
+    mapped = [(pdfparse.normalize_text(specie) or "", tip_id) for specie, tip_id in existing]
+    tipologii = [(pdfparse.normalize_text(nume) or "", tip_id)
+                 for tip_id, nume in TipologieProdus.objects.values_list("id", "nume")]
+    general = next((tip_id for tip_norm, tip_id in tipologii if tip_norm == "general"), None)
+
+    suggestions = []
+    for specie in sorted(new_species.values(), key=str.lower):
+        tip_id, reason = _suggest(specie, mapped, tipologii, general)
+        suggestions.append({"specie": specie, "tipologie_id": tip_id, "reason": reason})
+    return suggestions
+
+
+def _new_rows(pairs):
+    existing = {s.lower() for s in SpecieMapping.objects.values_list("specie", flat=True)}
+    rows, seen = [], set()
+    for specie, tip_id in pairs:
+        key = specie.lower()
+        if key in existing or key in seen:
+            continue
+        seen.add(key)
+        rows.append(SpecieMapping(specie=specie, tipologie_id=tip_id))
+    return rows
+
+
+def import_mappings(pairs):
+    """
+    Creează mapările (specie, tipologie_id) care nu există încă, cu un singur bulk_create.
+    Întoarce lista speciilor create efectiv.
+    """
+    pairs = [(specie.strip(), tip_id) for specie, tip_id in pairs if specie and specie.strip() and tip_id]
+    if not pairs:
+        return []
+    # Fără ignore_conflicts: rândurile ignorate nu s-ar distinge de cele create și lista
+    # întoarsă ar include și speciile adăugate concurent. La un conflict (mapare adăugată
+    # între timp) se recitesc mapările existente și inserarea se reia o singură dată.
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                rows = _new_rows(pairs)
+                SpecieMapping.objects.bulk_create(rows)
+            break
+        except IntegrityError:
+            if attempt:
+                raise
+    if rows:
+        # bulk_create nu trimite post_save
+        fragments.invalidate("speciemapping")
+    return [row.specie for row in rows]
@@ -1,8 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import UserProfile
+from .models import UserProfile, Role, Gestiune, TipologieProdus, UserManual, DocumentRange, SpecieMapping
 from .utils import log_activity
+from . import fragments, permissions
 from django.contrib.auth.signals import user_logged_in, user_logged_out
 
 @receiver(post_save, sender=User)
@@ -20,4 +21,42 @@ def log_user_logout(sender, request, user, **kwargs):
     """Înregistrează logout-ul utilizatorului."""
     # Verificăm dacă user există, deoarece semnalul poate fi trimis și la ștergere sesiune
     if user:
-        log_activity(user, "LOGOUT", f"Utilizatorul '{user.username}' s-a deconectat.")
\ No newline at end of file
+        log_activity(user, "LOGOUT", f"Utilizatorul '{user.username}' s-a deconectat.")
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_profile_capabilities(sender, instance, **kwargs):
+    """Permisiunile din cache ale utilizatorului nu mai sunt valabile."""
+    permissions.invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=Role)
+def propagate_role_template(sender, instance, raw=False, **kwargs):
+    """Permisiunile din șablonul rolului se aplică tuturor utilizatorilor cu acest rol."""
+    if raw:
+        # loaddata: profilurile din fixture au deja valorile lor
+        permissions.invalidate_all()
+        return
+    permissions.propagate_role(instance)
+
+
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=Gestiune)
+@receiver(post_delete, sender=Gestiune)
+def invalidate_all_capabilities(sender, **kwargs):
+    """Rolurile/gestiunile apar în permisiunile tuturor utilizatorilor."""
+    permissions.invalidate_all()
+
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=UserProfile)
+@receiver([post_save, post_delete], sender=Role)
+@receiver([post_save, post_delete], sender=Gestiune)
+@receiver([post_save, post_delete], sender=TipologieProdus)
+@receiver([post_save, post_delete], sender=UserManual)
+@receiver([post_save, post_delete], sender=DocumentRange)
+@receiver([post_save, post_delete], sender=SpecieMapping)
+def invalidate_admin_fragments(sender, **kwargs):
+    """Panourile din administrare care afișează modelul trebuie randate din nou."""
+    fragments.invalidate_for_model(sender)
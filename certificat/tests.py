@@ -1,3 +1,573 @@
-from django.test import TestCase
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import blobstore, numbering, purge
+from .models import DocumentRange, GeneratedDocument, Gestiune, PdfBlob, PurgeJob, Role, TipologieProdus, UserProfile
+from .views.api import decode_cursor, encode_cursor
+from .views.ranges import get_next_document_number
+
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class MediaTestCase(TestCase):
+    """TestCase cu MEDIA_ROOT temporar și cache în memorie (fișierele și cache-ul real nu sunt atinse)."""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp(prefix="certificat-tests-")
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root, CACHES=LOCMEM_CACHES)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user("tester")
+
+    def make_document(self, aviz_number="A1", **fields):
+        return GeneratedDocument.objects.create(aviz_number=aviz_number, generated_by=self.user, **fields)
+
+
+class BlobStoreTests(MediaTestCase):
+    def test_acquire_deduplicates_content_and_counts_references(self):
+        first = blobstore.acquire(b"%PDF-1 continut")
+        second = blobstore.acquire(b"%PDF-1 continut")
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(second.refcount, 2)
+        self.assertEqual(PdfBlob.objects.count(), 1)
+        self.assertTrue(default_storage.exists(first.file.name))
+
+    def test_release_deletes_file_only_at_zero(self):
+        blob = blobstore.acquire(b"%PDF-1 continut", refs=2)
+
+        self.assertEqual(blobstore.release_blobs({blob.pk: 1}), 0)
+        self.assertTrue(default_storage.exists(blob.file.name))
+        self.assertEqual(PdfBlob.objects.get(pk=blob.pk).refcount, 1)
+
+        self.assertEqual(blobstore.release_blobs({blob.pk: 1}), 1)
+        self.assertFalse(default_storage.exists(blob.file.name))
+        self.assertFalse(PdfBlob.objects.filter(pk=blob.pk).exists())
+
+    def test_acquire_after_release_rewrites_file(self):
+        blob = blobstore.acquire(b"%PDF-1 continut")
+        blobstore.release_blobs({blob.pk: 1})
+
+        again = blobstore.acquire(b"%PDF-1 continut")
+        self.assertEqual(again.refcount, 1)
+        self.assertTrue(default_storage.exists(again.file.name))
+
+    def test_release_corrects_refcount_of_blob_still_in_use(self):
+        blob = blobstore.acquire(b"%PDF-1 continut")
+        self.make_document(blob=blob, pdf_file=blob.file.name)
+        self.make_document(aviz_number="A2", blob=blob, pdf_file=blob.file.name)
+
+        self.assertEqual(blobstore.release_blobs({blob.pk: 5}), 0)
+        self.assertEqual(PdfBlob.objects.get(pk=blob.pk).refcount, 2)
+        self.assertTrue(default_storage.exists(blob.file.name))
+
+    def test_attach_pdf_releases_previous_blob(self):
+        doc = self.make_document()
+        old = blobstore.attach_pdf(doc, b"%PDF-1 vechi")
+        doc.save()
+        new = blobstore.attach_pdf(doc, b"%PDF-1 nou")
+
+        doc.refresh_from_db()
+        self.assertEqual(doc.blob_id, new.pk)
+        self.assertEqual(doc.pdf_file.name, new.file.name)
+        self.assertFalse(PdfBlob.objects.filter(pk=old.pk).exists())
+        self.assertFalse(default_storage.exists(old.file.name))
+
+    def test_attach_pdf_same_content_keeps_blob(self):
+        doc = self.make_document()
+        blob = blobstore.attach_pdf(doc, b"%PDF-1 continut")
+        doc.save()
+
+        self.assertEqual(blobstore.attach_pdf(doc, b"%PDF-1 continut").pk, blob.pk)
+        self.assertEqual(PdfBlob.objects.get(pk=blob.pk).refcount, 1)
+
+    def test_detach_blobs_returns_files_of_unreferenced_blobs(self):
+        shared = blobstore.acquire(b"%PDF-1 comun", refs=2)
+        single = blobstore.acquire(b"%PDF-1 unic")
+
+        doomed = blobstore.detach_blobs([shared.pk, single.pk])
+
+        self.assertEqual(doomed, [single.file.name])
+        self.assertEqual(PdfBlob.objects.get(pk=shared.pk).refcount, 1)
+        self.assertFalse(PdfBlob.objects.filter(pk=single.pk).exists())
+        # detach_blobs nu șterge fișierele: le șterge apelantul (purge.py)
+        self.assertTrue(default_storage.exists(single.file.name))
+
+    def test_recount_fixes_drifted_refcounts(self):
+        blob = blobstore.acquire(b"%PDF-1 continut", refs=3)
+        self.make_document(blob=blob, pdf_file=blob.file.name)
+
+        self.assertEqual(blobstore.recount(), 1)
+        self.assertEqual(PdfBlob.objects.get(pk=blob.pk).refcount, 1)
+
+
+class NumberingTests(TestCase):
+    def test_next_in_range_keeps_prefix_and_padding(self):
+        self.assertEqual(numbering.next_in_range("AB0001", "AB0010", ""), ("AB0001", 10, None))
+        self.assertEqual(numbering.next_in_range("AB0001", "AB0010", "AB0009"), ("AB0010", 1, None))
+
+    def test_next_in_range_errors(self):
+        self.assertEqual(numbering.next_in_range("AB0001", "AB0010", "AB0010"), (None, 0, numbering.RANGE_EXHAUSTED))
+        self.assertEqual(numbering.next_in_range("AB0001", "CD0010", ""), (None, 0, numbering.RANGE_INCOMPATIBLE))
+        self.assertEqual(numbering.next_in_range("ABC", "ABC", ""), (None, 0, ""))
+
+
+class DocumentRangeTests(TestCase):
+    def setUp(self):
+        self.gestiune = Gestiune.objects.create(nume="Depozit", locatie="Cluj")
+        self.tipologie = TipologieProdus.objects.create(nume="Cereale")
+
+    def make_range(self, start="AB0001", end="AB0003", current="", tipologie=None):
+        return DocumentRange.objects.create(gestiune=self.gestiune, tipologie=tipologie or self.tipologie,
+                                            numar_inceput=start, numar_final=end, numar_curent=current)
+
+    def test_save_refreshes_projection(self):
+        doc_range = self.make_range()
+        self.assertEqual((doc_range.next_preview, doc_range.remaining), ("AB0001", 3))
+
+        doc_range.numar_curent = "AB0003"
+        doc_range.save(update_fields=["numar_curent"])
+        doc_range.refresh_from_db()
+        self.assertEqual((doc_range.next_preview, doc_range.remaining), (numbering.RANGE_EXHAUSTED, 0))
+
+    def test_allocation_advances_until_exhausted(self):
+        doc_range = self.make_range()
+
+        numbers = [get_next_document_number(self.gestiune, self.tipologie) for _ in range(4)]
+
+        self.assertEqual(numbers, ["AB0001", "AB0002", "AB0003", numbering.RANGE_EXHAUSTED])
+        doc_range.refresh_from_db()
+        self.assertEqual((doc_range.numar_curent, doc_range.remaining), ("AB0003", 0))
+
+    def test_preview_does_not_allocate(self):
+        doc_range = self.make_range()
+
+        self.assertEqual(get_next_document_number(self.gestiune, self.tipologie, preview_only=True), "AB0001")
+        self.assertEqual(get_next_document_number(self.gestiune, self.tipologie, preview_only=True), "AB0001")
+        doc_range.refresh_from_db()
+        self.assertEqual(doc_range.numar_curent, "")
+
+    def test_allocation_moves_to_next_range(self):
+        self.make_range(end="AB0001")
+        self.make_range(start="CD0001", end="CD0005")
+
+        numbers = [get_next_document_number(self.gestiune, self.tipologie) for _ in range(2)]
+
+        self.assertEqual(numbers, ["AB0001", "CD0001"])
+
+    def test_allocation_corrects_stale_projection(self):
+        stale = self.make_range()
+        # Modificare fără save(): proiecția spune încă "disponibil"
+        DocumentRange.objects.filter(pk=stale.pk).update(numar_curent="AB0003")
+        self.make_range(start="CD0001", end="CD0005")
+
+        self.assertEqual(get_next_document_number(self.gestiune, self.tipologie), "CD0001")
+        stale.refresh_from_db()
+        self.assertEqual((stale.next_preview, stale.remaining), (numbering.RANGE_EXHAUSTED, 0))
+
+    def test_falls_back_to_general_tipologie(self):
+        general = TipologieProdus.objects.create(nume="General")
+        self.make_range(start="GE01", end="GE09", tipologie=general)
+
+        self.assertEqual(get_next_document_number(self.gestiune, self.tipologie), "GE01")
+
+    def test_no_range_returns_empty_string(self):
+        self.assertEqual(get_next_document_number(self.gestiune, self.tipologie), "")
+
+
+@override_settings(PURGE_RUN_IN_WEB=False)
+class PurgeJobTests(MediaTestCase):
+    def make_blob_document(self, aviz_number, content):
+        blob = blobstore.acquire(content)
+        return self.make_document(aviz_number=aviz_number, blob=blob, pdf_file=blob.file.name)
+
+    def test_enqueue_allows_one_active_job(self):
+        job = purge.enqueue(self.user)
+
+        self.assertEqual(job.status, PurgeJob.STATUS_QUEUED)
+        self.assertTrue(job.active_slot)
+        with self.assertRaises(purge.PurgeBusy):
+            purge.enqueue(self.user)
+        # Și fără verificarea active_job() (două cereri simultane), unicitatea slotului oprește al doilea job
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            PurgeJob.objects.create(requested_by=self.user)
+
+    def test_run_job_deletes_documents_and_unreferenced_files(self):
+        shared = self.make_blob_document("A1", b"%PDF-1 comun")
+        self.make_blob_document("A2", b"%PDF-1 comun")
+        single = self.make_blob_document("A3", b"%PDF-1 unic")
+        legacy_name = default_storage.save("generated_docs/legacy.pdf", ContentFile(b"%PDF-1 legacy"))
+        self.make_document(aviz_number="A4", pdf_file=legacy_name)
+        job = purge.enqueue(self.user)
+
+        job = purge.run_job(job.pk, batch_size=2)
+
+        self.assertEqual(job.status, PurgeJob.STATUS_DONE)
+        self.assertIsNone(job.active_slot)
+        self.assertEqual((job.total, job.documents_deleted, job.files_deleted), (4, 4, 3))
+        self.assertFalse(GeneratedDocument.objects.exists())
+        self.assertFalse(PdfBlob.objects.exists())
+        for name in (shared.pdf_file.name, single.pdf_file.name, legacy_name):
+            self.assertFalse(default_storage.exists(name))
+        # Slotul eliberat: se poate porni un job nou
+        self.assertTrue(purge.enqueue(self.user).active_slot)
+
+    def test_date_limit_keeps_newer_documents(self):
+        old = self.make_blob_document("A1", b"%PDF-1 comun")
+        recent = self.make_blob_document("A2", b"%PDF-1 comun")
+        GeneratedDocument.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=10))
+        job = purge.enqueue(self.user, date_limit=(timezone.now() - timedelta(days=5)).date())
+
+        job = purge.run_job(job.pk)
+
+        self.assertEqual((job.documents_deleted, job.files_deleted), (1, 0))
+        self.assertEqual(list(GeneratedDocument.objects.values_list("pk", flat=True)), [recent.pk])
+        self.assertEqual(PdfBlob.objects.get(pk=recent.blob_id).refcount, 1)
+        self.assertTrue(default_storage.exists(recent.pdf_file.name))
+
+    def test_purge_skips_rows_deleted_concurrently(self):
+        self.make_blob_document("A1", b"%PDF-1 comun")
+        gone = self.make_blob_document("A2", b"%PDF-1 comun")
+        kept_blob = blobstore.acquire(b"%PDF-1 comun")  # o a treia referință, fără document
+        batches = list(purge.iter_batches(GeneratedDocument.objects.all(), 10))
+        # Documentul dispare între citirea lotului și blocare: refcount-ul nu scade de două ori
+        GeneratedDocument.objects.filter(pk=gone.pk).delete()
+        blobstore.release_blobs({gone.blob_id: 1})
+
+        with mock.patch.object(purge, "iter_batches", return_value=iter(batches)):
+            documents, files = purge.purge_documents(GeneratedDocument.objects.all())
+
+        self.assertEqual((documents, files), (1, 0))
+        self.assertEqual(PdfBlob.objects.get(pk=kept_blob.pk).refcount, 1)
+
+    def test_claimed_job_is_not_run_twice(self):
+        job = purge.enqueue(self.user)
+        self.assertTrue(purge.claim(job.pk))
+
+        self.assertIsNone(purge.run_job(job.pk))
+
+    def test_requeue_stale_running_job(self):
+        job = purge.enqueue(self.user)
+        purge.claim(job.pk)
+        PurgeJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(purge.requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, PurgeJob.STATUS_QUEUED)
+
+    def test_failed_job_releases_slot(self):
+        job = purge.enqueue(self.user)
+
+        with mock.patch.object(purge, "purge_documents", side_effect=RuntimeError("disc plin")), \
+                mock.patch("certificat.purge.traceback.print_exc"):
+            job = purge.run_job(job.pk)
+
+        self.assertEqual((job.status, job.error), (PurgeJob.STATUS_FAILED, "disc plin"))
+        self.assertIsNone(job.active_slot)
+
+
+class DocumentApiTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        admin_role, _ = Role.objects.get_or_create(name="admin")
+        profile = UserProfile.objects.get(user=self.user)
+        profile.role = admin_role
+        profile.ok_doc_generate = True
+        profile.vede_toate_documentele = True
+        profile.save()
+        self.client.force_login(self.user)
+        # Trei documente cu același created_at: cursorul departajează după id
+        same_time = timezone.now() - timedelta(days=1)
+        self.docs = [self.make_document(aviz_number=f"A{i}", document_series=f"S{i}") for i in range(5)]
+        GeneratedDocument.objects.filter(pk__in=[d.pk for d in self.docs[1:4]]).update(created_at=same_time)
+
+    def fetch_all(self, limit):
+        ids, cursor, pages = [], None, 0
+        while True:
+            params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+            data = self.client.get(reverse("api_documents"), params).json()
+            ids += [row["id"] for row in data["results"]]
+            pages += 1
+            cursor = data["next_cursor"]
+            if not cursor:
+                return ids, pages
+
+    def test_cursor_pages_cover_every_document_once(self):
+        expected = list(GeneratedDocument.objects.order_by("-created_at", "-id").values_list("pk", flat=True))
+
+        ids, pages = self.fetch_all(limit=2)
+
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 3)
+
+    def test_cursor_round_trip_and_invalid_cursor(self):
+        doc = self.docs[0]
+        self.assertEqual(decode_cursor(encode_cursor(doc)), (doc.created_at, doc.pk))
+
+        response = self.client.get(reverse("api_documents"), {"cursor": "nu-e-cursor"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse("api_documents"), {"limit": "x"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_etag_returns_304_until_content_changes(self):
+        url = reverse("api_document_detail", args=[self.docs[0].pk])
+        first = self.client.get(url)
+        etag = first["ETag"]
+
+        self.assertEqual(first.status_code, 200)
+        self.assertFalse(first.has_header("Last-Modified"))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Statusul nu atinge created_at/regenerated_at, dar schimbă ETag-ul
+        GeneratedDocument.objects.filter(pk=self.docs[0].pk).update(status="finalizat")
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+
+    def test_if_modified_since_is_ignored(self):
+        url = reverse("api_document_detail", args=[self.docs[0].pk])
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE="Wed, 01 Jan 2099 00:00:00 GMT")
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_etag_changes_with_page(self):
+        first = self.client.get(reverse("api_documents"), {"limit": 2})
+        again = self.client.get(reverse("api_documents"), {"limit": 2}, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+        self.make_document(aviz_number="A9")
+        fresh = self.client.get(reverse("api_documents"), {"limit": 2}, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(fresh.status_code, 200)
+
+    def test_access_rules(self):
+        other = User.objects.create_user("altul")
+        self.client.force_login(other)
+
+        self.assertEqual(self.client.get(reverse("api_documents")).status_code, 403)
+        self.assertEqual(self.client.get(reverse("api_document_detail", args=[self.docs[0].pk])).status_code, 403)
+        self.assertEqual(self.client.get(reverse("api_document_detail", args=[999999])).status_code, 404)
+
+
+class RenameSeriesRollbackTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.work_dir = tempfile.mkdtemp(prefix="certificat-rename-")
+        self.addCleanup(shutil.rmtree, self.work_dir, ignore_errors=True)
+        self.mapping = os.path.join(self.work_dir, "serii.csv")
+        with open(self.mapping, "w", encoding="utf-8") as f:
+            f.write("gestiune;aviz;vechi;nou\nG1;A1;OLD1;NEW1\nG1;A2;OLD2;NEW2\n")
+        self.journal = os.path.join(self.work_dir, "jurnal.jsonl")
+        self.legacy_name = default_storage.save("generated_docs/aviz_OLD1.pdf", ContentFile(b"%PDF-1 legacy"))
+        self.doc = self.make_document(aviz_number="A1", document_series="OLD1", pdf_file=self.legacy_name,
+                                      context_json=json.dumps({"seria": "OLD1", "aviz": "A1"}))
+        self.other = self.make_document(aviz_number="A2", document_series="OLD2")
+
+    def rename(self, **options):
+        call_command("rename_document_series", self.mapping, journal=self.journal, yes=True, stdout=StringIO(), **options)
+
+    def rollback(self):
+        call_command("rename_document_series", rollback=self.journal, yes=True, stdout=StringIO())
+
+    def test_rename_updates_series_context_and_file(self):
+        self.rename()
+
+        self.doc.refresh_from_db()
+        self.assertEqual(self.doc.document_series, "NEW1")
+        self.assertEqual(json.loads(self.doc.context_json)["seria"], "NEW1")
+        self.assertEqual(self.doc.pdf_file.name, "generated_docs/aviz_NEW1.pdf")
+        self.assertTrue(default_storage.exists("generated_docs/aviz_NEW1.pdf"))
+        self.assertFalse(default_storage.exists(self.legacy_name))
+
+    def test_rollback_restores_everything_and_is_idempotent(self):
+        self.rename(batch_size=1)
+
+        self.rollback()
+        self.rollback()
+
+        self.doc.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual((self.doc.document_series, self.other.document_series), ("OLD1", "OLD2"))
+        self.assertEqual(json.loads(self.doc.context_json)["seria"], "OLD1")
+        self.assertEqual(self.doc.pdf_file.name, self.legacy_name)
+        self.assertTrue(default_storage.exists(self.legacy_name))
+        self.assertFalse(default_storage.exists("generated_docs/aviz_NEW1.pdf"))
+
+    def test_rollback_skips_documents_changed_after_rename(self):
+        self.rename()
+        GeneratedDocument.objects.filter(pk=self.other.pk).update(document_series="MANUAL")
+
+        self.rollback()
+
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.document_series, "MANUAL")
+
+    def test_failed_batch_moves_files_back_and_rollback_is_safe(self):
+        with mock.patch.object(GeneratedDocument.objects, "bulk_update", side_effect=RuntimeError("DB căzută")):
+            with self.assertRaises(RuntimeError):
+                self.rename()
+
+        # Lotul a fost jurnalizat înainte de modificare, dar nu are intrare "commit"
+        with open(self.journal, encoding="utf-8") as f:
+            types = [json.loads(line)["type"] for line in f]
+        self.assertEqual(types, ["start", "doc", "doc"])
+        self.assertTrue(default_storage.exists(self.legacy_name))
+
+        self.rollback()
+
+        self.doc.refresh_from_db()
+        self.assertEqual((self.doc.document_series, self.doc.pdf_file.name), ("OLD1", self.legacy_name))
+        self.assertTrue(default_storage.exists(self.legacy_name))
+
+    def test_rollback_requires_yes(self):
+        self.rename()
+
+        with self.assertRaises(CommandError):
+            call_command("rename_document_series", rollback=self.journal, stdout=StringIO())
+
+
+class DocumentVisibilityTests(MediaTestCase):
+    """Preview-ul, PDF-ul unei părți și pachetul avizului folosesc aceeași regulă (can_view_document)."""
+
+    def setUp(self):
+        super().setUp()
+        self.gestiune = Gestiune.objects.create(nume="Depozit", locatie="Cluj")
+        tipologie = TipologieProdus.objects.create(nume="Cereale")
+        DocumentRange.objects.create(gestiune=self.gestiune, tipologie=tipologie,
+                                     numar_inceput="IL0001", numar_final="IL0099")
+        self.author = User.objects.create_user("autor")
+        self.parts = []
+        for series in ("IL0001", "IL0002"):
+            blob = blobstore.acquire(f"%PDF-1 {series}".encode())
+            self.parts.append(GeneratedDocument.objects.create(
+                aviz_number="77", document_series=series, generated_by=self.author, blob=blob, pdf_file=blob.file.name))
+        self.own = self.make_document(aviz_number="77", document_series="XX0001")
+        blobstore.attach_pdf(self.own, b"%PDF-1 propriu")
+        self.own.save()
+
+    def login_with(self, role=None, gestiune=None, **flags):
+        profile = UserProfile.objects.get(user=self.user)
+        if role:
+            profile.role, _ = Role.objects.get_or_create(name=role)
+        profile.gestiune = gestiune
+        for flag, value in flags.items():
+            setattr(profile, flag, value)
+        profile.save()
+        self.client.force_login(self.user)
+
+    def preview_ids(self):
+        response = self.client.get(reverse("document_preview", args=["77"]))
+        self.assertEqual(response.status_code, 200)
+        return {row["id"] for row in response.context["doc_data"]}
+
+    def bundle_part_count(self):
+        response = self.client.get(reverse("document_bundle", args=["77"]), {"format": "zip"})
+        self.assertEqual(response.status_code, 200)
+        with zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content))) as archive:
+            return len(archive.namelist())
+
+    def assert_preview_matches_downloads(self, expected_ids):
+        self.assertEqual(self.preview_ids(), expected_ids)
+        self.assertEqual(self.bundle_part_count(), len(expected_ids))
+        for doc in self.parts + [self.own]:
+            status = self.client.get(reverse("download_document_pdf", args=[doc.pk])).status_code
+            self.assertEqual(status, 200 if doc.pk in expected_ids else 404, doc.document_series)
+
+    def test_admin_without_see_all_previews_only_own_parts(self):
+        self.login_with(role="admin", vede_toate_documentele=False)
+
+        self.assert_preview_matches_downloads({self.own.pk})
+
+    def test_admin_with_see_all_previews_every_part(self):
+        self.login_with(role="admin", vede_toate_documentele=True)
+
+        self.assert_preview_matches_downloads({doc.pk for doc in self.parts + [self.own]})
+
+    def test_gestiune_user_previews_parts_of_own_gestiune(self):
+        self.login_with(gestiune=self.gestiune, ok_doc_generate=True)
+
+        self.assert_preview_matches_downloads({doc.pk for doc in self.parts + [self.own]})
+
+    def test_bundle_without_visible_parts_redirects(self):
+        other = User.objects.create_user("altul")
+        self.client.force_login(other)
+
+        response = self.client.get(reverse("document_bundle", args=["77"]), {"format": "zip"})
+
+        self.assertRedirects(response, reverse("generated_documents_list"), fetch_redirect_response=False)
+
+
+class DocumentExportTests(MediaTestCase):
+    """Exportul folosește vizibilitatea listei de documente (visible_documents) plus filtrele proprii."""
+
+    def setUp(self):
+        super().setUp()
+        self.gestiune = Gestiune.objects.create(nume="Depozit", locatie="Cluj")
+        tipologie = TipologieProdus.objects.create(nume="Cereale")
+        DocumentRange.objects.create(gestiune=self.gestiune, tipologie=tipologie,
+                                     numar_inceput="IL0001", numar_final="IL0099")
+        author = User.objects.create_user("autor")
+        GeneratedDocument.objects.create(aviz_number="1", document_series="IL0001", generated_by=author)
+        GeneratedDocument.objects.create(aviz_number="2", document_series="ZZ0001", generated_by=author)
+        GeneratedDocument.objects.create(aviz_number="3", document_series="IL0002", generated_by=author, is_deleted=True)
+        self.make_document(aviz_number="4", document_series="XX0001")
+
+    def login_with(self, role=None, gestiune=None, **flags):
+        profile = UserProfile.objects.get(user=self.user)
+        if role:
+            profile.role, _ = Role.objects.get_or_create(name=role)
+        profile.gestiune = gestiune
+        profile.ok_doc_generate = True
+        for flag, value in flags.items():
+            setattr(profile, flag, value)
+        profile.save()
+        self.client.force_login(self.user)
+
+    def exported_avize(self, **params):
+        response = self.client.get(reverse("export_generated_documents"), {"format": "csv", **params})
+        self.assertEqual(response.status_code, 200)
+        rows = b"".join(response.streaming_content).decode("utf-8-sig").splitlines()[1:]
+        return sorted(row.split(",")[1] for row in rows)
+
+    def list_avize(self, **params):
+        response = self.client.get(reverse("generated_documents_list"), {"include_deleted": "no", **params})
+        return sorted(doc.aviz_number for doc in response.context["page_obj"])
+
+    def test_gestiune_user_exports_documents_of_own_gestiune(self):
+        self.login_with(gestiune=self.gestiune)
+
+        self.assertEqual(self.exported_avize(), ["1"])
+        self.assertEqual(self.exported_avize(), self.list_avize())
+
+    def test_admin_without_see_all_exports_own_documents(self):
+        self.login_with(role="admin")
+
+        self.assertEqual(self.exported_avize(), ["4"])
+
+    def test_admin_view_as_user_exports_simulated_gestiune(self):
+        self.login_with(role="admin", vede_toate_documentele=True)
+        params = {"view_as_user": "yes", "sim_gestiune_id": str(self.gestiune.pk)}
+
+        self.assertEqual(self.exported_avize(), ["1", "2", "4"])
+        self.assertEqual(self.exported_avize(**params), ["1"])
+        self.assertEqual(self.exported_avize(**params), self.list_avize(**params))
@@ -7,6 +7,7 @@ urlpatterns = [
     path("", views.home, name="home"),
     path("raportare/", views.raportare, name="raportare"),
     path("administrare/", views.administrare, name="administrare"),
+    path("administrare/panou/<str:panel>/", views.admin_panel, name="admin_panel"),
     path("genereaza/", views.generate_docx_aviz, name="generate_docx"),
     path("documentranges/", views.my_document_ranges, name="documentrange_list"),
     path("gestiuni/", views.list_gestiuni, name="gestiuni_list"),
@@ -23,10 +24,16 @@ urlpatterns = [
     path("speciemapping/update/", views.update_speciemapping, name="update_speciemapping"),
     path("genereaza_aviz/", views.generate_docx_aviz, name="generate_docx_aviz"),
     path("documente-generated/", views.generated_documents_list, name="generated_documents_list"),
+    path("documente-generated/export/", views.export_generated_documents, name="export_generated_documents"),
     path("documente-generated/delete/<int:doc_id>/", views.delete_generated_document, name="delete_generated_document"),
     path("documente-generated/edit/<int:doc_id>/", views.edit_generated_document, name="edit_generated_document"),
     path("document-preview/<str:aviz>/", views.document_preview, name="document_preview"),
+    path("document-preview/<str:aviz>/pachet/", views.document_bundle, name="document_bundle"),
+    path("documente/<int:doc_id>/pdf/", views.download_document_pdf, name="download_document_pdf"),
     path('document-details/<str:aviz_number>/', views.document_details, name='document_details_api'),
+    path("api/documente/", views.api_documents, name="api_documents"),
+    path("api/documente/<int:doc_id>/", views.api_document_detail, name="api_document_detail"),
+    path("api/documente/<int:doc_id>/pozitii/", views.api_document_positions, name="api_document_positions"),
     path("manual/", views.view_manual, name="view_manual"),
     path("manual/download/", views.download_manual, name="download_manual"),
     path("manual/download/<int:manual_id>/", views.download_manual, name="download_manual_specific"),
@@ -36,10 +43,14 @@ urlpatterns = [
     path("manual/upload/", views.upload_manual_direct, name="upload_manual_direct"),
     path("manual/delete/<int:manual_id>/", views.delete_manual, name="delete_manual"),
     path('administrare/sterge-avize/', views.delete_all_documents, name='delete_all_documents'),
+    path('administrare/sterge-avize/job/<int:job_id>/', views.purge_job_status, name='purge_job_status'),
     path('change-password/', views.change_password, name='change_password'),
     path("documente-generated/update-data/<int:doc_id>/", views.update_document_data, name="update_document_data"),
     path("documente-generated/restore/<int:doc_id>/", views.restore_document, name="restore_document"),
     path('administrare/serie-data/details-ajax/<int:pk>/', views.serie_extra_data_details_ajax, name='serie_extra_data_details_ajax'),
+    path('administrare/jurnal-activitate/', views.activity_log_explorer, name='activity_log_explorer'),
+    path('administrare/instrumentare/', views.instrumentation_stats, name='instrumentation_stats'),
+    path('metrics', views.metrics_endpoint, name='metrics'),
     path("redirect-mfa/", views.redirect_to_mfa, name="redirect_to_mfa"),
     path("sso-login/", views.sso_login, name="sso_login"),
 ]
@@ -73,6 +73,10 @@ class StandardMessages:
     def document_reserved(request):
         messages.info(request, "Numerele au fost rezervate cu succes!")
 
+    @staticmethod
+    def document_unchanged(request):
+        messages.info(request, "Datele documentului nu s-au modificat. PDF-ul existent a fost păstrat (nicio regenerare necesară).")
+
     # Confirmation messages
     @staticmethod
     def confirm_delete(item_type):
@@ -87,8 +91,18 @@ class StandardMessages:
     def required_fields_message(fields):
         return f"Următoarele câmpuri sunt obligatorii: {', '.join(fields)}"
 
-def log_activity(user, action_type, details):
-        """Înregistrează o acțiune în jurnalul de activitate."""
+# Câmpurile structurate acceptate de log_activity ca argumente keyword
+LOG_ACTIVITY_FIELDS = ('aviz_number', 'document', 'series', 'gestiune', 'duration_ms', 'payload')
+
+
+def log_activity(user, action_type, details, **fields):
+        """
+        Înregistrează o acțiune în jurnalul de activitate.
+
+        Argumente keyword opționale (vezi LOG_ACTIVITY_FIELDS): aviz_number, document,
+        series, gestiune, duration_ms, payload. Dacă se transmite document, aviz_number
+        și series se completează din document când lipsesc.
+        """
         try:
             # Asigură-te că user este un obiect User sau None, nu AnonymousUser
             # Verificăm dacă user este autentificat și nu e anonim
@@ -98,10 +112,23 @@ def log_activity(user, action_type, details):
                 if isinstance(user, User):
                     user_instance = user
 
+            unknown = set(fields) - set(LOG_ACTIVITY_FIELDS)
+            if unknown:
+                print(f"WARN: log_activity - câmpuri necunoscute ignorate: {', '.join(sorted(unknown))}")
+            structured = {k: v for k, v in fields.items() if k in LOG_ACTIVITY_FIELDS and v is not None}
+
+            document = structured.get('document')
+            if document is not None:
+                structured.setdefault('aviz_number', document.aviz_number)
+                structured.setdefault('series', document.document_series)
+            if structured.get('duration_ms') is not None:
+                structured['duration_ms'] = max(0, int(structured['duration_ms']))
+
             ActivityLog.objects.create(
                 user=user_instance,
                 action_type=action_type,
-                details=details
+                details=details,
+                **structured
             )
             # Poți scoate print-ul după ce confirmi că funcționează
             # print(f"LOG: User={user_instance.username if user_instance else 'System/None'}, Action={action_type}, Details={details}")
@@ -110,4 +137,52 @@ def log_activity(user, action_type, details):
             # pentru a nu opri funcționalitatea principală
             print(f"!!! ERROR logging activity: {e}")
             import traceback
-            traceback.print_exc()  # Afișează mai multe detalii despre eroare în consolă
\ No newline at end of file
+            traceback.print_exc()  # Afișează mai multe detalii despre eroare în consolă
+
+def gestiune_series_prefixes(gestiune):
+    """Prefixele de serie ale plajelor unei gestiuni (obiect sau id; ex: 'IL' din 'IL000001')."""
+    from .models import DocumentRange
+    import re
+    pattern = re.compile(r'^(.*?)(\d+)$')
+    prefixes = []
+    for start_val in DocumentRange.objects.filter(gestiune=gestiune).values_list('numar_inceput', flat=True):
+        m = pattern.match(start_val or '')
+        if m and m.group(1) and m.group(1) not in prefixes:
+            prefixes.append(m.group(1))
+    return prefixes
+
+
+def document_visibility(user):
+    """
+    Regula de vizibilitate a documentelor (listă, preview, descărcare PDF, pachet aviz), ca
+    predicat doc -> bool. Permisiunile și prefixele gestiunii sunt citite o singură dată, deci
+    predicatul poate filtra toate părțile unui aviz fără interogări în plus per document.
+
+    Autorul vede mereu documentul; admin/superadmin doar pe ale lor, cu excepția flag-ului
+    vede_toate_documentele; utilizatorii cu ok_doc_generate văd documentele din gestiunea lor
+    (după prefixul seriei).
+    """
+    if not user or not user.is_authenticated:
+        return lambda doc: False
+    from .permissions import get_capabilities
+    caps = get_capabilities(user)
+    prefixes = None
+
+    def visible(doc):
+        nonlocal prefixes
+        if doc.generated_by_id == user.id:
+            return True
+        if caps.is_admin_or_super:
+            return caps.vede_toate_documentele
+        if not caps.ok_doc_generate or not caps.gestiune_id or not doc.document_series:
+            return False
+        if prefixes is None:
+            prefixes = gestiune_series_prefixes(caps.gestiune_id)
+        return any(doc.document_series.startswith(p) for p in prefixes)
+
+    return visible
+
+
+def can_view_document(user, doc):
+    """Poate utilizatorul vedea documentul (vezi document_visibility)."""
+    return document_visibility(user)(doc)
@@ -0,0 +1,44 @@
+"""
+View-urile aplicației, grupate pe funcționalități:
+
+- documents: pagina principală, raportare, lista/detaliile/ștergerea/restaurarea documentelor
+- api: API JSON (doar citire) pentru documente, cu cursor și ETag
+- generation: generare, regenerare, previzualizare și actualizare din feed-ul de avize
+- ranges: plaje de numere (DocumentRange) și alocarea următorului număr
+- admin: utilizatori, roluri, gestiuni, tipologii, mapări specii, jurnal, metrici
+- series_data: SerieExtraData (Superadmin)
+- manual: manualul utilizatorului
+- sso: logout, schimbare parolă, SSO ddcf-mfa
+
+Dependențele grele ale generării (requests, docxtpl) sunt importate leneș în
+services.generation. Numele sunt reexportate aici, deci `views.<nume>` din
+urls.py și importurile existente rămân valabile.
+"""
+from .documents import (
+    FAMOUS_QUOTES, home, raportare, download_document_pdf, delete_generated_document, generated_documents_list,
+    document_details, delete_all_documents, purge_job_status, export_generated_documents, restore_document
+)
+from .api import api_documents, api_document_detail, api_document_positions
+from .generation import (
+    edit_extra_data, generate_docx, generate_docx_aviz, edit_generated_document, document_preview,
+    document_bundle, update_document_data
+)
+from .ranges import (
+    get_next_document_number, get_next_document_number_for_range, my_document_ranges,
+    delete_document_range, edit_document_range
+)
+from .admin import (
+    administrare, admin_panel, edit_user_profile, delete_user, edit_role, list_gestiuni, delete_gestiune,
+    edit_gestiune, list_tipologii, delete_tipologie, edit_speciemapping, update_speciemapping,
+    activity_log_explorer, instrumentation_stats, metrics_endpoint
+)
+from .series_data import (
+    serie_extra_data_details_ajax, list_serie_extra_data, delete_serie_extra_data,
+    bulk_delete_serie_data
+)
+from .manual import (
+    view_manual, download_manual, upload_manual_direct, delete_manual
+)
+from .sso import (
+    logout_view, change_password, redirect_to_mfa, sso_login
+)
@@ -0,0 +1,662 @@
+"""
+Administrare: utilizatori, roluri, gestiuni, tipologii, mapări specii, jurnal activitate și metrici.
+"""
+import hmac
+import os
+import traceback
+from datetime import datetime, timedelta
+
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
+from django.http import HttpResponse, JsonResponse, Http404
+from django.shortcuts import render, get_object_or_404, redirect
+from django.views.decorators.http import require_POST
+from django.conf import settings
+from django.contrib import messages
+from django.db import transaction
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+
+from ..models import (
+    UserProfile, DocumentRange, Role, ActivityLog, UserManual, SpecieMapping, Gestiune,
+    TipologieProdus
+)
+from ..forms import (
+    UserForm, RoleForm, GestiuneForm, TipologieProdusForm, DocumentRangeForm, UserProfileForm,
+    SpecieMappingForm, SpecieMappingManualForm, UserManualForm
+)
+from ..utils import StandardMessages, log_activity
+from ..services import species as species_import
+from ..services.generation import FeedError
+from .. import fragments, instrumentation, metrics
+
+
+# --- User Management (administrare) ---
+@login_required(login_url='/login/')
+def administrare(request):
+    # Verifică permisiunea ok_administrare
+    if not request.caps.ok_administrare:
+        StandardMessages.access_denied(request)
+        log_activity(request.user, "ADMINISTRARE_DENIED", "Încercare acces administrare fără permisiune ok_administrare.")
+        return redirect('home')
+    
+    is_superadmin = request.caps.is_superadmin
+    log_activity(request.user, "ACCESS_ADMIN_PAGE", f"A accesat pagina de administrare (Superadmin: {is_superadmin}).")
+
+    # Inițializare Formulare
+    form_prefixes = {
+        'user': UserForm, 'role': RoleForm, 'gestiune': GestiuneForm,
+        'tipologie': TipologieProdusForm, 'speciemapping': SpecieMappingManualForm,
+        'usermanual': UserManualForm, 'documentrange': DocumentRangeForm
+    }
+    forms = {prefix: None for prefix in form_prefixes}
+
+    # Preluare Liste (QuerySet-uri leneșe: se evaluează doar dacă panoul nu e în cache, vezi fragments.py)
+    users = User.objects.select_related('userprofile__gestiune', 'userprofile__role').order_by('username')
+    roles = Role.objects.all().order_by('name')
+    gestiuni = Gestiune.objects.all().order_by('nume')
+    tipologii = TipologieProdus.objects.all().order_by('nume')
+    manual_list = UserManual.objects.all().order_by('-upload_date')[:5]
+    # Maparea speciilor și jurnalul de activitate se încarcă prin AJAX (admin_panel)
+
+    # --- MODIFICARE PENTRU PLAJE NUMERE ---
+    document_ranges_qs = DocumentRange.objects.none()
+    if is_superadmin:
+        document_ranges_qs = DocumentRange.objects.select_related('gestiune', 'tipologie').order_by('gestiune__nume',
+                                                                                                    'tipologie__nume')
+    elif request.caps.gestiune_id:
+        # Utilizatorii non-superadmin cu gestiune asignată văd doar plajele lor
+        document_ranges_qs = DocumentRange.objects.select_related('gestiune', 'tipologie').filter(
+            gestiune_id=request.caps.gestiune_id).order_by('tipologie__nume')
+    # else: document_ranges_qs rămâne DocumentRange.objects.none() (pt non-superadmin fără gestiune)
+
+    def document_ranges_for_template():
+        # Următorul număr al fiecărei plaje este precalculat la save (DocumentRange.next_preview)
+        return [{
+            'id': r.id,
+            'gestiune': r.gestiune,  # Trimitem obiectul pentru a accesa .nume în template
+            'tipologie': r.tipologie,  # Trimitem obiectul pentru a accesa .nume în template
+            'numar_inceput': r.numar_inceput,
+            'numar_final': r.numar_final,
+            'numar_curent': r.numar_curent,
+            'urmatorul_numar': r.next_preview,
+            'remaining': r.remaining,
+            'obj': r  # Obiectul original, util pentru link-uri de editare/ștergere care folosesc pk
+        } for r in document_ranges_qs]
+    # Lista pentru template-ul de administrare (construită doar la randare, dacă panoul nu e în cache)
+    document_ranges_list_for_template = SimpleLazyObject(document_ranges_for_template)
+    # --- SFÂRȘIT MODIFICARE PLAJE NUMERE ---
+
+    submitted_form_prefix = None
+    if request.method == 'POST':
+        print(f"DEBUG ADMIN POST: Data: {request.POST}, Files: {request.FILES}")
+        for prefix in form_prefixes.keys():
+            if f'submit_{prefix}' in request.POST:
+                submitted_form_prefix = prefix
+                break
+        print(f"DEBUG ADMIN POST: Submitted form prefix: {submitted_form_prefix}")
+
+        if submitted_form_prefix:
+            restricted_prefixes = ['user', 'role', 'gestiune', 'tipologie', 'speciemapping', 'usermanual']
+            if submitted_form_prefix in restricted_prefixes and not is_superadmin:
+                log_activity(request.user, "ADMIN_ACTION_DENIED",
+                             f"Încercare acțiune '{submitted_form_prefix}' nepermisă (non-superadmin).")
+                StandardMessages.access_denied(request)
+                return redirect('administrare')
+
+            FormClass = form_prefixes[submitted_form_prefix]
+            form_kwargs = {'prefix': submitted_form_prefix}
+            if submitted_form_prefix == 'documentrange':
+                form_kwargs['user'] = request.user
+            if submitted_form_prefix == 'usermanual':
+                forms[submitted_form_prefix] = FormClass(request.POST, request.FILES, **form_kwargs)
+            else:
+                forms[submitted_form_prefix] = FormClass(request.POST, **form_kwargs)
+
+            form_instance = forms[submitted_form_prefix]
+
+            if form_instance.is_valid():
+                try:
+                    if submitted_form_prefix == 'user':
+                        user = form_instance.save(commit=False)
+                        user.set_password(form_instance.cleaned_data['password'])
+                        user.save()
+                        role = form_instance.cleaned_data.get('role')
+                        gestiune_user = form_instance.cleaned_data.get('gestiune')
+                        UserProfile.objects.update_or_create(user=user,
+                                                             defaults={'role': role, 'gestiune': gestiune_user})
+                        log_activity(request.user, "USER_CREATE",
+                                     f"Utilizator '{user.username}' creat (Rol: {role}, Gestiune: {gestiune_user}).")
+                        StandardMessages.item_created(request, "Utilizatorul")
+                        # Important: Nu facem redirect aici pentru user, ca să nu se piardă mesajele de eroare/succes dacă sunt
+                        # sau dacă utilizatorul vrea să adauge alt user imediat.
+                        # Consideră un redirect la sfârșitul if form_instance.is_valid() dacă e preferat
+
+                    elif submitted_form_prefix == 'documentrange':
+                        gestiune_selectata = form_instance.cleaned_data.get('gestiune')
+                        if not is_superadmin and request.caps.gestiune_id and getattr(gestiune_selectata, 'pk', None) != request.caps.gestiune_id:
+                            messages.error(request, "Eroare: Nu puteți selecta o altă gestiune.")
+                            log_activity(request.user, "RANGE_CREATE_FAIL",
+                                         f"Creare plajă eșuată. Motiv: Gestiune invalidă ({gestiune_selectata}).")
+                        else:
+                            instance = form_instance.save()
+                            log_activity(request.user, "RANGE_CREATE",
+                                         f"Plajă numere creată (ID: {instance.pk}, Gest: {instance.gestiune}, Tip: {instance.tipologie}).")
+                            StandardMessages.item_created(request, "Plaja de numere")
+                            return redirect('administrare')  # Redirect pentru a reîmprospăta lista
+
+                    elif submitted_form_prefix == 'usermanual':
+                        manual = form_instance.save()
+                        log_activity(request.user, "MANUAL_UPLOAD",
+                                     f"Manual '{manual.title}' (v{manual.version}) încărcat.")
+                        StandardMessages.item_created(request, "Manualul de utilizare")
+                        return redirect('administrare')
+
+                    else:
+                        instance = form_instance.save()
+                        item_name = submitted_form_prefix.capitalize()
+                        log_activity(request.user, f"{item_name.upper()}_CREATE",
+                                     f"{item_name} '{str(instance)}' creat.")  # Folosim str(instance)
+                        StandardMessages.item_created(request, item_name)
+                        return redirect('administrare')
+
+                    # După o salvare cu succes (dacă nu s-a făcut redirect), re-inițializăm formularul gol
+                    if submitted_form_prefix == 'user':  # Sau alte formulare care nu redirectează imediat
+                        form_kwargs_reinit = {'prefix': submitted_form_prefix}
+                        if submitted_form_prefix == 'documentrange': form_kwargs_reinit['user'] = request.user
+                        forms[submitted_form_prefix] = form_prefixes[submitted_form_prefix](**form_kwargs_reinit)
+
+
+                except Exception as e_save:
+                    error_msg = f"Eroare la salvarea '{submitted_form_prefix}': {e_save}"
+                    print(f"ERROR ADMIN SAVE ({submitted_form_prefix}): {error_msg}\n{traceback.format_exc()}")
+                    messages.error(request,
+                                   f"A apărut o eroare la salvare: {e_save}. Verificați datele (posibil duplicate?).")
+                    log_activity(request.user, f"{submitted_form_prefix.upper()}_CREATE_FAIL",
+                                 f"Salvare {submitted_form_prefix} eșuată. Eroare: {e_save}")
+            else:
+                StandardMessages.operation_failed(request, f"crearea/modificarea '{submitted_form_prefix}'",
+                                                  "Verifică datele introduse.")
+                log_activity(request.user, f"{submitted_form_prefix.upper()}_FORM_INVALID",
+                             f"Formular {submitted_form_prefix} invalid. Erori: {form_instance.errors.as_json()}")
+                for field, errors in form_instance.errors.items():
+                    for error in errors:
+                        messages.error(request,
+                                       f"Eroare câmp '{form_instance.fields[field].label if field in form_instance.fields else field}': {error}")
+
+    for prefix, FormClass in form_prefixes.items():
+        if forms[prefix] is None:
+            form_kwargs = {'prefix': prefix}
+            if prefix == 'documentrange':
+                form_kwargs['user'] = request.user
+                initial_data = {}
+                if not is_superadmin and request.caps.gestiune_id:
+                    initial_data['gestiune'] = request.caps.gestiune_id
+                    form_kwargs['initial'] = initial_data
+            forms[prefix] = FormClass(**form_kwargs)
+
+    context = {
+        'users': users, 'roles': roles,
+        'gestiuni': gestiuni, 'tipologii': tipologii,
+        'document_ranges': document_ranges_list_for_template,  # Folosim lista procesată
+        'manual_list': manual_list,
+        'is_superadmin': is_superadmin,
+        'fragment_versions': fragments.versions(), 'fragment_ttl': fragments.cache_ttl(),
+    }
+    context.update({f'{prefix}_form': forms[prefix] for prefix in form_prefixes})
+
+    return render(request, 'certificat/administrare.html', context)
+
+
+# Panouri încărcate prin AJAX în pagina de administrare: panou -> șablon parțial
+ADMIN_LAZY_PANELS = {
+    'speciemapping': 'certificat/partial_admin_speciemapping.html',
+    'activitylog': 'certificat/partial_admin_activitylog.html',
+}
+
+
+@login_required(login_url='/login/')
+def admin_panel(request, panel):
+    """ Conținutul unui panou greu din administrare (HTML parțial, cu fragment cache). Doar Superadmin. """
+    if panel not in ADMIN_LAZY_PANELS:
+        raise Http404("Panou necunoscut")
+    if not request.caps.is_superadmin:
+        log_activity(request.user, "ADMIN_PANEL_DENIED", f"Acces neautorizat la panoul de administrare '{panel}'.")
+        return HttpResponse(status=403)
+
+    context = {'fragment_ttl': fragments.cache_ttl()}
+    if panel == 'speciemapping':
+        context['speciemapping_list'] = SpecieMapping.objects.select_related('tipologie').order_by('specie')
+        context['fragment_version'] = fragments.versions()['speciemapping']
+    else:
+        context['activity_logs'] = ActivityLog.objects.select_related('user').order_by('-timestamp')[:100]
+        context['fragment_version'] = fragments.latest_activity_id()
+    return render(request, ADMIN_LAZY_PANELS[panel], context)
+
+
+# --- edit_user_profile (rămâne la fel) ---
+@login_required(login_url='/login/')
+def edit_user_profile(request, user_id):
+    target_user = get_object_or_404(User, id=user_id)
+    # Asigurăm-ne că obținem sau creăm profilul dacă lipsește
+    user_profile, created = UserProfile.objects.get_or_create(user=target_user)
+
+    # Adăugăm relațiile pentru a avea acces direct la nume și alte detalii
+    user_profile = UserProfile.objects.select_related('user', 'role', 'gestiune').get(user=target_user)
+
+    # Doar superadmin poate edita
+    if not request.caps.is_superadmin:
+        log_activity(request.user, "EDIT_PROFILE_DENIED",
+                     f"Încercare acces editare profil pt '{target_user.username}' (neautorizat).")
+        StandardMessages.access_denied(request)
+        return redirect('administrare')
+
+    if request.method == "POST":
+        form = UserProfileForm(request.POST, instance=user_profile)
+        if form.is_valid():
+            form.save()
+            log_activity(request.user, "PROFILE_EDIT",
+                         f"Profilul utilizatorului '{target_user.username}' a fost actualizat.")
+            StandardMessages.item_updated(request, f"Profilul utilizatorului {target_user.username}")
+            return redirect('administrare')
+        else:
+            StandardMessages.operation_failed(request, "actualizarea profilului", "Verifică datele introduse")
+            log_activity(request.user, "PROFILE_EDIT_FAIL",
+                         f"Actualizare profil eșuată pt '{target_user.username}'. Erori: {form.errors.as_json()}")
+    else:
+        form = UserProfileForm(instance=user_profile)
+        log_activity(request.user, "ACCESS_PROFILE_EDIT_FORM",
+                     f"Accesat formular editare profil pt '{target_user.username}'.")
+
+    # Adăugăm print-uri pentru debugging
+    print(f"DEBUG - target_user: {target_user.username}, email: {target_user.email}")
+    print(f"DEBUG - user_profile.role: {user_profile.role}, user_profile.gestiune: {user_profile.gestiune}")
+
+    return render(request, 'certificat/edit_user_profile.html', {
+        'form': form,
+        'user_profile': user_profile,
+        'target_user': target_user
+    })
+
+
+# --- delete_user (rămâne la fel) ---
+@login_required(login_url='/login/')
+def delete_user(request, user_id):
+    # Doar superadmin poate șterge
+    if not request.caps.is_superadmin:
+        log_activity(request.user, "DELETE_USER_DENIED", f"Încercare ștergere utilizator ID: {user_id} (neautorizat).")
+        StandardMessages.access_denied(request); return redirect('administrare')
+    # Nu permite ștergerea propriului cont
+    if request.user.id == user_id:
+        messages.error(request, "Nu vă puteți șterge propriul cont.")
+        log_activity(request.user, "DELETE_USER_FAIL_SELF", "Încercare eșuată ștergere propriu cont.")
+        return redirect('administrare')
+
+    try:
+        user_to_delete = get_object_or_404(User, id=user_id)
+        # Verificare suplimentară - nu șterge alți superadmini? (Opțional)
+        # if hasattr(user_to_delete, 'userprofile') and user_to_delete.userprofile.role.name.lower() == 'superadmin':
+        #     messages.error(request, "Nu puteți șterge alt utilizator Superadmin.")
+        #     log_activity(request.user, "DELETE_USER_FAIL_SUPERADMIN", f"Încercare eșuată ștergere superadmin '{user_to_delete.username}'.")
+        #     return redirect('administrare')
+
+        username = user_to_delete.username
+        user_to_delete.delete() # Ștergerea userului șterge și profilul (cascade)
+        log_activity(request.user, "USER_DELETE", f"Utilizatorul '{username}' (ID: {user_id}) a fost șters.")
+        StandardMessages.item_deleted(request, f"Utilizatorul {username}")
+    except Http404:
+         StandardMessages.item_not_found(request, "Utilizatorul")
+         log_activity(request.user, "DELETE_USER_FAIL_NOT_FOUND", f"Încercare ștergere utilizator ID: {user_id} (negăsit).")
+    except Exception as e: # Prinde alte erori (ex: protecție ForeignKey)
+        StandardMessages.operation_failed(request, "ștergerea utilizatorului", str(e))
+        log_activity(request.user, "DELETE_USER_FAIL_ERROR", f"Ștergere utilizator ID: {user_id} eșuată. Eroare: {e}")
+    return redirect('administrare')
+
+
+# --- edit_role ---
+@login_required(login_url='/login/')
+def edit_role(request, role_id):
+    """View pentru editarea rolurilor și sincronizarea permisiunilor cu utilizatorii."""
+    role = get_object_or_404(Role, id=role_id)
+    # Doar superadmin poate edita roluri
+    if not request.caps.is_superadmin:
+        StandardMessages.access_denied(request)
+        log_activity(request.user, "EDIT_ROLE_DENIED", f"Încercare acces editare rol '{role.name}' (neautorizat).")
+        return redirect('administrare')
+    
+    if request.method == "POST":
+        form = RoleForm(request.POST, instance=role)
+        if form.is_valid():
+            # Salvează rolul; semnalul post_save copiază permisiunile în profilurile
+            # cu acest rol (un singur UPDATE, vezi permissions.propagate_role)
+            with transaction.atomic():
+                updated_role = form.save()
+            updated_count = UserProfile.objects.filter(role=updated_role).count()
+
+            log_activity(
+                request.user, 
+                "ROLE_UPDATED", 
+                f"Rolul '{role.name}' actualizat. Permisiuni sincronizate cu {updated_count} utilizatori."
+            )
+            StandardMessages.operation_success(
+                request, 
+                f"Rolul '{role.name}' a fost actualizat și permisiunile au fost sincronizate cu {updated_count} utilizatori."
+            )
+            return redirect('administrare')
+        else:
+            StandardMessages.operation_failed(request, "actualizarea rolului", "Verifică datele introduse")
+            log_activity(
+                request.user, 
+                "ROLE_UPDATE_FAIL", 
+                f"Actualizare rol '{role.name}' eșuată. Erori: {form.errors.as_json()}"
+            )
+    else:
+        form = RoleForm(instance=role)
+        log_activity(request.user, "ACCESS_EDIT_ROLE", f"Accesat formular editare rol '{role.name}'.")
+    
+    # Numără câți utilizatori au acest rol
+    users_count = UserProfile.objects.filter(role=role).count()
+    
+    return render(request, 'certificat/edit_role.html', {
+        'form': form,
+        'role': role,
+        'users_count': users_count
+    })
+
+
+# --- Gestiune operations (Doar Superadmin) ---
+@login_required(login_url='/login/')
+def list_gestiuni(request):
+    # Verifică permisiunea ok_gestiuni
+    if not request.caps.ok_gestiuni:
+        StandardMessages.access_denied(request)
+        log_activity(request.user, "ACCESS_GESTIUNI_DENIED", "Acces neautorizat la lista gestiuni (lipsă permisiune ok_gestiuni).")
+        return redirect('administrare')
+    
+    gestiuni = Gestiune.objects.all().order_by('nume')
+    log_activity(request.user, "ACCESS_GESTIUNI_LIST", "A accesat lista gestiuni.")
+    return render(request, 'certificat/gestiuni_list.html', {'gestiuni': gestiuni})
+
+
+@require_POST
+@login_required(login_url='/login/')
+def delete_gestiune(request, pk):
+    # Verifică permisiunea ok_gestiuni
+    if not request.caps.ok_gestiuni:
+        StandardMessages.access_denied(request)
+        log_activity(request.user, "DELETE_GESTIUNE_DENIED", f"Încercare ștergere gestiune ID: {pk} (lipsă permisiune ok_gestiuni).")
+        return redirect('gestiuni_list')
+    try:
+        gestiune = get_object_or_404(Gestiune, pk=pk)
+        nume_gestiune = gestiune.nume
+        # Verifică dacă gestiunea e folosită înainte de a șterge (opțional, dar recomandat)
+        if UserProfile.objects.filter(gestiune=gestiune).exists() or DocumentRange.objects.filter(gestiune=gestiune).exists():
+             messages.error(request, f"Gestiunea '{nume_gestiune}' nu poate fi ștearsă deoarece este utilizată de profiluri sau plaje de numere.")
+             log_activity(request.user, "DELETE_GESTIUNE_FAIL_USED", f"Ștergere gestiune '{nume_gestiune}' (ID: {pk}) eșuată (în uz).")
+             return redirect('gestiuni_list')
+
+        gestiune.delete()
+        log_activity(request.user, "GESTIUNE_DELETE", f"Gestiunea '{nume_gestiune}' (ID: {pk}) a fost ștearsă.")
+        StandardMessages.item_deleted(request, "Gestiunea")
+    except Http404:
+         StandardMessages.item_not_found(request, "Gestiunea")
+         log_activity(request.user, "DELETE_GESTIUNE_FAIL_NOT_FOUND", f"Încercare ștergere gestiune ID: {pk} (negăsit).")
+    except Exception as e:
+        StandardMessages.operation_failed(request, "ștergerea gestiunii", str(e))
+        log_activity(request.user, "DELETE_GESTIUNE_FAIL_ERROR", f"Ștergere gestiune ID: {pk} eșuată. Eroare: {e}")
+    return redirect('gestiuni_list')
+
+
+@login_required(login_url='/login/')
+def edit_gestiune(request, pk):
+    # Verifică permisiunea ok_gestiuni
+    if not request.caps.ok_gestiuni:
+        StandardMessages.access_denied(request)
+        log_activity(request.user, "EDIT_GESTIUNE_DENIED", f"Încercare acces editare gestiune ID: {pk} (lipsă permisiune ok_gestiuni).")
+        return redirect('gestiuni_list')
+    gestiune = get_object_or_404(Gestiune, pk=pk)
+    if request.method == "POST":
+        form = GestiuneForm(request.POST, instance=gestiune)
+        if form.is_valid():
+            form.save()
+            log_activity(request.user, "GESTIUNE_EDIT", f"Gestiunea '{gestiune.nume}' (ID: {pk}) a fost actualizată.")
+            StandardMessages.item_updated(request, "Gestiunea"); return redirect('gestiuni_list')
+        else:
+             StandardMessages.operation_failed(request, "actualizarea gestiunii", "Verifică datele introduse")
+             log_activity(request.user, "EDIT_GESTIUNE_FAIL_INVALID", f"Editare gestiune ID: {pk} eșuată. Erori: {form.errors.as_json()}")
+    else:
+         form = GestiuneForm(instance=gestiune)
+         log_activity(request.user, "ACCESS_EDIT_GESTIUNE_FORM", f"Accesat form editare gestiune ID: {pk}.")
+    return render(request, 'certificat/edit_gestiune.html', {'form': form, 'gestiune': gestiune})
+
+
+# --- Tipologie operations (Doar Superadmin) ---
+@login_required(login_url='/login/')
+def list_tipologii(request):
+    # Verifică permisiunea ok_tipologii
+    if not request.caps.ok_tipologii:
+        StandardMessages.access_denied(request)
+        log_activity(request.user, "ACCESS_TIPOLOGII_DENIED", "Acces neautorizat la lista tipologii (lipsă permisiune ok_tipologii).")
+        return redirect('administrare')
+    
+    tipologii = TipologieProdus.objects.all().order_by('nume')
+    log_activity(request.user, "ACCESS_TIPOLOGII_LIST", "A accesat lista tipologii.")
+    context = {'tipologii': tipologii}
+    return render(request, 'certificat/tipologii_list.html', context)
+
+
+@require_POST
+@login_required(login_url='/login/')
+def delete_tipologie(request, pk):
+    # Verifică permisiunea ok_tipologii
+    if not request.caps.ok_tipologii:
+        StandardMessages.access_denied(request)
+        log_activity(request.user, "DELETE_TIPOLOGIE_DENIED", f"Încercare ștergere tipologie ID: {pk} (lipsă permisiune ok_tipologii).")
+        return redirect('tipologii_list')
+    try:
+        tipologie = get_object_or_404(TipologieProdus, pk=pk)
+        nume_tipologie = tipologie.nume
+        # Verificare utilizare (opțional)
+        if SpecieMapping.objects.filter(tipologie=tipologie).exists() or DocumentRange.objects.filter(tipologie=tipologie).exists():
+             messages.error(request, f"Tipologia '{nume_tipologie}' nu poate fi ștearsă deoarece este utilizată în mapări de specii sau plaje de numere.")
+             log_activity(request.user, "DELETE_TIPOLOGIE_FAIL_USED", f"Ștergere tipologie '{nume_tipologie}' (ID: {pk}) eșuată (în uz).")
+             return redirect('tipologii_list')
+
+        tipologie.delete()
+        log_activity(request.user, "TIPOLOGIE_DELETE", f"Tipologia '{nume_tipologie}' (ID: {pk}) a fost ștearsă.")
+        StandardMessages.item_deleted(request, "Tipologia")
+    except Http404:
+        StandardMessages.item_not_found(request, "Tipologia")
+        log_activity(request.user, "DELETE_TIPOLOGIE_FAIL_NOT_FOUND", f"Încercare ștergere tipologie ID: {pk} (negăsit).")
+    except Exception as e:
+        StandardMessages.operation_failed(request, "ștergerea tipologiei", str(e))
+        log_activity(request.user, "DELETE_TIPOLOGIE_FAIL_ERROR", f"Ștergere tipologie ID: {pk} eșuată. Eroare: {e}")
+    return redirect('tipologii_list')
+
+
+# --- Mapping operations (Editare, Update automat) ---
+@login_required(login_url='/login/')
+def edit_speciemapping(request, pk):
+    if not request.caps.is_superadmin:
+         log_activity(request.user, "EDIT_SPECIEMAP_DENIED", f"Încercare acces editare mapare ID: {pk} (neautorizat).")
+         StandardMessages.access_denied(request); return redirect('administrare') # Redirect la admin general
+    mapping = get_object_or_404(SpecieMapping, pk=pk)
+    if request.method == 'POST':
+        # Folosim forma simplă SpecieMappingForm aici, nu cea manuală
+        form = SpecieMappingForm(request.POST, instance=mapping)
+        if form.is_valid():
+            updated_mapping = form.save()
+            log_activity(request.user, "SPECIEMAP_EDIT", f"Mapare specie '{updated_mapping.specie}' (ID: {pk}) actualizată -> '{updated_mapping.tipologie}'.")
+            StandardMessages.item_updated(request, "Mapping-ul pentru specie")
+            return redirect('administrare') # Redirect la admin general unde e lista
+        else:
+             StandardMessages.operation_failed(request, "actualizarea mapping-ului", "Verifică datele introduse")
+             log_activity(request.user, "EDIT_SPECIEMAP_FAIL_INVALID", f"Editare mapare ID: {pk} eșuată. Erori: {form.errors.as_json()}")
+    else:
+         form = SpecieMappingForm(instance=mapping)
+         log_activity(request.user, "ACCESS_EDIT_SPECIEMAP_FORM", f"Accesat formular editare mapare ID: {pk}.")
+    # Probabil nu avem un template dedicat 'edit_speciemapping.html'?
+    # Poate fi integrat în pagina 'administrare' sau necesita un template separat.
+    # Să presupunem că există un template:
+    return render(request, 'certificat/edit_speciemapping.html', {'form': form, 'mapping': mapping})
+
+
+@login_required(login_url='/login/')
+def update_speciemapping(request):
+    """
+    Import specii noi din feed: lista speciilor nemapate, cu tipologia sugerată (services.species).
+    Feed-ul este citit din cache (?refresh=1 îl descarcă din nou); la POST nu se mai descarcă,
+    iar mapările alese se salvează cu un singur bulk_create.
+    """
+    if not request.caps.is_superadmin:
+         log_activity(request.user, "UPDATE_SPECIEMAP_DENIED", "Acces neautorizat la update mapare specii.")
+         StandardMessages.access_denied(request); return redirect('administrare')
+
+    tipologii = list(TipologieProdus.objects.order_by('nume'))
+
+    if request.method == "POST":
+        valid_ids = {tip.pk for tip in tipologii}
+        pairs, invalid = [], []
+        for specie, tip_value in zip(request.POST.getlist('specie'), request.POST.getlist('tipologie')):
+            if not tip_value:
+                continue  # Specie lăsată nemapată deocamdată
+            try:
+                tip_id = int(tip_value)
+            except ValueError:
+                tip_id = None
+            if tip_id not in valid_ids:
+                invalid.append(specie)
+                continue
+            pairs.append((specie, tip_id))
+
+        if invalid:
+            StandardMessages.operation_failed(request, "maparea speciilor", f"Tipologie invalidă pentru: {', '.join(invalid)}")
+            log_activity(request.user, "UPDATE_SPECIEMAP_FAIL_INVALID", f"Import mapări invalid. Specii cu tipologie invalidă: {invalid}")
+            return redirect('update_speciemapping')
+        try:
+            created = species_import.import_mappings(pairs)
+        except Exception as e_save:
+            StandardMessages.operation_failed(request, "salvarea mapărilor", str(e_save))
+            log_activity(request.user, "UPDATE_SPECIEMAP_FAIL_SAVE", f"Salvare mapări noi eșuată. Eroare: {e_save}")
+            return redirect('update_speciemapping')
+        log_activity(request.user, "SPECIEMAP_UPDATE_SUCCESS", f"Import specii noi finalizat. {len(created)} mapări adăugate.",
+                     payload={"species": created})
+        StandardMessages.operation_success(request, f"{len(created)} specii noi au fost mapate cu succes!")
+        return redirect("administrare")
+
+    try:
+        species = species_import.feed_species(refresh=request.GET.get('refresh') == '1')
+        suggestions = species_import.suggest_mappings(species)
+    except FeedError as e_req:
+         StandardMessages.operation_failed(request, "preluarea datelor JSON", f"Eroare de rețea: {str(e_req)}")
+         log_activity(request.user, "UPDATE_SPECIEMAP_FAIL_JSON", f"Update mapare eșuat. Eroare JSON API: {e_req}")
+         return redirect('administrare')
+    except Exception as e: # Alte erori (JSONDecode, etc.)
+        StandardMessages.operation_failed(request, "procesarea datelor", str(e))
+        log_activity(request.user, "UPDATE_SPECIEMAP_FAIL_PROCESS", f"Update mapare eșuat. Eroare procesare: {e}")
+        return redirect('administrare')
+
+    if not suggestions:
+        StandardMessages.info_message(request, "Nu există specii noi de mapat din sursa de date.")
+        log_activity(request.user, "UPDATE_SPECIEMAP_NO_NEW", "Update mapare: Nicio specie nouă găsită.")
+        return redirect('administrare')
+
+    log_activity(request.user, "ACCESS_UPDATE_SPECIEMAP_FORM", f"Accesat formular update mapare. Specii noi: {len(suggestions)}")
+    return render(request, "certificat/update_speciemapping.html", {"suggestions": suggestions, "tipologii": tipologii})
+
+
+# --- Jurnal Activitate - Explorator (Superadmin) ---
+@login_required(login_url='/login/')
+def activity_log_explorer(request):
+    """ Căutare în jurnalul de activitate după câmpurile structurate (aviz, serie, gestiune etc.). Doar Superadmin. """
+    if not request.caps.is_superadmin:
+        log_activity(request.user, "ACCESS_ACTIVITY_LOG_DENIED", "Acces neautorizat la exploratorul jurnalului de activitate.")
+        StandardMessages.access_denied(request)
+        return redirect('administrare')
+
+    filters = {
+        'action_type': request.GET.get('action_type', '').strip(),
+        'aviz_number': request.GET.get('aviz_number', '').strip(),
+        'series': request.GET.get('series', '').strip(),
+        'username': request.GET.get('username', '').strip(),
+        'gestiune': request.GET.get('gestiune', '').strip(),
+        'document': request.GET.get('document', '').strip(),
+        'date_from': request.GET.get('date_from', '').strip(),
+        'date_to': request.GET.get('date_to', '').strip(),
+        'min_duration': request.GET.get('min_duration', '').strip(),
+    }
+
+    # Filtrele folosesc coloanele indexate (egalitate), nu icontains pe details
+    queryset = ActivityLog.objects.select_related('user', 'gestiune', 'document').order_by('-timestamp')
+    if filters['action_type']:
+        queryset = queryset.filter(action_type=filters['action_type'])
+    if filters['aviz_number']:
+        queryset = queryset.filter(aviz_number=filters['aviz_number'])
+    if filters['series']:
+        queryset = queryset.filter(series=filters['series'])
+    if filters['username']:
+        queryset = queryset.filter(user__username=filters['username'])
+    if filters['gestiune'].isdigit():
+        queryset = queryset.filter(gestiune_id=int(filters['gestiune']))
+    if filters['document'].isdigit():
+        queryset = queryset.filter(document_id=int(filters['document']))
+    if filters['min_duration'].isdigit():
+        queryset = queryset.filter(duration_ms__gte=int(filters['min_duration']))
+    # Intervale pe coloana timestamp (început de zi, în fusul orar curent), nu __date: conversia
+    # coloanei la dată ar împiedica folosirea indecșilor pe timestamp
+    for key, lookup, days in (('date_from', 'timestamp__gte', 0), ('date_to', 'timestamp__lt', 1)):
+        if filters[key]:
+            try:
+                day_start = timezone.make_aware(datetime.strptime(filters[key], "%Y-%m-%d") + timedelta(days=days))
+                queryset = queryset.filter(**{lookup: day_start})
+            except ValueError:
+                messages.warning(request, f"Data '{filters[key]}' nu este în formatul AAAA-LL-ZZ și a fost ignorată.")
+
+    page_number = request.GET.get('page', 1)
+    paginator = Paginator(queryset, 50)
+    try:
+        page_obj = paginator.page(page_number)
+    except PageNotAnInteger: page_obj = paginator.page(1)
+    except EmptyPage: page_obj = paginator.page(paginator.num_pages)
+
+    action_types = (ActivityLog.objects.order_by('action_type')
+                    .values_list('action_type', flat=True).distinct())
+
+    context = {
+        'page_obj': page_obj,
+        'filters': filters,
+        'has_filters': any(filters.values()),
+        'total_results': paginator.count,
+        'action_types': [a for a in action_types if a],
+        'gestiuni': Gestiune.objects.order_by('nume'),
+    }
+    return render(request, 'certificat/activity_log_explorer.html', context)
+
+
+# --- Instrumentare - statistici durate (Superadmin) ---
+@login_required(login_url='/login/')
+def instrumentation_stats(request):
+    """ Returnează JSON cu p50/p95/p99 (ms) pe view și pe etapă, din bufferul procesului curent. Doar Superadmin. """
+    if not request.caps.is_superadmin:
+        return JsonResponse({'status': 'error', 'message': 'Acces neautorizat.'}, status=403)
+    data = instrumentation.snapshot()
+    data['pid'] = os.getpid()
+    return JsonResponse(data)
+
+
+# --- Metrici Prometheus ---
+def metrics_endpoint(request):
+    """
+    Expune metricile în format text Prometheus. Acces: superadmin autentificat sau
+    header 'Authorization: Bearer <METRICS_TOKEN>' (pentru scrape din Prometheus local).
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+    # Comparare în timp constant: durata nu dezvăluie cât din token este corect
+    authorized = bool(token) and hmac.compare_digest(auth_header.encode(), f"Bearer {token}".encode())
+    if not authorized and request.user.is_authenticated:
+        authorized = request.caps.is_superadmin
+    if not authorized:
+        return HttpResponse("Acces neautorizat.\n", status=403, content_type="text/plain; charset=utf-8")
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,146 @@
+"""
+API JSON (doar citire) pentru documentele generate, folosit de filtrarea din front-end.
+
+- api_documents: lista cu aceleași reguli de vizibilitate și filtre ca pagina
+  documente-generated, paginată cu cursor (keyset pe created_at, id) în loc de OFFSET
+- api_document_detail: câmpurile unui document
+- api_document_positions: articolele din pozițiile 1-3 (context_json)
+
+Toate răspunsurile au ETag (conditional_json), deci un client care
+retrimite If-None-Match primește 304 fără corp dacă datele nu s-au schimbat.
+"""
+import base64
+import binascii
+import json
+
+from django.contrib.auth.decorators import login_required
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
+
+from ..models import GeneratedDocument
+from ..utils import log_activity, can_view_document
+from .documents import (
+    visible_documents, filter_documents_by_params, document_positions, conditional_json
+)
+
+
+API_PAGE_SIZE = 25
+API_MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(doc):
+    raw = json.dumps([doc.created_at.isoformat(), doc.pk]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """(created_at, id) din cursor; ValueError dacă este invalid."""
+    try:
+        created_at, pk = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        created_at = parse_datetime(created_at)
+        if created_at is None:
+            raise ValueError("dată invalidă")
+        return created_at, int(pk)
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as e:
+        raise ValueError(f"Cursor invalid: {e}")
+
+
+def serialize_document(doc):
+    return {
+        "id": doc.pk,
+        "aviz_number": doc.aviz_number,
+        "document_series": doc.document_series,
+        "partner": doc.partner,
+        "status": doc.status,
+        "generated_by": doc.generated_by.username if doc.generated_by_id else None,
+        "created_at": doc.created_at,
+        "regenerated": doc.regenerated,
+        "regenerated_at": doc.regenerated_at,
+        "regeneration_count": doc.regeneration_count,
+        "is_deleted": doc.is_deleted,
+        "deleted_at": doc.deleted_at,
+        "has_pdf": bool(doc.pdf_file),
+    }
+
+
+def _get_visible_document(request, doc_id, action):
+    """Documentul dacă utilizatorul îl poate vedea, altfel (None, răspuns de eroare)."""
+    doc = GeneratedDocument.objects.select_related('generated_by').filter(pk=doc_id).first()
+    if doc is None:
+        return None, JsonResponse({"error": "Documentul specificat nu a fost găsit."}, status=404)
+    if not can_view_document(request.user, doc):
+        log_activity(request.user, f"{action}_DENIED", f"Acces neautorizat API document ID: {doc_id}.", document=doc)
+        return None, JsonResponse({"error": "Acces nepermis."}, status=403)
+    return doc, None
+
+
+@require_GET
+@login_required(login_url='/login/')
+def api_documents(request):
+    """
+    Lista documentelor vizibile. Parametri: filtrele listei (aviz, serie, partener, lot,
+    articol, include_deleted, view_as_user, sim_gestiune_id), limit (max 100) și cursor
+    (next_cursor din răspunsul anterior).
+    """
+    if not request.caps.ok_doc_generate:
+        log_activity(request.user, "API_DOC_LIST_DENIED", "Încercare acces API documente fără permisiune ok_doc_generate.")
+        return JsonResponse({"error": "Acces nepermis."}, status=403)
+
+    try:
+        limit = min(max(int(request.GET.get("limit", API_PAGE_SIZE)), 1), API_MAX_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({"error": "Parametrul 'limit' trebuie să fie un număr."}, status=400)
+
+    base_qs, _, _ = visible_documents(request)
+    qs, filters = filter_documents_by_params(base_qs, request.GET)
+    qs = qs.order_by("-created_at", "-id")
+
+    cursor = request.GET.get("cursor")
+    if cursor:
+        try:
+            created_at, pk = decode_cursor(cursor)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    # Un rând în plus spune dacă există o pagină următoare, fără COUNT
+    docs = list(qs[:limit + 1])
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+
+    payload = {
+        "results": [serialize_document(doc) for doc in docs],
+        "next_cursor": encode_cursor(docs[-1]) if has_more else None,
+        "filters": filters,
+    }
+    return conditional_json(request, payload)
+
+
+@require_GET
+@login_required(login_url='/login/')
+def api_document_detail(request, doc_id):
+    doc, error = _get_visible_document(request, doc_id, "API_DOC_DETAIL")
+    if error:
+        return error
+    return conditional_json(request, serialize_document(doc))
+
+
+@require_GET
+@login_required(login_url='/login/')
+def api_document_positions(request, doc_id):
+    doc, error = _get_visible_document(request, doc_id, "API_DOC_POSITIONS")
+    if error:
+        return error
+
+    items = []
+    if doc.context_json:
+        try:
+            context_dict = json.loads(doc.context_json)
+        except json.JSONDecodeError as json_err:
+            print(f"ERROR: JSON Decode Error for doc {doc_id}: {json_err}")
+            return JsonResponse({"error": "Detaliile salvate sunt corupte."}, status=500)
+        if isinstance(context_dict, dict):
+            items = document_positions(context_dict)
+    return conditional_json(request, {"id": doc.pk, "items": items})
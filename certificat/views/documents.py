@@ -0,0 +1,749 @@
+"""
+Pagina principală, raportare și operațiile pe documentele generate (listă, detalii, ștergere, restaurare).
+"""
+import hashlib
+import json
+import traceback
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse, Http404, StreamingHttpResponse
+from django.shortcuts import render, get_object_or_404, redirect
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncMonth
+from django.contrib import messages
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.core.files.storage import default_storage
+
+from ..models import GeneratedDocument, Gestiune, PurgeJob
+from ..utils import StandardMessages, log_activity, gestiune_series_prefixes, can_view_document
+from .. import downloads, exports, purge
+
+
+FAMOUS_QUOTES = [
+    {"text": "Singura modalitate de a face lucruri minunate este să iubești ceea ce faci.", "author": "Steve Jobs"},
+    # ... (restul citatelor) ...
+]
+
+
+# --- View home (rămâne la fel) ---
+@login_required(login_url='/login/')
+def home(request):
+    """View pentru pagina principală cu statistici de business."""
+    # ... (codul existent pentru home view) ...
+    current_date = timezone.now()
+    quotes = [
+        {"text": "Drumul către succes este mereu în construcție.", "author": "Lily Tomlin"},
+        {"text": "Nu contează cât de încet mergi, atâta timp cât nu te oprești.", "author": "Confucius"},
+        {"text": "Succesul constă în a cădea de nouă ori și a te ridica de zece ori.", "author": "Jon Bon Jovi"},
+        # ... (restul citatelor)
+    ]
+    quote = random.choice(quotes)
+    total_finalized_documents = GeneratedDocument.objects.filter(status='finalizat').count()
+    my_distinct_avize = GeneratedDocument.objects.filter(generated_by=request.user).values('aviz_number').distinct().count()
+    recent_date = timezone.now() - timedelta(days=30)
+    recent_avize = GeneratedDocument.objects.filter(created_at__gte=recent_date).values('aviz_number').distinct().count()
+
+    # Statistici tipologii recente
+    recent_tipologies = []
+    try:
+        tipologie_counts = defaultdict(int)
+        recent_docs_json = GeneratedDocument.objects.filter(
+            created_at__gte=recent_date, context_json__isnull=False
+        ).values_list('context_json', flat=True)
+
+        for context_json_str in recent_docs_json:
+            try:
+                context_data = json.loads(context_json_str)
+                for i in range(1, 4):
+                    pos_key = f"pozitie{i}"
+                    if pos_key in context_data and isinstance(context_data[pos_key], dict):
+                        tipologie = context_data[pos_key].get('tipologie')
+                        if tipologie:
+                            tipologie_counts[tipologie] += 1
+            except (json.JSONDecodeError, KeyError, TypeError):
+                continue # Ignorăm JSON invalid sau structură neașteptată
+
+        recent_tipologies = sorted(
+            [{"name": name, "count": count} for name, count in tipologie_counts.items()],
+            key=lambda x: x["count"], reverse=True
+        )
+    except Exception as e:
+        print(f"Eroare la calculul statisticilor recente pe tipologii: {e}")
+        # Fallback data
+        recent_tipologies = [{"name": "Cereale", "count": 12}, {"name": "Leguminoase", "count": 8}]
+
+    # Statistici gestiuni
+    gestiune_stats = []
+    try:
+        gestiune_counts = GeneratedDocument.objects.values(
+            gestiune_name=F('generated_by__userprofile__gestiune__nume')
+        ).annotate(count=Count('id')).order_by('-count')
+        gestiune_stats = [
+            {"name": item['gestiune_name'] or "Nespecificată", "count": item['count']}
+            for item in gestiune_counts if item['count'] > 0 # Afișăm doar cele cu documente
+        ]
+    except Exception as e:
+        print(f"Eroare la calculul statisticilor pe gestiuni: {e}")
+        # Fallback data
+        gestiune_stats = [{"name": "Gestiune 1", "count": 35}, {"name": "Gestiune 2", "count": 22}]
+
+    # Distribuție statusuri
+    status_counts = dict(GeneratedDocument.objects.values_list('status').annotate(count=Count('id')))
+    status_labels = dict(GeneratedDocument.STATUS_CHOICES)
+    status_data = [{'status': status_labels.get(status, status), 'count': count} for status, count in status_counts.items()]
+
+    # Documente lunare (ultimele 6 luni)
+    six_months_ago = timezone.now() - timedelta(days=180)
+    monthly_data_qs = (
+        GeneratedDocument.objects
+        .filter(created_at__gte=six_months_ago)
+        .annotate(month=TruncMonth('created_at'))
+        .values('month')
+        .annotate(count=Count('id'))
+        .order_by('month')
+    )
+    months_list = [{'month': entry['month'].strftime('%b %Y'), 'count': entry['count']} for entry in monthly_data_qs]
+
+    # Distribuție tipologii (Top 5 total)
+    tipologii_data = []
+    try:
+        tipologie_counts_total = defaultdict(int)
+        all_docs_json = GeneratedDocument.objects.filter(context_json__isnull=False).values_list('context_json', flat=True)
+        for context_json_str in all_docs_json:
+             try:
+                context_data = json.loads(context_json_str)
+                for i in range(1, 4):
+                    pos_key = f"pozitie{i}"
+                    if pos_key in context_data and isinstance(context_data[pos_key], dict):
+                        tipologie = context_data[pos_key].get('tipologie')
+                        if tipologie: tipologie_counts_total[tipologie] += 1
+             except (json.JSONDecodeError, KeyError, TypeError): continue
+
+        top_tipologii = sorted(tipologie_counts_total.items(), key=lambda x: x[1], reverse=True)[:5]
+        tipologii_data = [{"name": name, "value": count} for name, count in top_tipologii]
+    except Exception as e:
+        print(f"Eroare la obținerea datelor despre tipologii (total): {e}")
+        # Fallback
+        tipologii_data = [{"name": "Cereale", "value": 50}, {"name": "Leguminoase", "value": 30}]
+
+    # Date simulate dacă nu există date reale
+    if not months_list:
+        now = timezone.now()
+        months_list = [{'month': (now - timedelta(days=30 * i)).strftime('%b %Y'), 'count': random.randint(5, 30)} for i in range(6, 0, -1)]
+    if not status_data:
+        status_data = [{'status': 'Salvat', 'count': 10}, {'status': 'Finalizat', 'count': 20}, {'status': 'In procesare', 'count': 5}]
+    if not tipologii_data:
+         tipologii_data = [{"name": "Simulat1", "value": 15}, {"name": "Simulat2", "value": 10}]
+
+
+    context = {
+        'current_date': current_date,
+        'quote': quote,
+        'total_finalized_documents': total_finalized_documents,
+        'my_distinct_avize': my_distinct_avize,
+        'recent_avize': recent_avize,
+        'recent_tipologies': recent_tipologies,
+        'gestiune_stats': gestiune_stats,
+        'monthly_data': json.dumps(months_list),
+        'status_data': json.dumps(status_data),
+        'tipologii_data': json.dumps(tipologii_data)
+    }
+    return render(request, "home.html", context)
+
+
+# --- View raportare (rămâne la fel) ---
+@login_required(login_url='/login/')
+def raportare(request):
+    # Verifică permisiunea ok_raportare
+    if not request.caps.ok_raportare:
+        StandardMessages.access_denied(request)
+        log_activity(request.user, "RAPORTARE_DENIED", "Încercare acces raportare fără permisiune ok_raportare.")
+        return redirect('home')
+    
+    log_activity(request.user, "ACCESS_REPORT", "A accesat pagina de raportare.")
+    return render(request, "certificat/raportare.html")
+
+
+# --- Descărcare protejată PDF document ---
+@login_required(login_url='/login/')
+def download_document_pdf(request, doc_id):
+    """
+    Servește PDF-ul unui document după verificarea permisiunilor (aceleași reguli ca lista).
+    Transferul este predat proxy-ului (X-Accel-Redirect/X-Sendfile) sau trimis cu suport Range/ETag.
+    """
+    doc = get_object_or_404(GeneratedDocument.objects.select_related('blob'), pk=doc_id)
+    if not can_view_document(request.user, doc):
+        log_activity(request.user, "DOC_DOWNLOAD_DENIED", f"Acces refuzat la PDF-ul documentului ID {doc_id}.",
+                     document=doc)
+        raise Http404("Documentul nu a fost găsit.")
+    if not doc.pdf_file or not default_storage.exists(doc.pdf_file.name):
+        raise Http404("Fișierul PDF nu există.")
+
+    filename = f"aviz_{doc.aviz_number}_{doc.document_series or doc.id}.pdf"
+    as_attachment = request.GET.get("download") == "1"
+    return downloads.serve_file(request, doc.pdf_file.name, filename=filename, content_type="application/pdf",
+                                as_attachment=as_attachment, content_hash=doc.blob.sha256 if doc.blob_id else None)
+
+
+# --- delete_generated_document (rămâne dezactivat) ---
+@login_required(login_url='/login/')
+def delete_generated_document(request, doc_id):
+    # Verifică dacă utilizatorul este superadmin
+    is_superadmin = request.caps.is_superadmin
+
+    if not is_superadmin:
+        messages.error(request, "Doar superadminii pot șterge documente.")
+        log_activity(request.user, "DELETE_DOC_DENIED",
+                     f"Încercare ștergere document ID: {doc_id}. Operațiune nepermisă pentru acest utilizator.")
+        return redirect('generated_documents_list')
+
+    try:
+        doc = get_object_or_404(GeneratedDocument, id=doc_id)
+
+        # Marchează documentul ca șters (soft delete)
+        doc.is_deleted = True
+        doc.deleted_at = timezone.now()
+        doc.deleted_by = request.user
+        doc.save()
+
+        log_activity(request.user, "DELETE_DOC_SUCCESS",
+                     f"Document ID: {doc_id} (Aviz: {doc.aviz_number}, Serie: {doc.document_series}) marcat ca șters.", document=doc)
+        StandardMessages.operation_success(request,
+                                           f"Documentul pentru avizul {doc.aviz_number} a fost marcat ca șters.")
+
+    except Http404:
+        StandardMessages.item_not_found(request, "Documentul")
+        log_activity(request.user, "DELETE_DOC_NOT_FOUND", f"Document ID: {doc_id} negăsit pentru ștergere.")
+    except Exception as e:
+        StandardMessages.operation_failed(request, "ștergerea documentului", str(e))
+        log_activity(request.user, "DELETE_DOC_ERROR", f"Eroare la ștergerea documentului ID: {doc_id}. Eroare: {e}")
+
+    return redirect('generated_documents_list')
+
+
+# --- Generated Documents List ---
+def visible_documents(request):
+    """
+    Documentele pe care utilizatorul curent le poate vedea în listă (fără filtrele din formular).
+
+    Întoarce (base_qs, view_as_user, selected_sim_gestiune); admin/superadmin pot simula vederea
+    unui utilizator dintr-o gestiune prin view_as_user=yes și sim_gestiune_id.
+    """
+    is_admin_or_super = request.caps.is_admin_or_super
+    base_qs = GeneratedDocument.objects.select_related('generated_by', 'deleted_by')  # Adăugat deleted_by la select_related
+
+    # Verificare dacă utilizatorul are dreptul să vadă toate documentele
+    vede_toate = request.caps.vede_toate_documentele
+
+    # MODIFICARE: Utilizatorii normali văd TOATE documentele din gestiunea lor (nu doar cele generate de ei)
+    # Filtrarea se face prin prefixele de serii ale gestiunii (mai jos), nu prin generated_by
+    # Doar admin/superadmin fără flag "vede_toate" sunt restricționați la propriile documente
+    if not vede_toate and is_admin_or_super:
+        # Admin/superadmin fără flag "vede toate" vede doar documentele generate de el
+        base_qs = base_qs.filter(generated_by=request.user)
+    # Pentru utilizatori normali (non-admin), NU filtrăm pe generated_by
+    # Ei vor vedea toate documentele din gestiunea lor prin filtrarea pe prefixe (mai jos)
+
+    # Modificare: pentru utilizatorii non-admin/superadmin, afișăm DOAR documentele emise (finalizate)
+    # și DOAR cele ale căror serii aparțin plajelor gestiunii utilizatorului (după prefixul din plajă).
+    # Pentru admin/superadmin, putem activa același filtru prin toggle (view_as_user=yes) și alegerea unei gestiuni.
+    view_as_user = False
+    selected_sim_gestiune = None
+    if is_admin_or_super:
+        view_as_user = request.GET.get("view_as_user", "no") == "yes"
+        sim_gestiune_id = request.GET.get("sim_gestiune_id")
+        if view_as_user and sim_gestiune_id:
+            try:
+                selected_sim_gestiune = Gestiune.objects.filter(pk=int(sim_gestiune_id)).first()
+            except (ValueError, TypeError):
+                selected_sim_gestiune = None
+# 
+    if not is_admin_or_super or view_as_user:
+#         base_qs = base_qs.filter(status='finalizat')
+        # Determină gestiunea pentru care aplicăm filtrarea pe plaje
+        effective_gestiune = None
+        if is_admin_or_super and view_as_user:
+            effective_gestiune = selected_sim_gestiune
+        else:
+            effective_gestiune = request.caps.gestiune_id
+
+        # Dacă nu avem o gestiune, nu afișăm nimic
+        if effective_gestiune:
+            # Construim lista de prefixe din plajele de numere ale gestiunii
+            prefixes = gestiune_series_prefixes(effective_gestiune)
+
+            if prefixes:
+                prefix_q = Q()
+                for pref in prefixes:
+                    prefix_q |= Q(document_series__startswith=pref)
+                base_qs = base_qs.filter(prefix_q)
+            else:
+                # Fără plaje definite => nu afișăm documente
+                base_qs = base_qs.none()
+        else:
+            base_qs = base_qs.none()
+
+    # Filtru pentru a afișa sau nu documentele șterse
+    include_deleted = request.GET.get("include_deleted", "yes") == "yes"  # Default este "yes"
+    if not include_deleted:
+        base_qs = base_qs.filter(is_deleted=False)
+
+    return base_qs, view_as_user, selected_sim_gestiune
+
+
+def filter_documents_by_params(base_qs, params):
+    """
+    Aplică filtrele din formularul listei (aviz, serie, partener, lot, articol).
+
+    lot/articol caută în pozițiile din context_json. Întoarce (qs, filters).
+    """
+    # Aplicăm filtrele GET
+    aviz_filter = params.get("aviz", "").strip()
+    serie_filter = params.get("serie", "").strip()  # Filtru pe seria documentului
+    partener_filter = params.get("partener", "").strip()
+    lot_filter = params.get("lot", "").strip()  # Filtru pe seria din JSON (lot)
+    articol_filter = params.get("articol", "").strip()  # Filtru pe articol/soi/specie din JSON
+
+    # Construim query-ul filtrat
+    qs = base_qs.all()  # Pornim cu toate (filtrate pe user dacă e cazul)
+    if aviz_filter:
+        qs = qs.filter(aviz_number__icontains=aviz_filter)
+    if serie_filter:
+        qs = qs.filter(document_series__icontains=serie_filter)
+    if partener_filter:
+        qs = qs.filter(partner__icontains=partener_filter)
+
+    # Filtrare avansată (JSON) - aplicată doar dacă există lot_filter sau articol_filter
+    if lot_filter or articol_filter:
+        matching_doc_ids = set() # Folosim set pentru eficiență
+        # Optimizare: preluăm doar ID și JSON pentru documentele deja filtrate
+        docs_to_check_json = qs.filter(context_json__isnull=False).values('id', 'context_json')
+
+        for doc_data in docs_to_check_json:
+            try:
+                context_data = json.loads(doc_data['context_json'])
+                doc_matches = False # Flag dacă documentul curent se potrivește
+
+                # Iterăm prin pozițiile din context
+                for i in range(1, 4):
+                    position_key = f'pozitie{i}'
+                    if position_key in context_data and isinstance(context_data[position_key], dict):
+                        position_data = context_data[position_key]
+
+                        # Verificăm potrivirea filtrelor pentru poziția curentă
+                        lot_match_pos = (not lot_filter) or (lot_filter.lower() in str(position_data.get('serie', '')).lower())
+                        articol_match_pos = (not articol_filter)
+                        if not articol_match_pos:
+                             for field in ['articol', 'ARTICOL', 'soi', 'specia']:
+                                 if articol_filter.lower() in str(position_data.get(field, '')).lower():
+                                     articol_match_pos = True; break # Găsit, ieșim din bucla field
+
+                        # Dacă AMBELE filtre (lot și articol) se potrivesc pentru ACEASTĂ poziție,
+                        # atunci întregul document se potrivește și putem trece la următorul document.
+                        if lot_match_pos and articol_match_pos:
+                            doc_matches = True
+                            break # Ieșim din bucla pozițiilor (i)
+
+                # Dacă documentul s-a potrivit (în oricare poziție), îl adăugăm
+                if doc_matches:
+                    matching_doc_ids.add(doc_data['id'])
+
+            except (json.JSONDecodeError, TypeError, AttributeError) as e:
+                print(f"Eroare la procesarea JSON pentru doc ID {doc_data['id']} în filtrare: {e}")
+                continue # Ignorăm documentul cu JSON invalid
+
+        # Filtrăm queryset-ul final după ID-urile găsite
+        qs = qs.filter(id__in=list(matching_doc_ids))
+        # Dacă nu s-a găsit nimic și s-a aplicat filtru JSON, qs va fi gol
+
+    filters = {"aviz": aviz_filter, "serie": serie_filter, "partener": partener_filter,
+               "lot": lot_filter, "articol": articol_filter}
+    return qs, filters
+
+
+@login_required(login_url='/login/')
+def generated_documents_list(request):
+    """ Afișează lista de documente generate cu filtre și statistici. """
+    # Verifică permisiunea ok_doc_generate
+    if not request.caps.ok_doc_generate:
+        StandardMessages.access_denied(request)
+        log_activity(request.user, "DOC_LIST_DENIED", "Încercare acces listă documente fără permisiune ok_doc_generate.")
+        return redirect('home')
+    
+    is_superadmin = request.caps.is_superadmin
+    is_admin = request.caps.is_admin
+    is_admin_or_super = is_admin or is_superadmin
+    log_activity(request.user, "ACCESS_DOC_LIST", f"A accesat lista documente (Admin/Super: {is_admin_or_super}).")
+
+    base_qs, view_as_user, selected_sim_gestiune = visible_documents(request)
+    qs, filters = filter_documents_by_params(base_qs, request.GET)
+
+    # Paginare
+    paginator = Paginator(qs.order_by("-created_at"), 25) # 25 documente pe pagină
+    page_number = request.GET.get('page', 1)
+    try:
+        page_obj = paginator.page(page_number)
+    except PageNotAnInteger:
+        page_obj = paginator.page(1)
+    except EmptyPage:
+        page_obj = paginator.page(paginator.num_pages)
+
+
+    # Statistici - calculate pe baza query-ului DE BAZĂ (filtrat pe user sau global)
+    all_aviz_numbers = base_qs.values_list('aviz_number', flat=True).distinct()
+    total_avize = len(all_aviz_numbers)
+    avize_finalizate = 0
+    avize_procesare = 0
+    # Optimizare: facem un singur query pentru statusuri
+    aviz_statuses = base_qs.values('aviz_number').annotate(
+        has_finalizat=Count('id', filter=Q(status='finalizat')),
+        has_procesare=Count('id', filter=Q(status='in procesare')),
+        total_parts=Count('id')
+    )
+    for aviz_stat in aviz_statuses:
+        # Considerăm finalizat dacă TOATE părțile sunt finalizate
+        if aviz_stat['has_finalizat'] == aviz_stat['total_parts']:
+            avize_finalizate += 1
+        # Considerăm în procesare dacă MĂCAR O parte e în procesare
+        elif aviz_stat['has_procesare'] > 0:
+             avize_procesare += 1
+        # Altfel, ar putea fi toate 'salvat' sau alte statusuri - nu le contorizăm separat aici
+
+    stats_source = "sistem"
+    if not is_admin_or_super:
+        stats_source = "gestiunea ta"  # Modificat: utilizatorii văd documente din gestiunea lor, nu doar ale lor
+    elif view_as_user:
+        stats_source = f"gestiunea selectată"
+
+    # Adăugăm filtrele GET în context pentru a le menține în paginare/formular
+    # Listă gestiuni pentru toggle-ul admin/superadmin
+    gestiuni_list = None
+    if is_admin_or_super:
+        try:
+            gestiuni_list = list(Gestiune.objects.all().order_by('nume'))
+        except Exception:
+            gestiuni_list = []
+
+    context = {
+        "page_obj": page_obj, # Obiectul paginii pentru template
+        "total_avize": total_avize,
+        "avize_finalizate": avize_finalizate,
+        "avize_procesare": avize_procesare,
+        "stats_source": stats_source,
+        "is_superadmin": is_superadmin,
+        "is_admin_or_super": is_admin_or_super,
+        "view_as_user": view_as_user,
+        "sim_gestiune_id": (selected_sim_gestiune.id if selected_sim_gestiune else None),
+        "gestiuni": gestiuni_list,
+        # Filtrele curente
+        "aviz_filter": filters["aviz"],
+        "serie_filter": filters["serie"],
+        "partener_filter": filters["partener"],
+        "lot_filter": filters["lot"],
+        "articol_filter": filters["articol"],
+    }
+    return render(request, "certificat/generated_documents_list.html", context)
+
+
+# --- Document Details API ---
+def document_positions(context_dict):
+    """Articolele din pozițiile 1-3 ale contextului (dicționare goale sau lipsă sunt sărite)."""
+    items = []
+    for i in range(1, 4):
+        pos_key = f"pozitie{i}"
+        pos_data = context_dict.get(pos_key)
+        if isinstance(pos_data, dict) and pos_data: # Verificăm că e dicționar și nu e gol
+             # Adăugăm câmpurile relevante, folosind default '-'
+             items.append({
+                 "specie": pos_data.get("specia", "-"),
+                 "soi": pos_data.get("soi", pos_data.get("articol", "-")), # Folosim articol ca fallback pt soi
+                 "articol": pos_data.get("articol", "-"), # Articol separat
+                 "cantitate": pos_data.get("cantitate", 0), # Default 0 pt cantitate
+                 "um": pos_data.get("um", "-"),
+                 "serie": pos_data.get("serie", "-") # Adăugăm și seria (lotul)
+             })
+    return items
+
+
+def conditional_json(request, payload):
+    """
+    JsonResponse cu ETag (hash-ul conținutului); un If-None-Match potrivit primește 304 fără corp.
+
+    Doar ETag, fără Last-Modified: statusul, ștergerea sau redenumirea seriei schimbă răspunsul
+    fără să atingă created_at/regenerated_at, deci un If-Modified-Since ar putea primi 304
+    pentru date vechi.
+    Cache-Control: private, no-cache -> browserul păstrează răspunsul și îl revalidează.
+    """
+    body = json.dumps(payload, cls=DjangoJSONEncoder, ensure_ascii=False).encode("utf-8")
+    etag = f'W/"{hashlib.sha1(body).hexdigest()}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@login_required(login_url='/login/')
+def document_details(request, aviz_number):
+    """ API endpoint to fetch item details for a specific document part (by doc_id). """
+    doc_id_str = request.GET.get('doc_id')
+    if not doc_id_str:
+        return JsonResponse({"error": "Parametrul 'doc_id' este obligatoriu."}, status=400)
+
+    try:
+        doc_id = int(doc_id_str)
+    except ValueError:
+        return JsonResponse({"error": "ID document invalid."}, status=400)
+
+    try:
+        doc = get_object_or_404(
+            GeneratedDocument.objects.select_related('generated_by__userprofile__role'),
+            id=doc_id,
+            aviz_number=aviz_number # Verificare dublă
+        )
+
+        # Verificare Permisiuni
+        is_owner = doc.generated_by_id == request.user.id
+        is_admin_or_super = request.caps.is_admin_or_super
+
+        if not (is_owner or is_admin_or_super):
+            log_activity(request.user, "VIEW_DOC_DETAILS_DENIED", f"Acces neautorizat detalii doc ID: {doc_id}.")
+            return JsonResponse({"error": "Acces nepermis."}, status=403)
+
+        # Procesare JSON
+        if not doc.context_json:
+            return conditional_json(request, {"items": [], "message": "Nu există detalii salvate (context JSON)."})
+
+        try:
+            context_dict = json.loads(doc.context_json)
+            if not isinstance(context_dict, dict):
+                 raise json.JSONDecodeError("Contextul JSON nu este un dicționar.", doc.context_json, 0)
+
+            # Extrage itemii din poziții
+            items = document_positions(context_dict)
+
+            if not items:
+                return conditional_json(request, {"items": [], "message": "Nu s-au găsit articole în detaliile acestei părți."})
+            response = conditional_json(request, {"items": items})
+            if response.status_code == 200:
+                log_activity(request.user, "VIEW_DOC_DETAILS_SUCCESS", f"Vizualizat detalii doc ID: {doc_id}.")
+            return response
+
+        except json.JSONDecodeError as json_err:
+            log_activity(request.user, "VIEW_DOC_DETAILS_JSON_ERROR", f"Eroare parsare JSON detalii doc ID: {doc_id}. Eroare: {json_err}")
+            print(f"ERROR: JSON Decode Error for doc {doc_id}: {json_err}")
+            return JsonResponse({"error": "Detaliile salvate sunt corupte."}, status=500)
+
+    except Http404:
+        return JsonResponse({"error": "Documentul specificat nu a fost găsit."}, status=404)
+    except Exception as e:
+        print(f"--- Unhandled Exception in document_details (doc_id: {doc_id_str}, aviz: {aviz_number}) ---")
+        traceback.print_exc()
+        log_activity(request.user, "VIEW_DOC_DETAILS_ERROR", f"Eroare server detalii doc ID: {doc_id_str}. Eroare: {e}")
+        return JsonResponse({"error": "Eroare internă la server."}, status=500)
+
+
+@login_required(login_url='/login/')
+def delete_all_documents(request):
+    """View pentru ștergerea tuturor documentelor generate."""
+    if not request.caps.is_superadmin:
+        log_activity(request.user, "DELETE_ALL_DOCS_DENIED", "Acces neautorizat la ștergerea avizelor.")
+        StandardMessages.access_denied(request)
+        return redirect('administrare')
+
+    total_documents = GeneratedDocument.objects.count()
+
+    if request.method == 'POST':
+        password = request.POST.get('admin_password')
+        confirm_text = request.POST.get('confirm_text')
+        date_limit = request.POST.get('date_limit')
+
+        # Verificare parolă
+        if not request.user.check_password(password):
+            messages.error(request, "Parola introdusă este incorectă.")
+            log_activity(request.user, "DELETE_ALL_DOCS_WRONG_PASSWORD",
+                         "Încercare ștergere avize cu parolă incorectă.")
+            return redirect('delete_all_documents')
+
+        # Verificare text confirmare
+        if confirm_text != "CONFIRM STERGERE":
+            messages.error(request,
+                           "Textul de confirmare este incorect. Trebuie să introduceți exact 'CONFIRM STERGERE'.")
+            log_activity(request.user, "DELETE_ALL_DOCS_WRONG_CONFIRM",
+                         "Încercare ștergere avize cu text confirmare incorect.")
+            return redirect('delete_all_documents')
+
+        parsed_date = None
+        if date_limit:
+            try:
+                parsed_date = datetime.strptime(date_limit, '%Y-%m-%d').date()
+            except ValueError:
+                messages.warning(request, "Formatul datei este invalid. Se vor șterge toate avizele.")
+
+        # Ștergerea rulează în fundal (purge.py); pagina afișează progresul jobului
+        try:
+            job = purge.enqueue(request.user, date_limit=parsed_date)
+        except purge.PurgeBusy:
+            messages.warning(request, "O ștergere este deja în curs. Așteptați finalizarea ei.")
+            return redirect('delete_all_documents')
+        except Exception as e:
+            log_activity(request.user, "DELETE_ALL_DOCS_ERROR", f"Eroare la pornirea ștergerii documentelor: {e}")
+            messages.error(request, f"A apărut o eroare la ștergerea documentelor: {e}")
+            return redirect('delete_all_documents')
+
+        details = f"Ștergere pornită în fundal (job #{job.pk}) pentru {job.total} documente"
+        if parsed_date:
+            details += f", până la data: {date_limit}"
+        log_activity(request.user, "DELETE_ALL_DOCS_QUEUED", details + ".",
+                     payload={"job_id": job.pk, "date_limit": date_limit or None})
+        StandardMessages.info_message(
+            request, f"Ștergerea a {job.total} documente a fost pornită în fundal. Progresul este afișat mai jos.")
+        return redirect('delete_all_documents')
+
+    # GET request - afișare formular
+    context = {
+        'total_documents': total_documents,
+        'active_job': purge.active_job(),
+        'recent_jobs': PurgeJob.objects.select_related('requested_by')[:5],
+    }
+    log_activity(request.user, "ACCESS_DELETE_ALL_DOCS", "Acces la pagina de ștergere toate documentele.")
+    return render(request, 'certificat/delete_all_documents.html', context)
+
+
+@login_required(login_url='/login/')
+def purge_job_status(request, job_id):
+    """Progresul unui job de ștergere (JSON, interogat periodic de pagina de ștergere)."""
+    if not request.caps.is_superadmin:
+        return JsonResponse({"error": "Acces neautorizat."}, status=403)
+    job = get_object_or_404(PurgeJob, pk=job_id)
+    return JsonResponse({
+        "id": job.pk,
+        "status": job.status,
+        "status_display": job.get_status_display(),
+        "total": job.total,
+        "documents_deleted": job.documents_deleted,
+        "files_deleted": job.files_deleted,
+        "percent": job.percent,
+        "active": job.is_active,
+        "error": job.error,
+    })
+
+
+@login_required(login_url='/login/')
+def export_generated_documents(request):
+    """
+    Export CSV/XLSX (stream) al documentelor vizibile utilizatorului (visible_documents), cu
+    filtrele date_from, date_to (AAAA-LL-ZZ), gestiune_id, status, user și positions=yes.
+    """
+    if not request.caps.ok_doc_generate:
+        StandardMessages.access_denied(request)
+        log_activity(request.user, "DOC_EXPORT_DENIED", "Încercare export documente fără permisiune ok_doc_generate.")
+        return redirect('home')
+
+    export_format = request.GET.get("format", exports.FORMAT_CSV).lower()
+    if export_format not in exports.FORMATS:
+        StandardMessages.operation_failed(request, "export documente", f"Format necunoscut: {export_format}")
+        return redirect('generated_documents_list')
+
+    try:
+        date_from = datetime.strptime(request.GET["date_from"], "%Y-%m-%d").date() if request.GET.get("date_from") else None
+        date_to = datetime.strptime(request.GET["date_to"], "%Y-%m-%d").date() if request.GET.get("date_to") else None
+    except ValueError:
+        StandardMessages.operation_failed(request, "export documente", "Dată invalidă (format așteptat AAAA-LL-ZZ).")
+        return redirect('generated_documents_list')
+
+    # Aceeași vizibilitate ca lista de documente (inclusiv view_as_user/sim_gestiune_id pentru admini);
+    # peste ea se aplică doar filtrele exportului. Documentele șterse nu sunt exportate.
+    base_qs, _, selected_sim_gestiune = visible_documents(request)
+    gestiune = None
+    gestiune_id = request.GET.get("gestiune_id")
+    if gestiune_id:
+        try:
+            gestiune = Gestiune.objects.filter(pk=int(gestiune_id)).first()
+        except (ValueError, TypeError):
+            gestiune = None
+
+    queryset = exports.filter_documents(
+        base_qs, date_from=date_from, date_to=date_to, gestiune=gestiune,
+        status=request.GET.get("status") or None, user=request.GET.get("user") or None,
+    )
+    positions = request.GET.get("positions") == "yes"
+
+    log_activity(request.user, "DOC_EXPORT", f"Export documente generate ({export_format}).",
+                 gestiune=gestiune or selected_sim_gestiune,
+                 payload={"format": export_format, "positions": positions,
+                          "date_from": str(date_from or ""), "date_to": str(date_to or ""),
+                          "status": request.GET.get("status", ""), "user": request.GET.get("user", "")})
+
+    response = StreamingHttpResponse(exports.iter_export(queryset, export_format, positions=positions),
+                                     content_type=exports.CONTENT_TYPES[export_format])
+    response["Content-Disposition"] = downloads.content_disposition(exports.export_filename(export_format), True)
+    response["Cache-Control"] = "private, no-store"
+    return response
+
+
+@login_required(login_url='/login/')
+def restore_document(request, doc_id):
+    # Verifică dacă utilizatorul este superadmin
+    is_superadmin = request.caps.is_superadmin
+
+    if not is_superadmin:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Doar superadminii pot restaura documente șterse.'
+        }, status=403)
+
+    try:
+        doc = get_object_or_404(GeneratedDocument, id=doc_id)
+
+        if not doc.is_deleted:
+            return JsonResponse({
+                'status': 'error',
+                'message': 'Documentul nu este marcat ca șters.'
+            }, status=400)
+
+        # Verifică dacă există deja alte documente neșterse pentru același aviz
+        existing_docs = GeneratedDocument.objects.filter(
+            aviz_number=doc.aviz_number,
+            is_deleted=False
+        ).exists()
+
+        if existing_docs:
+            log_activity(request.user, "RESTORE_DOC_DENIED",
+                         f"Restaurare document ID: {doc_id} (Aviz: {doc.aviz_number}) blocată: există deja documente active pentru acest aviz.", document=doc)
+            return JsonResponse({
+                'status': 'error',
+                'message': f'Nu se poate restaura documentul pentru avizul {doc.aviz_number} deoarece există deja alte documente active pentru acest aviz.'
+            }, status=400)
+
+        # Restaurează documentul
+        doc.is_deleted = False
+        doc.deleted_at = None
+        doc.deleted_by = None
+        doc.save()
+
+        log_activity(request.user, "RESTORE_DOC_SUCCESS",
+                     f"Document ID: {doc_id} (Aviz: {doc.aviz_number}, Serie: {doc.document_series}) restaurat.", document=doc)
+
+        return JsonResponse({
+            'status': 'success',
+            'message': f'Documentul pentru avizul {doc.aviz_number} a fost restaurat cu succes.'
+        })
+
+    except Http404:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Documentul specificat nu a fost găsit.'
+        }, status=404)
+    except Exception as e:
+        return JsonResponse({
+            'status': 'error',
+            'message': f'Eroare la restaurarea documentului: {str(e)}'
+        }, status=500)
@@ -0,0 +1,1338 @@
+"""
+Generare, regenerare și previzualizare documente pe baza avizelor din feed-ul extern.
+"""
+import os
+import json
+import re
+import tempfile
+import traceback
+import time
+import platform
+import subprocess
+from collections import defaultdict
+
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponseBadRequest, JsonResponse, Http404, StreamingHttpResponse
+from django.core.files.storage import default_storage
+from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
+from django.db.models import F
+from django.conf import settings
+from django.contrib import messages
+from django.utils import timezone
+from django.forms import modelformset_factory
+from django.forms.models import model_to_dict
+
+from ..models import GeneratedDocument, SerieExtraData, SpecieMapping, Gestiune, TipologieProdus
+from ..forms import SerieExtraDataForm
+from ..utils import StandardMessages, document_visibility, log_activity
+from ..services import bundles
+from ..services.generation import FeedError, FeedTimeout, fetch_feed, render_docx, render_fingerprint
+from .. import blobstore, downloads, metrics, numbering, pdf_backends
+from ..instrumentation import (
+    timed, elapsed_ms, STAGE_RANGE_ALLOCATION, STAGE_DOCX_RENDER,
+    STAGE_PDF_CONVERSION, STAGE_STORAGE_WRITE
+)
+from .ranges import get_next_document_number
+
+
+# --- View edit_extra_data (nefolosit, rămâne la fel dar cu logare) ---
+@login_required(login_url='/login/')
+def edit_extra_data(request):
+    serie_val = request.GET.get("serie", "").strip()
+    if request.method == "POST":
+        form = SerieExtraDataForm(request.POST)
+        if form.is_valid():
+            extra_data, created = SerieExtraData.objects.update_or_create(
+                serie=form.cleaned_data["serie"],
+                defaults=form.cleaned_data
+            )
+            action_desc = 'creată' if created else 'actualizată'
+            log_activity(
+                request.user,
+                "LEGACY_EXTRA_DATA_SAVE",
+                f"Datele extra (formular vechi) pentru seria '{form.cleaned_data['serie']}' au fost {action_desc}."
+            )
+            if created: StandardMessages.item_created(request, "Datele extra pentru serie")
+            else: StandardMessages.item_updated(request, "Datele extra pentru serie")
+            # Redirect to appropriate page, maybe document list or admin?
+            return redirect("administrare") # Presupunând că admin e locul potrivit
+        else:
+            StandardMessages.operation_failed(request, "salvarea datelor extra", "Verifică datele introduse")
+            log_activity(request.user, "LEGACY_EXTRA_DATA_FAIL", f"Salvare date extra (vechi) eșuată. Seria: {serie_val}. Erori: {form.errors.as_json()}")
+    else:
+        try:
+            extra_data = SerieExtraData.objects.get(serie=serie_val)
+            form = SerieExtraDataForm(instance=extra_data)
+            log_activity(request.user, "ACCESS_LEGACY_EXTRA_DATA_EDIT", f"Accesat form editare (vechi) pt seria: {serie_val}")
+        except SerieExtraData.DoesNotExist:
+            form = SerieExtraDataForm(initial={"serie": serie_val})
+            log_activity(request.user, "ACCESS_LEGACY_EXTRA_DATA_NEW", f"Accesat form creare (vechi) pt seria: {serie_val}")
+        except Exception as e:
+            StandardMessages.operation_failed(request, "încărcarea formularului", str(e))
+            log_activity(request.user, "ACCESS_LEGACY_EXTRA_DATA_ERROR", f"Eroare acces form (vechi) pt seria: {serie_val}. Eroare: {e}")
+            form = SerieExtraDataForm(initial={"serie": serie_val}) # Afișăm un form gol
+
+    return render(request, "certificat/extra_data_form.html", {"form": form})
+
+
+# --- View generate_docx (nefolosit, rămâne la fel dar cu logare) ---
+def generate_docx(request):
+    # Acest view pare să fie înlocuit de generate_docx_aviz
+    # Adaugă logare dacă este încă utilizat
+    log_activity(request.user, "ACCESS_LEGACY_FORM", "A accesat formularul vechi de generare (generate_docx).")
+    messages.warning(request, "Acest formular este învechit. Folosiți funcția 'Generare Document'.")
+    return render(request, "certificat/form_aviz.html") # Probabil ar trebui să redirecționeze
+
+
+# --- Document Operations ---
+@login_required(login_url='/login/')
+def generate_docx_aviz(request):
+    # Verifică permisiunea ok_aviz
+    if not request.caps.ok_aviz:
+        StandardMessages.access_denied(request)
+        log_activity(request.user, "GENERATE_AVIZ_DENIED", "Încercare acces generare aviz fără permisiune ok_aviz.")
+        return redirect('home')
+    
+    if request.method == "POST":
+        aviz_input = request.POST.get("aviz_number", "").strip()
+        action = request.POST.get("action", "generate").strip().lower()  # Normalizăm la lowercase
+        status = "finalizat" if action == "generate" else "in procesare"
+        generated_docs_info = []  # Colectăm informații pentru log
+
+        metrics.AVIZ_REQUESTS.inc(action=action)
+        log_activity(
+            request.user,
+            "AVIZ_PROCESS_START",
+            f"Procesare începută pentru Aviz '{aviz_input}', Acțiune: {action}.",
+            aviz_number=aviz_input or None
+        )
+
+        # --- Validări Inițiale ---
+        if not aviz_input:
+            StandardMessages.operation_failed(request, "generare document", "Numărul de aviz este obligatoriu.")
+            log_activity(request.user, "AVIZ_PROCESS_FAIL", f"Procesare eșuată. Motiv: Aviz gol.")
+            return redirect("generate_docx_aviz")
+        try:
+            aviz_input_numeric = float(aviz_input)
+            # Poți adăuga validări suplimentare aici (ex: > 0)
+        except ValueError:
+            StandardMessages.operation_failed(request, "generare document",
+                                              "Valoarea introdusă pentru aviz nu este un număr valid.")
+            log_activity(request.user, "AVIZ_PROCESS_FAIL",
+                         f"Procesare eșuată Aviz '{aviz_input}'. Motiv: Număr aviz invalid.")
+            return redirect("generate_docx_aviz")
+
+        # Profilul și gestiunea vin din request.caps (fără interogarea leneșă a user.userprofile)
+        has_profile = request.caps.has_profile
+        is_admin_or_super = request.caps.is_admin_or_super
+
+        # Verifică dacă există deja documente NEȘTERSE pentru acest aviz
+        existing_docs_query = GeneratedDocument.objects.filter(aviz_number=aviz_input, is_deleted=False)
+
+        if existing_docs_query.exists():
+            StandardMessages.duplicate_warning(request, "document pentru avizul", aviz_input)
+            log_activity(request.user, "AVIZ_PROCESS_FAIL",
+                         f"Procesare eșuată Aviz '{aviz_input}'. Motiv: Documente existente.")
+            return redirect("generate_docx_aviz")
+
+        # --- Logică Gestiune ---
+        gestiune = None
+        if has_profile:
+            if is_admin_or_super:
+                selected_gestiune_id = request.POST.get("gestiune_id")
+                if selected_gestiune_id:
+                    try:
+                        gestiune = get_object_or_404(Gestiune, pk=selected_gestiune_id)
+                    except (ValueError, Http404):
+                        StandardMessages.operation_failed(request, "generare document",
+                                                          "Gestiunea selectată este invalidă.")
+                        log_activity(request.user, "AVIZ_PROCESS_FAIL",
+                                     f"Procesare eșuată Aviz '{aviz_input}'. Motiv: Gestiune ID invalid ({selected_gestiune_id}).")
+                        return redirect("generate_docx_aviz")
+                else:
+                    gestiune = Gestiune.objects.filter(pk=request.caps.gestiune_id).first() if request.caps.gestiune_id else None
+                    if not gestiune:
+                        StandardMessages.operation_failed(request, "generare document",
+                                                          "Admin/Superadmin trebuie să selecteze o gestiune sau să aibă una asignată.")
+                        log_activity(request.user, "AVIZ_PROCESS_FAIL",
+                                     f"Procesare eșuată Aviz '{aviz_input}'. Motiv: Admin/Superadmin fără gestiune selectată/asignată.")
+                        return redirect("generate_docx_aviz")
+
+            else:  # Utilizator normal
+                gestiune = Gestiune.objects.filter(pk=request.caps.gestiune_id).first() if request.caps.gestiune_id else None
+                if not gestiune:
+                    StandardMessages.operation_failed(request, "generare document",
+                                                      "Utilizatorul nu are o gestiune asignată.")
+                    log_activity(request.user, "AVIZ_PROCESS_FAIL",
+                                 f"Procesare eșuată Aviz '{aviz_input}'. Motiv: User fără gestiune.")
+                    return redirect("generate_docx_aviz")
+        else:
+            StandardMessages.operation_failed(request, "generare document",
+                                              "Profilul utilizatorului nu a putut fi încărcat.")
+            log_activity(request.user, "AVIZ_PROCESS_FAIL",
+                         f"Procesare eșuată Aviz '{aviz_input}'. Motiv: User fără profil.")
+            return redirect("generate_docx_aviz")
+
+        # --- Procesare Câmpuri Extra din Modal ---
+        extra_data_forms = {}
+        pattern_extra = re.compile(r"extra-(\d+)-(.+)")
+        for key, value in request.POST.items():
+            match = pattern_extra.match(key)
+            if match:
+                idx = match.group(1)
+                field_name = match.group(2)
+                if idx not in extra_data_forms:
+                    extra_data_forms[idx] = {}
+                extra_data_forms[idx][field_name] = value.strip()
+
+        for idx, data in extra_data_forms.items():
+            serie_val = data.get("serie", "").strip()
+            if serie_val:
+                defaults_data = {k: v for k, v in data.items() if k != 'serie'}
+                try:
+                    extra_obj, created = SerieExtraData.objects.update_or_create(
+                        serie=serie_val,
+                        defaults=defaults_data
+                    )
+                    action_desc = 'create' if created else 'actualizate'
+                    log_activity(
+                        request.user,
+                        "SERIE_DATA_SAVE",
+                        f"Datele extra pentru seria '{serie_val}' (Aviz: {aviz_input}) au fost {action_desc}."
+                    )
+                except Exception as e_save_extra:
+                    print(f"ERROR: Nu s-au putut salva datele extra pentru seria {serie_val}. Eroare: {e_save_extra}")
+                    messages.error(request,
+                                   f"A apărut o eroare la salvarea datelor pentru seria {serie_val}. Verificați datele introduse.")
+                    log_activity(request.user, "SERIE_DATA_SAVE_FAIL",
+                                 f"Salvare date extra eșuată Seria '{serie_val}' (Aviz: {aviz_input}). Eroare: {e_save_extra}")
+                    return redirect("generate_docx_aviz")
+
+        # --- Preluare și Procesare Date JSON ---
+        try:
+            data_list = fetch_feed(timeout=20)
+        except FeedTimeout:
+            StandardMessages.operation_failed(request, "preluare date", "Serverul extern nu a răspuns în timp util.")
+            log_activity(request.user, "AVIZ_PROCESS_FAIL",
+                         f"Procesare eșuată Aviz '{aviz_input}'. Motiv: Timeout JSON API.")
+            return redirect("generate_docx_aviz")
+        except FeedError as e_req:
+            StandardMessages.operation_failed(request, "preluare date", f"Eroare de rețea: {str(e_req)}")
+            log_activity(request.user, "AVIZ_PROCESS_FAIL",
+                         f"Procesare eșuată Aviz '{aviz_input}'. Motiv: Eroare rețea JSON API ({e_req}).")
+            return redirect("generate_docx_aviz")
+        except json.JSONDecodeError as e_json:
+            StandardMessages.operation_failed(request, "preluare date",
+                                              "Datele primite de la serverul extern sunt invalide.")
+            log_activity(request.user, "AVIZ_PROCESS_FAIL",
+                         f"Procesare eșuată Aviz '{aviz_input}'. Motiv: Eroare parsare JSON ({e_json}).")
+            return redirect("generate_docx_aviz")
+        except Exception as e:
+            StandardMessages.operation_failed(request, "preluare date", f"Eroare neașteptată: {str(e)}")
+            log_activity(request.user, "AVIZ_PROCESS_FAIL",
+                         f"Procesare eșuată Aviz '{aviz_input}'. Motiv: Eroare necunoscută JSON API ({e}).")
+            return redirect("generate_docx_aviz")
+
+        aviz_records = []
+        try:
+            aviz_records = [item for item in data_list if int(float(item.get("AVIZ", 0))) == int(aviz_input_numeric)]
+        except (ValueError, TypeError) as e_filter:
+            StandardMessages.operation_failed(request, "procesare date",
+                                              f"Eroare la filtrarea datelor primite (format invalid?). {e_filter}")
+            log_activity(request.user, "AVIZ_PROCESS_FAIL",
+                         f"Procesare eșuată Aviz '{aviz_input}'. Motiv: Eroare filtrare date JSON ({e_filter}).")
+            return redirect("generate_docx_aviz")
+
+        if not aviz_records:
+            StandardMessages.item_not_found(request, f"date pentru avizul cu numărul {aviz_input}")
+            log_activity(request.user, "AVIZ_PROCESS_FAIL",
+                         f"Procesare eșuată Aviz '{aviz_input}'. Motiv: Aviz negăsit în JSON API.")
+            return redirect("generate_docx_aviz")
+
+        groups = {}
+        partner_name = aviz_records[0].get("PARTENER", "N/A")
+        for record in aviz_records:
+            articol = record.get("ARTICOL", "").strip()
+            serie = record.get("SERIE", "").strip()
+            try:
+                cantitate = float(record.get("CANT", 0))
+            except (ValueError, TypeError):
+                cantitate = 0
+            specie = record.get("SPECIE", "").strip()
+            um = record.get("UM", "").strip()
+            soi = record.get("soi", "").strip() or articol
+            nr_referinta = record.get("nr_referinta", "").strip() or serie
+
+            key = (articol, serie)
+            if key not in groups:
+                groups[key] = {
+                    "articol": articol, "serie": serie, "cantitate": 0,
+                    "specia": specie, "um": um, "soi": soi,
+                    "nr_referinta": nr_referinta
+                }
+            groups[key]["cantitate"] += cantitate
+
+        tipologie_groups = defaultdict(list)
+        general_tipologie = TipologieProdus.objects.filter(nume__iexact="General").first()
+
+        for group_data in groups.values():
+            mapping = SpecieMapping.objects.filter(specie__iexact=group_data["specia"]).select_related(
+                'tipologie').first()
+            tipologie_obj = mapping.tipologie if mapping and mapping.tipologie else general_tipologie
+            tipologie_name = tipologie_obj.nume if tipologie_obj else "General"
+            group_data["tipologie"] = tipologie_name
+            tipologie_groups[tipologie_name].append(group_data)
+
+        nrinreg = gestiune.cod_inregistrare if gestiune and gestiune.cod_inregistrare else ""
+        current_date_str = timezone.now().strftime("%d.%m.%Y")
+        gestiune_placeholder = gestiune.nume if gestiune else "Necunoscută"
+
+        for tipologie_name, groups_list in tipologie_groups.items():
+            groups_list = sorted(groups_list, key=lambda x: (x["articol"], x["serie"]))
+            tip_obj = TipologieProdus.objects.filter(nume__iexact=tipologie_name).first()
+            if not tip_obj:
+                print(f"WARN: Tipologia '{tipologie_name}' nu a fost găsită în DB. Se va folosi range-ul 'General'.")
+                tip_obj = general_tipologie
+
+            chunks = [groups_list[i:i + 3] for i in range(0, len(groups_list), 3)]
+
+            for part_index, chunk in enumerate(chunks, start=1):
+                part_started = time.perf_counter()
+                with timed(STAGE_RANGE_ALLOCATION):
+                    seria_placeholder = get_next_document_number(gestiune, tip_obj)
+                if not seria_placeholder or seria_placeholder in numbering.RANGE_ERRORS:
+                    metrics.RANGE_EXHAUSTED.inc(reason=seria_placeholder or "Range negăsit")
+                    error_msg = f"Nu s-a putut obține un număr valid din plaja pentru Gestiune '{gestiune.nume}' / Tipologie '{tipologie_name}'. Motiv: {seria_placeholder or 'Range negăsit'}."
+                    StandardMessages.operation_failed(request, "generare document", error_msg)
+                    log_activity(request.user, "AVIZ_PROCESS_FAIL", f"Procesare Aviz '{aviz_input}'. {error_msg}",
+                                 aviz_number=aviz_input, gestiune=gestiune, duration_ms=elapsed_ms())
+                    return redirect("generate_docx_aviz")
+
+                safe_tipologie_name = re.sub(r'[^\w\-]+', '_', tipologie_name)
+
+                context_doc = {
+                    "nrinreg": nrinreg, "aviz": aviz_input, "data_gen": current_date_str,
+                    "beneficiar": partner_name, "seria": seria_placeholder,
+                    "date": current_date_str, "gestiune": gestiune_placeholder,
+                    "pozitie1": chunk[0] if len(chunk) > 0 else {},
+                    "pozitie2": chunk[1] if len(chunk) > 1 else {},
+                    "pozitie3": chunk[2] if len(chunk) > 2 else {}
+                }
+                for i in range(1, 4):
+                    pos_key = f"pozitie{i}";
+                    extra_key = f"extra{i}"
+                    serie_in_pos = context_doc[pos_key].get("serie") if isinstance(context_doc.get(pos_key),
+                                                                                   dict) else None
+                    if serie_in_pos:
+                        try:
+                            extra_obj = SerieExtraData.objects.get(serie=serie_in_pos)
+                            context_doc[extra_key] = model_to_dict(extra_obj, exclude=['id', 'serie'])
+                        except SerieExtraData.DoesNotExist:
+                            context_doc[extra_key] = {}
+                        except Exception as e_get_extra:
+                            print(
+                                f"ERROR: Eroare la preluarea datelor extra pentru seria {serie_in_pos}: {e_get_extra}")
+                            context_doc[extra_key] = {"error": "Date indisponibile"}
+                    else:
+                        context_doc[extra_key] = {}
+
+                try:
+                    context_json_str = json.dumps(context_doc, ensure_ascii=False)
+                except TypeError as e_json_dump:
+                    StandardMessages.operation_failed(request, "salvare document",
+                                                      f"Eroare la pregătirea datelor pentru salvare: {e_json_dump}")
+                    log_activity(request.user, "AVIZ_PROCESS_FAIL",
+                                 f"Procesare Aviz '{aviz_input}'. Motiv: Eroare serializare JSON ({e_json_dump}). Context: {str(context_doc)[:200]}")
+                    return redirect("generate_docx_aviz")
+
+                gen_doc = GeneratedDocument(
+                    aviz_number=aviz_input,
+                    generated_by=request.user,
+                    status=status,
+                    partner=partner_name,
+                    document_series=seria_placeholder,
+                    context_json=context_json_str
+                )
+
+                pdf_content = None
+                fname = None
+                if action == "generate":
+                    if not pdf_backends.is_available():
+                        StandardMessages.operation_failed(request,
+                                                          f"generarea PDF pt {tipologie_name} Partea {part_index}",
+                                                          "Conversia PDF nu este configurată corect pe server.")
+                        log_activity(request.user, "DOC_GENERATE_FAIL_SETUP",
+                                     f"Generare PDF eșuată Aviz {aviz_input}. Motiv: PDF Conversion Disabled/Misconfigured.")
+                        gen_doc.status = 'in procesare'
+                    else:
+                        try:
+                            template_path = os.path.join(settings.BASE_DIR, "certificat", "template.docx")
+                            if not os.path.exists(template_path):
+                                raise FileNotFoundError(f"Template-ul DOCX nu a fost găsit la calea: {template_path}")
+
+                            doc_template = render_docx(context_doc, template_path)
+
+                            temp_docx_path, temp_pdf_path = None, None
+                            try:
+                                with tempfile.NamedTemporaryFile(suffix=".docx", delete=False) as tmp_docx, \
+                                        tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp_pdf:
+                                    temp_docx_path = tmp_docx.name
+                                    temp_pdf_path = tmp_pdf.name
+                                    with timed(STAGE_DOCX_RENDER):
+                                        doc_template.save(temp_docx_path)
+
+                                conversion_success = False
+                                try:
+                                    print(f"DEBUG ({platform.system()}): Attempting DOCX -> PDF conversion...")
+                                    with pdf_backends.com_context(), timed(STAGE_PDF_CONVERSION):
+                                        pdf_backends.convert(temp_docx_path, temp_pdf_path)
+                                    print(
+                                        f"DEBUG ({platform.system()}): Conversion potentially successful. PDF at {temp_pdf_path}")
+
+                                    if os.path.exists(temp_pdf_path) and os.path.getsize(temp_pdf_path) > 0:
+                                        with open(temp_pdf_path, "rb") as pdf_file:
+                                            pdf_content = pdf_file.read()
+                                            if pdf_content:
+                                                conversion_success = True
+                                            else:
+                                                print(
+                                                    f"WARN ({platform.system()}): PDF file is empty after conversion: {temp_pdf_path}")
+                                    else:
+                                        print(
+                                            f"WARN ({platform.system()}): PDF file not found or empty after conversion attempt: {temp_pdf_path}")
+
+                                except Exception as e_conv:
+                                    error_type = "Unknown"
+                                    user_msg = f"Eroare în timpul conversiei: {e_conv}"
+                                    if pdf_backends.is_com_error(e_conv):
+                                        error_type = f"COM Error ({e_conv.hresult})"
+                                        if e_conv.hresult == -2147023170:
+                                            user_msg = "Serviciul Microsoft Word nu a putut fi contactat."
+                                        else:
+                                            user_msg = f"Eroare internă de conversie (COM: {e_conv.hresult})."
+                                    elif platform.system() == "Linux" and isinstance(e_conv, (FileNotFoundError,
+                                                                                              subprocess.CalledProcessError,
+                                                                                              subprocess.TimeoutExpired,
+                                                                                              RuntimeError)):
+                                        error_type = "LibreOffice/Subprocess Error"
+                                        if isinstance(e_conv, subprocess.TimeoutExpired):
+                                            user_msg = "Conversia PDF a durat prea mult (timeout). Resurse server insuficiente?"
+                                        elif isinstance(e_conv, FileNotFoundError):
+                                            user_msg = "Eroare conversie: Comanda 'soffice' (LibreOffice) nu a fost găsită."
+                                        else:
+                                            user_msg = "Eroare la conversia cu LibreOffice. Verificați instalarea și resursele serverului."
+                                    elif 'docx2pdf' in str(type(e_conv)):
+                                        error_type = "docx2pdf Library Error"
+                                        user_msg = f"Eroare internă în biblioteca de conversie: {e_conv}"
+
+                                    print(
+                                        f"ERROR ({platform.system()}): Conversion failed: {error_type} - {e_conv}\n{traceback.format_exc()}")
+                                    metrics.PDF_CONVERSION_FAILURES.inc(error_type=error_type)
+                                    log_activity(
+                                        request.user,
+                                        "DOC_GENERATE_FAIL_CONVERT",
+                                        f"Generare PDF eșuată Aviz {aviz_input} ({seria_placeholder}). {error_type}: {e_conv}",
+                                        aviz_number=aviz_input, series=seria_placeholder, gestiune=gestiune,
+                                        payload={"error_type": error_type}
+                                    )
+                                    StandardMessages.operation_failed(request,
+                                                                      f"generarea PDF pt {tipologie_name} Partea {part_index}",
+                                                                      user_msg)
+                                    gen_doc.status = 'in procesare'
+
+                            finally:
+                                for path in [temp_docx_path, temp_pdf_path]:
+                                    if path and os.path.exists(path):
+                                        try:
+                                            os.remove(path)
+                                        except OSError as e_rem:
+                                            print(f"WARN: Nu s-a putut șterge fișierul temporar {path}: {e_rem}")
+
+                            if conversion_success and pdf_content:
+                                fname_base = f"document_{gen_doc.aviz_number}"
+                                fname_suffix = f"{safe_tipologie_name}_part{part_index}"
+                                fname = f"{fname_base}_{fname_suffix}.pdf"
+                                with timed(STAGE_STORAGE_WRITE):
+                                    # Stocare deduplicată (SHA-256); fname rămâne numele logic din jurnal
+                                    blobstore.attach_pdf(gen_doc, pdf_content)
+                                gen_doc.status = 'finalizat'
+                                gen_doc.render_fingerprint = render_fingerprint(context_doc, template_path)
+
+                        except FileNotFoundError as e_fnf:
+                            StandardMessages.operation_failed(request, f"generarea documentului",
+                                                              f"Eroare de configurare: {e_fnf}")
+                            log_activity(request.user, "DOC_GENERATE_FAIL_SETUP",
+                                         f"Generare eșuată Aviz {aviz_input}. Motiv: Template DOCX lipsă.")
+                            return redirect("generate_docx_aviz")
+                        except Exception as e_gen:
+                            StandardMessages.operation_failed(request,
+                                                              f"generarea documentului pt {tipologie_name} Partea {part_index}",
+                                                              str(e_gen))
+                            log_activity(request.user, "DOC_GENERATE_FAIL",
+                                         f"Generare eșuată (pre-conversie) Aviz {aviz_input} ({seria_placeholder}). Eroare: {e_gen}\n{traceback.format_exc()}")
+                            gen_doc.status = 'in procesare'
+
+                try:
+                    gen_doc.save()
+                    metrics.DOCUMENT_PARTS.inc(action=action, status=gen_doc.status)
+                    if action == "generate":
+                        if gen_doc.status == 'finalizat' and fname:
+                            log_activity(request.user, "DOC_GENERATE_SUCCESS",
+                                         f"Document generat Aviz {gen_doc.aviz_number} (Serie Doc: {gen_doc.document_series}, Tipologie: {safe_tipologie_name}, Parte: {part_index}). PDF: {fname}",
+                                         document=gen_doc, gestiune=gestiune,
+                                         duration_ms=int((time.perf_counter() - part_started) * 1000),
+                                         payload={"tipologie": tipologie_name, "part": part_index})
+                            generated_docs_info.append(f"Serie: {gen_doc.document_series} (PDF: {fname})")
+                        else:
+                            log_activity(request.user, "DOC_GENERATE_PARTIAL",
+                                         f"Document salvat (fără PDF/eroare) Aviz {gen_doc.aviz_number} (Serie Doc: {gen_doc.document_series}, Tipologie: {safe_tipologie_name}, Parte: {part_index}). Status: {gen_doc.status}",
+                                         document=gen_doc, gestiune=gestiune,
+                                         duration_ms=int((time.perf_counter() - part_started) * 1000),
+                                         payload={"tipologie": tipologie_name, "part": part_index, "status": gen_doc.status})
+                            generated_docs_info.append(f"Serie: {gen_doc.document_series} (Status: {gen_doc.status})")
+                    elif action == "save":
+                        log_activity(request.user, "DOC_SAVE_SUCCESS",
+                                     f"Document rezervat Aviz {gen_doc.aviz_number} (Serie Doc: {gen_doc.document_series}, Tipologie: {safe_tipologie_name}, Parte: {part_index}). Status: {gen_doc.status}.",
+                                     document=gen_doc, gestiune=gestiune,
+                                     duration_ms=int((time.perf_counter() - part_started) * 1000),
+                                     payload={"tipologie": tipologie_name, "part": part_index, "status": gen_doc.status})
+                        generated_docs_info.append(f"Serie: {gen_doc.document_series} (Rezervat)")
+                except Exception as e_save_db:
+                    StandardMessages.operation_failed(request, "salvare document",
+                                                      f"Eroare critică la salvarea în baza de date: {e_save_db}")
+                    log_activity(request.user, "DOC_SAVE_DB_FAIL",
+                                 f"Salvare DB eșuată Aviz {gen_doc.aviz_number} ({seria_placeholder}). Eroare: {e_save_db}\n{traceback.format_exc()}")
+                    return redirect("generate_docx_aviz")
+
+        if action == "generate":
+            if any('(PDF:' in info for info in generated_docs_info):
+                StandardMessages.document_generated(request)
+                metrics.AVIZE_PROCESSED.inc(action=action, result="success")
+                log_activity(request.user, "AVIZ_PROCESS_SUCCESS",
+                             f"Procesare Aviz '{aviz_input}' finalizată (Generare). Documente: {'; '.join(generated_docs_info)}",
+                             aviz_number=aviz_input, gestiune=gestiune, duration_ms=elapsed_ms())
+                return redirect("document_preview", aviz=aviz_input)
+            elif generated_docs_info:
+                messages.warning(request,
+                                 "Documentele au fost salvate în sistem, dar generarea PDF a eșuat pentru toate părțile. Le puteți edita și regenera ulterior.")
+                metrics.AVIZE_PROCESSED.inc(action=action, result="partial")
+                log_activity(request.user, "AVIZ_PROCESS_PARTIAL_FAIL",
+                             f"Procesare Aviz '{aviz_input}' finalizată (Generare), dar FĂRĂ PDF-uri. Documente: {'; '.join(generated_docs_info)}",
+                             aviz_number=aviz_input, gestiune=gestiune, duration_ms=elapsed_ms())
+                return redirect("generated_documents_list")
+            else:
+                metrics.AVIZE_PROCESSED.inc(action=action, result="fail")
+                log_activity(request.user, "AVIZ_PROCESS_COMPLETE_FAIL",
+                             f"Procesare Aviz '{aviz_input}' eșuată complet (Generare), niciun document salvat.",
+                             aviz_number=aviz_input, gestiune=gestiune, duration_ms=elapsed_ms())
+                return redirect("generate_docx_aviz")
+
+        elif action == "save":
+            if generated_docs_info:
+                StandardMessages.document_reserved(request)
+                metrics.AVIZE_PROCESSED.inc(action=action, result="success")
+                log_activity(request.user, "AVIZ_PROCESS_SUCCESS",
+                             f"Procesare Aviz '{aviz_input}' finalizată (Salvare). Documente rezervate: {'; '.join(generated_docs_info)}",
+                             aviz_number=aviz_input, gestiune=gestiune, duration_ms=elapsed_ms())
+                return redirect("generated_documents_list")
+            else:
+                metrics.AVIZE_PROCESSED.inc(action=action, result="fail")
+                log_activity(request.user, "AVIZ_PROCESS_COMPLETE_FAIL",
+                             f"Procesare Aviz '{aviz_input}' eșuată complet (Salvare), niciun document salvat.",
+                             aviz_number=aviz_input, gestiune=gestiune, duration_ms=elapsed_ms())
+                return redirect("generate_docx_aviz")
+
+        log_activity(request.user, "AVIZ_PROCESS_UNHANDLED",
+                     f"Caz neacoperit la finalul procesării Aviz '{aviz_input}'. Action: {action}")
+        return redirect("generate_docx_aviz")
+
+    else:
+        context = {}
+        is_admin_or_superadmin = request.caps.is_admin_or_super
+
+        if is_admin_or_superadmin:
+            try:
+                context["gestiuni"] = Gestiune.objects.all().order_by('nume')
+            except Exception as e:
+                context["gestiuni"] = Gestiune.objects.none()
+
+        aviz_param = request.GET.get("aviz_number", "").strip()
+        context["series_list"] = []
+        context["series_info"] = {}
+        context["extra_data_mapping"] = {}
+
+        if aviz_param:
+            try:
+                aviz_param_int = int(float(aviz_param))
+                headers = {
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                    'Accept': 'application/json, text/plain, */*',
+                    'Accept-Language': 'ro-RO,ro;q=0.9,en-US;q=0.8,en;q=0.7',
+                    'Referer': 'https://moldova.info-media.ro/'
+                }
+                data_list = fetch_feed(headers=headers, timeout=15)
+
+                series_set = set()
+                series_info_temp = {}
+                relevant_items_count = 0
+
+                for item in data_list:
+                    try:
+                        item_aviz_str = item.get("AVIZ", "0")
+                        item_aviz_float = float(item_aviz_str)
+                        if int(item_aviz_float) == aviz_param_int:
+                            relevant_items_count += 1
+                            serie = str(item.get("SERIE", "")).strip()
+                            articol_fields = ["ARTICOL", "soi", "SPECIE"]
+                            articol = next((str(item.get(f, "")).strip() for f in articol_fields if item.get(f)), "N/A")
+
+                            try:
+                                cantitate_item = float(item.get("CANT", 0))
+                            except (ValueError, TypeError):
+                                cantitate_item = 0
+                            um_item = str(item.get("UM", "")).strip()
+
+                            if serie:
+                                series_set.add(serie)
+                                if serie not in series_info_temp:
+                                    series_info_temp[serie] = {
+                                        'articol': articol,
+                                        'cantitate': 0.0,
+                                        'um': um_item if um_item else ""
+                                    }
+                                if articol != "N/A" and (
+                                        series_info_temp[serie]['articol'] == "N/A" or not series_info_temp[serie][
+                                    'articol']):
+                                    series_info_temp[serie]['articol'] = articol
+                                if not series_info_temp[serie]['um'] and um_item:
+                                    series_info_temp[serie]['um'] = um_item
+
+                                series_info_temp[serie]['cantitate'] += cantitate_item
+
+                    except (ValueError, TypeError, AttributeError) as e_item:
+                        print(
+                            f"DEBUG (GET): Eroare la procesarea unui item din JSON: {e_item} - Item: {str(item)[:100]}")
+                        continue
+
+                context["series_list"] = sorted(list(series_set))
+                context["series_info"] = series_info_temp
+
+                extra_data_mapping_temp = {}
+                if context["series_list"]:
+                    db_extra_data = SerieExtraData.objects.filter(serie__in=context["series_list"])
+                    for extra_obj in db_extra_data:
+                        extra_data_mapping_temp[extra_obj.serie] = model_to_dict(extra_obj, exclude=['id', 'serie'])
+                for serie in context["series_list"]:
+                    if serie not in extra_data_mapping_temp:
+                        extra_data_mapping_temp[serie] = {}
+                context["extra_data_mapping"] = extra_data_mapping_temp
+
+            except FeedTimeout:
+                messages.error(request, "Eroare: Serverul extern nu a răspuns în timp util.")
+            except FeedError as e_req:
+                messages.error(request, f"Eroare de rețea la preluarea datelor externe: {e_req}")
+            except json.JSONDecodeError as e_json:
+                messages.error(request, "Eroare: Datele primite de la serverul extern sunt invalide.")
+            except ValueError as e_val:
+                messages.error(request,
+                               f"Numărul de aviz '{aviz_param}' nu este valid sau datele primite conțin erori.")
+            except Exception as e:
+                messages.error(request, f"A apărut o eroare neașteptată la preluarea detaliilor: {e}")
+            finally:
+                if "error" in [m.level_tag for m in messages.get_messages(request)]:
+                    context["series_list"], context["series_info"], context["extra_data_mapping"] = [], {}, {}
+
+        context["extra_data_form"] = SerieExtraDataForm()
+        return render(request, "certificat/form_aviz.html", context)
+
+
+# --- VIEW edit_generated_document ---
+def edit_generated_document(request, doc_id):
+    """
+    Gestionează editarea detaliilor unui document generat și opțional regenerarea PDF-ului.
+    """
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    print(f"DEBUG (edit view): doc_id={doc_id}, Method={request.method}, is_ajax={is_ajax}")
+
+    # --- Obține Documentul și Verifică Permisiunile ---
+    try:
+        doc = get_object_or_404(
+            GeneratedDocument.objects.select_related('generated_by__userprofile__role'),
+            id=doc_id
+        )
+    except (Http404, ValueError):  # Prinde ValueError dacă doc_id nu este un int
+        log_activity(request.user, "EDIT_DOC_NOT_FOUND",
+                     f"Încercare de acces pentru editare document inexistent/invalid ID: {doc_id}.")
+        StandardMessages.item_not_found(request, "Documentul")
+        return redirect("generated_documents_list")
+
+    # Verifică dacă documentul este șters
+    if doc.is_deleted:
+        log_activity(request.user, "EDIT_DOC_DELETED",
+                     f"Încercare de editare a unui document șters. ID: {doc_id}, Aviz: {doc.aviz_number}")
+        messages.error(request, "Nu puteți edita un document care a fost șters.")
+        return redirect("generated_documents_list")
+
+    log_base_info = f"(ID: {doc.id}, Aviz: {doc.aviz_number}, Serie Doc: {doc.document_series})"
+
+    # Verifică permisiuni
+    is_owner = doc.generated_by_id == request.user.id
+    is_admin_or_super = request.caps.is_admin_or_super
+
+    if not (is_owner or is_admin_or_super):
+        log_activity(request.user, "EDIT_DOC_DENIED",
+                     f"Încercare neautorizată de acces pentru editare doc {log_base_info}.")
+        StandardMessages.access_denied(request)
+        return redirect("generated_documents_list")
+
+    # --- Extrage Datele Inițiale și Pregătește FormSet ---
+    series_list = []
+    series_info = {}  # MODIFICAT: Va stoca {'serie': {'articol': ..., 'cantitate': ..., 'um': ...}}
+    context_dict_initial = {}
+    try:
+        if doc.context_json:
+            context_dict_initial = json.loads(doc.context_json)
+            if not isinstance(context_dict_initial, dict):
+                raise json.JSONDecodeError("Structură JSON invalidă", doc.context_json, 0)
+
+            pattern = re.compile(r"pozitie(\d+)")
+            for key, pos_data in context_dict_initial.items():
+                match = pattern.match(key)
+                if match and isinstance(pos_data, dict):
+                    serie_val = str(pos_data.get("serie", "")).strip()
+                    articol_fields = ["articol", "ARTICOL", "soi", "specia", "tipologie"]
+                    articol_val = next((str(pos_data.get(k, "")).strip() for k in articol_fields if pos_data.get(k)),
+                                       "N/A")
+
+                    cantitate_val = pos_data.get("cantitate", "")
+                    um_val = pos_data.get("um", "")
+
+                    if serie_val:
+                        if serie_val not in series_list:
+                            series_list.append(serie_val)
+                        series_info[serie_val] = {
+                            'articol': articol_val,
+                            'cantitate': cantitate_val,
+                            'um': um_val
+                        }
+    except json.JSONDecodeError as e:
+        log_activity(request.user, "EDIT_DOC_JSON_ERROR",
+                     f"Eroare parsare JSON pentru doc {log_base_info}. Eroare: {e}", document=doc)
+        messages.error(request, f"Eroare la citirea detaliilor salvate (JSON invalid).")
+    except Exception as e:
+        log_activity(request.user, "EDIT_DOC_DATA_ERROR",
+                     f"Eroare la extragerea datelor pentru doc {log_base_info}. Eroare: {e}", document=doc)
+        messages.error(request, f"Eroare neașteptată la citirea detaliilor documentului.")
+
+    SerieExtraDataFormSet = modelformset_factory(SerieExtraData, form=SerieExtraDataForm, extra=0,
+                                                 can_delete=False)
+    queryset_formset = SerieExtraData.objects.filter(serie__in=series_list)
+
+    if request.method == 'POST':
+        action = request.POST.get("action", "").strip().lower()
+        formset = SerieExtraDataFormSet(request.POST, queryset=queryset_formset,
+                                        prefix='form')
+
+        if formset.is_valid():
+            print(f"DEBUG (edit view): Formset este valid. Acțiune: {action}")
+
+            if action == "save":
+                try:
+                    instances = formset.save()
+                    saved_series = [inst.serie for inst in instances]
+                    log_activity(request.user, "DOC_DETAILS_SAVE",
+                                 f"Detalii salvate {log_base_info} ({len(instances)} instanțe pentru seriile: {saved_series}).", document=doc)
+                    if is_ajax:
+                        return JsonResponse({'status': 'success', 'message': 'Datele au fost salvate cu succes.'})
+                    else:
+                        StandardMessages.document_saved(request)
+                        return redirect("document_preview", aviz=doc.aviz_number)
+                except Exception as e:
+                    error_message = f"Eroare la salvarea datelor: {e}"
+                    print(f"ERROR (edit view): Salvare eșuată {log_base_info}. Eroare: {e}\n{traceback.format_exc()}")
+                    log_activity(request.user, "DOC_DETAILS_SAVE_FAIL", f"Salvare eșuată {log_base_info}. Eroare: {e}", document=doc)
+                    if is_ajax:
+                        return JsonResponse({'status': 'error', 'message': error_message}, status=500)
+                    else:
+                        messages.error(request, error_message)
+                        # MODIFICAT: Asigură-te că series_info e în context la re-render
+                        context = {"aviz": doc.aviz_number, "doc": doc, "formset": formset, "series_info": series_info,
+                                   "prefix": 'form'}
+                        return render(request, "certificat/edit_generated_document.html", context)
+
+
+            elif action == "generate":
+                print(f"DEBUG (edit view): Inițiere regenerare pentru {log_base_info}")
+
+                all_fields_filled = True
+                empty_field_details = []
+                try:
+                    required_fields = [name for name, field in SerieExtraDataForm.base_fields.items() if field.required]
+                except Exception:
+                    required_fields = ['nr_ambalaje', 'doc_oficial', 'etch_oficiale', 'puritate', 'sem_straine',
+                                       'umiditate', 'germinatie', 'masa_1000b', 'stare_sanitara', 'cold', 'producator',
+                                       'tara_productie', 'samanta_tratata', 'garantie']
+
+                for form_data_item in formset.cleaned_data:  # Renamed form_data to form_data_item
+                    if not form_data_item or form_data_item.get('DELETE'):
+                        continue
+                    serie_current = form_data_item.get('serie', 'N/A')
+                    for field_name in required_fields:
+                        value = form_data_item.get(field_name)
+                        if value is None or (isinstance(value, str) and not value.strip()):
+                            all_fields_filled = False
+                            try:
+                                field_label = SerieExtraDataForm.base_fields[field_name].label or field_name
+                            except KeyError:
+                                field_label = field_name.replace('_', ' ').title()
+                            empty_field_details.append(f"'{field_label}' (Serie: {serie_current})")
+
+                if not all_fields_filled:
+                    error_message = "Generarea a eșuat. Următoarele câmpuri obligatorii sunt necompletate: " + "; ".join(
+                        sorted(list(set(empty_field_details))))
+                    print(
+                        f"ERROR (edit view): Validare eșuată {log_base_info}. Lipsesc: {'; '.join(empty_field_details)}")
+                    log_activity(request.user, "DOC_REGENERATE_FAIL_EMPTY",
+                                 f"Regenerare eșuată {log_base_info}. Motiv: Câmpuri goale server-side.", document=doc)
+                    messages.error(request, error_message)
+                    context = {"aviz": doc.aviz_number, "doc": doc, "formset": formset, "series_info": series_info,
+                               "prefix": 'form'}
+                    return render(request, "certificat/edit_generated_document.html", context)
+
+                pdf_content = None
+                fname = "document_generare_esuata.pdf"
+                try:
+                    instances = formset.save()
+                    print(f"DEBUG (edit view): Formset salvat înainte de generare ({len(instances)} instanțe).")
+
+                    updated_context_for_render = json.loads(
+                        doc.context_json or '{}')  # Renamed updated_context to updated_context_for_render
+                    document_tipologie = "Necunoscuta"
+                    aviz_number = doc.aviz_number
+
+                    # Extragem seriile din contextul actualizat
+                    # Nu mai este nevoie să extragem series_list aici, îl avem deja populat global
+                    # series_list_from_context = [] # Renamed series_list to series_list_from_context
+                    # for i in range(1, 4):
+                    #     pos_key = f"pozitie{i}"
+                    #     if pos_key in updated_context_for_render and isinstance(updated_context_for_render[pos_key], dict):
+                    #         serie = updated_context_for_render[pos_key].get("serie", "")
+                    #         if serie:
+                    #             series_list_from_context.append(serie)
+
+                    external_data_updated = False
+                    if series_list:  # Folosim series_list global
+                        try:
+                            data_list_api = fetch_feed(timeout=20)  # Renamed data_list to data_list_api
+
+                            aviz_records = [item for item in data_list_api if
+                                            int(float(item.get("AVIZ", 0))) == int(float(aviz_number))]
+
+                            if aviz_records:
+                                updated_data_api = {}  # Renamed updated_data to updated_data_api
+                                for record in aviz_records:
+                                    serie_api = record.get("SERIE", "").strip()  # Renamed serie to serie_api
+                                    if serie_api in series_list:  # Folosim series_list global
+                                        if serie_api not in updated_data_api:
+                                            updated_data_api[serie_api] = {
+                                                "serie": serie_api,
+                                                "articol": record.get("ARTICOL", "").strip(),
+                                                "cantitate": float(record.get("CANT", 0)),
+                                                "specia": record.get("SPECIE", "").strip(),
+                                                "um": record.get("UM", "").strip(),
+                                                "soi": record.get("soi", "").strip() or record.get("ARTICOL",
+                                                                                                   "").strip(),
+                                                "nr_referinta": record.get("nr_referinta", "").strip() or serie_api
+                                            }
+                                        else:
+                                            updated_data_api[serie_api]["cantitate"] += float(record.get("CANT", 0))
+
+                                if updated_data_api:
+                                    for i in range(1, 4):
+                                        pos_key = f"pozitie{i}"
+                                        if pos_key in updated_context_for_render and isinstance(
+                                                updated_context_for_render[pos_key], dict):
+                                            serie_in_pos = updated_context_for_render[pos_key].get("serie",
+                                                                                                   "")  # Renamed serie to serie_in_pos
+                                            if serie_in_pos in updated_data_api:
+                                                updated_context_for_render[pos_key].update(
+                                                    updated_data_api[serie_in_pos])
+                                                external_data_updated = True
+                                                if document_tipologie == "Necunoscuta" and "tipologie" in \
+                                                        updated_context_for_render[pos_key]:
+                                                    document_tipologie = updated_context_for_render[pos_key][
+                                                        "tipologie"]
+                                if external_data_updated:
+                                    print(f"DEBUG (edit view): Actualizare date din sursa externă reușită")
+                        except Exception as e_api:
+                            print(f"WARN (edit view): Nu s-au putut actualiza datele din sursa externă: {e_api}")
+
+                    extra_data_map_updated = {obj.serie: model_to_dict(obj, exclude=['id', 'serie'])
+                                              for obj in SerieExtraData.objects.filter(
+                            serie__in=series_list)}  # Folosim series_list global
+
+                    for i in range(1, 4):
+                        pos_key = f"pozitie{i}";
+                        extra_key = f"extra{i}"
+                        position_data = updated_context_for_render.get(pos_key)
+                        if isinstance(position_data, dict):
+                            serie_val_pos = position_data.get("serie")  # Renamed serie_val to serie_val_pos
+                            if serie_val_pos:
+                                extra_obj_data = extra_data_map_updated.get(serie_val_pos)
+                                updated_context_for_render[extra_key] = {k: (v.strip() if isinstance(v, str) else v) for
+                                                                         k, v in
+                                                                         extra_obj_data.items()} if extra_obj_data else {}
+                                if document_tipologie == "Necunoscuta":
+                                    if 'tipologie' in position_data and position_data['tipologie']:
+                                        document_tipologie = position_data['tipologie']
+                                    elif 'specia' in position_data:
+                                        mapping = SpecieMapping.objects.filter(
+                                            specie__iexact=position_data['specia']).select_related('tipologie').first()
+                                        if mapping and mapping.tipologie: document_tipologie = mapping.tipologie.nume
+                            else:
+                                updated_context_for_render[extra_key] = {}
+
+                    if document_tipologie == "Necunoscuta": document_tipologie = "General"
+                    safe_tipologie_name = re.sub(r'[^\w\-]+', '_', document_tipologie)
+                    print(
+                        f"DEBUG (edit view): Context reconstruit pentru template DOCX. Tipologie: {document_tipologie}")
+
+                    # Context + template identice cu ultima randare => PDF-ul existent e deja corect
+                    fingerprint = render_fingerprint(updated_context_for_render)
+                    if (fingerprint == doc.render_fingerprint and doc.status == "finalizat"
+                            and doc.pdf_file and doc.pdf_file.storage.exists(doc.pdf_file.name)):
+                        print(f"DEBUG (edit view): Context neschimbat ({fingerprint[:12]}), se păstrează PDF-ul existent.")
+                        log_activity(request.user, "DOC_REGENERATE_NOOP",
+                                     f"Regenerare fără modificări {log_base_info}. PDF-ul existent a fost păstrat.",
+                                     document=doc, duration_ms=elapsed_ms(), payload={"render_fingerprint": fingerprint})
+                        StandardMessages.document_unchanged(request)
+                        return redirect("document_preview", aviz=doc.aviz_number)
+
+                    # Avertismentul se emite doar când o conversie chiar urmează să ruleze
+                    if doc.status == 'finalizat':
+                        messages.warning(request,
+                                         f"Documentul pentru avizul {doc.aviz_number} / seria {doc.document_series} este deja finalizat. Regenerarea va crea o nouă versiune PDF.")
+                        log_activity(request.user, "DOC_REGENERATE_WARNING",
+                                     f"Avertisment regenerare {log_base_info}. Motiv: Document finalizat în curs de regenerare.", document=doc)
+
+                    if not pdf_backends.is_available():
+                        raise RuntimeError("Conversia PDF nu este configurată/activată pe server.")
+
+                    temp_docx_path, temp_pdf_path = None, None
+                    conversion_success = False
+                    try:
+                        template_path = os.path.join(settings.BASE_DIR, "certificat", "template.docx")
+                        if not os.path.exists(template_path):
+                            raise FileNotFoundError(f"Fișierul template nu a fost găsit: {template_path}")
+
+                        doc_template = render_docx(updated_context_for_render, template_path)  # Folosim contextul actualizat
+                        print(f"DEBUG (edit view): Template DOCX generat.")
+
+                        with tempfile.NamedTemporaryFile(suffix=".docx", delete=False) as tmp_docx, \
+                                tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp_pdf:
+                            temp_docx_path = tmp_docx.name
+                            temp_pdf_path = tmp_pdf.name
+                            with timed(STAGE_DOCX_RENDER):
+                                doc_template.save(temp_docx_path)
+                        print(f"DEBUG (edit view): DOCX temporar salvat la {temp_docx_path}")
+
+                        try:
+                            print(
+                                f"DEBUG ({platform.system()}): Se încearcă conversia DOCX -> PDF pentru regenerare...")
+                            with pdf_backends.com_context(), timed(STAGE_PDF_CONVERSION):
+                                pdf_backends.convert(temp_docx_path, temp_pdf_path)
+                                print(f"DEBUG ({platform.system()}): Conversie potențial reușită. PDF la {temp_pdf_path}")
+
+                            if os.path.exists(temp_pdf_path) and os.path.getsize(temp_pdf_path) > 0:
+                                with open(temp_pdf_path, "rb") as pdf_file:
+                                    pdf_content = pdf_file.read()
+                                    if pdf_content:
+                                        conversion_success = True
+                                    else:
+                                        print(
+                                            f"WARN ({platform.system()}): Fișier PDF gol după conversie: {temp_pdf_path}")
+                            else:
+                                print(
+                                    f"WARN ({platform.system()}): Fișier PDF negăsit/gol după conversie: {temp_pdf_path}")
+
+                        except Exception as e_conv:
+                            error_type = "Necunoscută"
+                            user_msg = f"Eroare în timpul conversiei: {e_conv}"
+                            if pdf_backends.is_com_error(e_conv):
+                                error_type = f"Eroare COM ({e_conv.hresult})"
+                                if e_conv.hresult == -2147023170:
+                                    user_msg = "Serviciul Microsoft Word nu a putut fi contactat."
+                                else:
+                                    user_msg = f"Eroare internă de conversie (COM: {e_conv.hresult})."
+                            elif platform.system() == "Linux" and isinstance(e_conv, (FileNotFoundError,
+                                                                                      subprocess.CalledProcessError,
+                                                                                      subprocess.TimeoutExpired,
+                                                                                      RuntimeError)):
+                                error_type = "Eroare LibreOffice/Subprocess"
+                                if isinstance(e_conv, subprocess.TimeoutExpired):
+                                    user_msg = "Conversia PDF a durat prea mult (timeout)."
+                                elif isinstance(e_conv, FileNotFoundError):
+                                    user_msg = "Eroare conversie: Comanda 'soffice' (LibreOffice) nu a fost găsită."
+                                else:
+                                    user_msg = "Eroare la conversia cu LibreOffice."
+                            elif 'docx2pdf' in str(type(e_conv)):
+                                error_type = "Eroare bibliotecă docx2pdf"
+                                user_msg = f"Eroare internă în biblioteca de conversie: {e_conv}"
+                            print(
+                                f"ERROR ({platform.system()}): Conversie regenerare eșuată: {error_type} - {e_conv}\n{traceback.format_exc()}")
+                            metrics.PDF_CONVERSION_FAILURES.inc(error_type=error_type)
+                            log_activity(request.user, "DOC_REGENERATE_FAIL_CONVERT",
+                                         f"Regenerare eșuată {log_base_info}. {error_type}: {e_conv}", document=doc)
+                            messages.error(request, f"Generarea PDF a eșuat: {user_msg}")
+                    finally:
+                        for path in [temp_docx_path, temp_pdf_path]:
+                            if path and os.path.exists(path):
+                                try:
+                                    os.remove(path)
+                                    print(f"DEBUG (edit view): Șters fișier temporar {path}")
+                                except OSError as e_rem:
+                                    print(f"WARN (edit view): Nu s-a putut șterge fișierul temporar {path}: {e_rem}")
+
+                    if conversion_success and pdf_content:
+                        target_doc = doc
+                        had_previous_pdf = bool(target_doc.pdf_file)
+                        timestamp = timezone.now().strftime('%Y%m%d%H%M%S')
+                        fname_base = f"document_{target_doc.aviz_number}_{target_doc.document_series or 'NA'}"
+                        fname_suffix = f"{safe_tipologie_name}_regenerat_{timestamp}"
+                        fname = f"{fname_base}_{fname_suffix}.pdf"
+
+                        # Fișierul vechi este eliberat de blobstore (șters doar dacă nu mai e referit)
+                        with timed(STAGE_STORAGE_WRITE):
+                            blobstore.attach_pdf(target_doc, pdf_content)
+                        target_doc.status = "finalizat"
+                        target_doc.render_fingerprint = fingerprint
+                        target_doc.context_json = json.dumps(updated_context_for_render, ensure_ascii=False,
+                                                             indent=2)  # Folosim contextul actualizat
+                        if had_previous_pdf:
+                            target_doc.regenerated = True
+                            target_doc.regenerated_at = timezone.now()
+                            target_doc.regeneration_count = F('regeneration_count') + 1
+                        else:
+                            target_doc.regenerated = False
+                            target_doc.regeneration_count = 0
+                        target_doc.save()
+                        target_doc.refresh_from_db(fields=['regeneration_count'])
+                        print(
+                            f"DEBUG (edit view): Obiect GeneratedDocument actualizat. Nou PDF: {fname}, Contor Regen: {target_doc.regeneration_count}")
+                        log_activity(request.user, "DOC_REGENERATE_SUCCESS",
+                                     f"Regenerat {log_base_info}. PDF: {fname}. Contor Regen: {target_doc.regeneration_count}.",
+                                     document=target_doc, duration_ms=elapsed_ms())
+                        StandardMessages.document_generated(request)
+                        return redirect("document_preview", aviz=target_doc.aviz_number)
+                    else:
+                        print(
+                            f"WARN (edit view): Generare PDF eșuată pentru regenerare {log_base_info}, reafișăm formularul.")
+                except FileNotFoundError as e_fnf:
+                    error_message = f"Eroare de configurare: {e_fnf}"
+                    print(f"ERROR (edit view): Eroare FileNotFoundError la regenerare {log_base_info}. Eroare: {e_fnf}")
+                    log_activity(request.user, "DOC_REGENERATE_FAIL_SETUP",
+                                 f"Regenerare eșuată {log_base_info}. Eroare: {e_fnf}", document=doc)
+                    messages.error(request, error_message)
+                except Exception as e_gen:
+                    error_message = f"A apărut o eroare neașteptată la generarea documentului: {e_gen}"
+                    print(
+                        f"ERROR (edit view): Eroare generică la regenerare {log_base_info}. Eroare: {e_gen}\n{traceback.format_exc()}")
+                    log_activity(request.user, "DOC_REGENERATE_FAIL",
+                                 f"Regenerare eșuată {log_base_info}. Eroare: {e_gen}", document=doc)
+                    messages.error(request, error_message)
+
+                # MODIFICAT: Asigură-te că series_info e în context la re-render
+                context = {"aviz": doc.aviz_number, "doc": doc, "formset": formset, "series_info": series_info,
+                           "prefix": 'form'}
+                return render(request, "certificat/edit_generated_document.html", context)
+            else:
+                print(f"WARN (edit view): Acțiune necunoscută '{action}' primită pentru {log_base_info}.")
+                messages.warning(request, "Acțiune necunoscută specificată.")
+                # MODIFICAT: Asigură-te că series_info e în context la re-render
+                context = {"aviz": doc.aviz_number, "doc": doc, "formset": formset, "series_info": series_info,
+                           "prefix": 'form'}
+                return render(request, "certificat/edit_generated_document.html", context)
+        else:
+            error_message = "Eroare la validarea datelor. Verificați câmpurile marcate."
+            print(f"ERROR (edit view): Formset invalid {log_base_info}. Acțiune: {action}. Erori: {formset.errors}")
+            log_activity(request.user, "DOC_FORMSET_INVALID",
+                         f"Formular invalid {log_base_info}. Acțiune: {action}. Erori: {formset.errors.as_json()}")
+            if is_ajax and action == "save":
+                simple_errors = {}
+                for i, form_errors in enumerate(formset.errors):
+                    if form_errors:
+                        simple_errors[f"form-{i}"] = {k: v[0] for k, v in form_errors.items()}
+                return JsonResponse({'status': 'error', 'message': error_message, 'errors': simple_errors}, status=400)
+            else:
+                messages.error(request, error_message)
+                for form_error in formset.errors:
+                    if form_error: messages.error(request, f"Detalii erori: {form_error}")
+                # MODIFICAT: Asigură-te că series_info e în context la re-render
+                context = {"aviz": doc.aviz_number, "doc": doc, "formset": formset, "series_info": series_info,
+                           "prefix": 'form'}
+                return render(request, "certificat/edit_generated_document.html", context)
+
+    if request.method == 'GET':
+        formset = SerieExtraDataFormSet(queryset=queryset_formset, prefix='form')
+        log_activity(request.user, "ACCESS_EDIT_DOC_FORM", f"Accesat formular de editare pentru doc {log_base_info}.")
+
+    context = {
+        "aviz": doc.aviz_number,
+        "doc": doc,
+        "formset": formset,
+        "series_info": series_info,
+        "prefix": 'form'
+    }
+
+    if is_ajax and request.method == 'GET':
+        print(f"DEBUG (edit view): Randăm template PARȚIAL pentru AJAX GET.")
+        template_name = "certificat/partial_edit_generated_document.html"
+    else:
+        print(f"DEBUG (edit view): Randăm template COMPLET (Metoda: {request.method}, is_ajax: {is_ajax}).")
+        template_name = "certificat/edit_generated_document.html"
+    return render(request, template_name, context)
+
+
+# --- document_preview (rămâne la fel) ---
+@login_required(login_url='/login/')
+def document_preview(request, aviz):
+    log_activity(request.user, "ACCESS_DOC_PREVIEW", f"A accesat preview pentru Aviz {aviz}.")
+    # Aceeași regulă ca download_document_pdf: pagina nu conține iframe-uri pe care endpoint-ul le-ar refuza
+    visible = document_visibility(request.user)
+    docs = [doc for doc in GeneratedDocument.objects.filter(aviz_number=aviz).order_by('document_series', 'created_at')
+            if visible(doc)]
+
+    if not docs:
+        StandardMessages.item_not_found(request, f"documente generate pentru avizul {aviz}")
+        # Unde redirectăm? La generare sau la listă? Lista pare mai logică.
+        return redirect("generated_documents_list")
+
+    # Colectăm URL-urile și ID-urile documentelor
+    doc_data = []
+    has_pdf = False
+    for doc in docs:
+        pdf_url = None
+        if doc.pdf_file and doc.pdf_file.name:
+             pdf_url = reverse("download_document_pdf", args=[doc.id])
+             has_pdf = True
+        doc_data.append({'id': doc.id, 'series': doc.document_series, 'url': pdf_url, 'status': doc.get_status_display()})
+
+    if not has_pdf:
+        StandardMessages.info_message(request,
+                                      "Documentele au fost rezervate dar încă nu au fost generate (sau generarea PDF a eșuat). Folosiți butonul Editează pentru a le genera/regenera.")
+        # Redirecționează la lista de documente
+        return redirect("generated_documents_list")
+
+    return render(request, "certificat/document_preview.html", {"aviz": aviz, "doc_data": doc_data})
+
+
+# --- Pachet aviz: PDF combinat sau ZIP cu toate părțile ---
+@login_required(login_url='/login/')
+def document_bundle(request, aviz):
+    """
+    Descarcă toate părțile unui aviz ca un singur PDF (?format=pdf, implicit) sau ca ZIP (?format=zip).
+    PDF-ul combinat este păstrat în cache (cheie = hash-urile părților); ambele variante sunt trimise în stream.
+    """
+    bundle_format = request.GET.get("format", "pdf").lower()
+    if bundle_format not in ("pdf", "zip"):
+        return HttpResponseBadRequest("Format necunoscut. Valori acceptate: pdf, zip.")
+
+    # Doar părțile pe care download_document_pdf le-ar servi și individual
+    visible = document_visibility(request.user)
+    docs = GeneratedDocument.objects.filter(aviz_number=aviz, is_deleted=False).exclude(pdf_file="").exclude(pdf_file__isnull=True)
+    docs = [doc for doc in docs.select_related('blob').order_by('document_series', 'created_at')
+            if visible(doc) and default_storage.exists(doc.pdf_file.name)]
+
+    if not docs:
+        StandardMessages.item_not_found(request, f"PDF-uri generate pentru avizul {aviz}")
+        return redirect("generated_documents_list")
+
+    if bundle_format == "zip":
+        response = StreamingHttpResponse(bundles.iter_zip(docs), content_type="application/zip")
+        response["Content-Disposition"] = f'attachment; filename="{bundles.download_filename(aviz, "zip")}"'
+        cached = False
+    else:
+        try:
+            name, cached = bundles.merged_pdf(docs)
+        except Exception as e_merge:
+            print(f"ERROR: Combinare PDF eșuată pentru Aviz {aviz}: {e_merge}\n{traceback.format_exc()}")
+            log_activity(request.user, "DOC_BUNDLE_FAIL", f"Combinare PDF eșuată Aviz {aviz}. Eroare: {e_merge}",
+                         aviz_number=aviz)
+            StandardMessages.operation_failed(request, "combinarea PDF-urilor", str(e_merge))
+            return redirect("document_preview", aviz=aviz)
+        response = downloads.serve_file(request, name, filename=bundles.download_filename(aviz, "pdf"),
+                                        content_type="application/pdf")
+
+    log_activity(request.user, "DOC_BUNDLE_DOWNLOAD",
+                 f"Descărcare pachet {bundle_format.upper()} Aviz {aviz} ({len(docs)} părți).",
+                 aviz_number=aviz, payload={"format": bundle_format, "parts": len(docs), "cached": cached})
+    return response
+
+
+@login_required(login_url='/login/')
+def update_document_data(request, doc_id):
+    """Actualizează datele documentului din sursa externă."""
+    try:
+        doc = get_object_or_404(GeneratedDocument, id=doc_id)
+
+        # Verificare permisiuni
+        is_owner = doc.generated_by_id == request.user.id
+        is_admin_or_super = request.caps.is_admin_or_super
+
+        if not (is_owner or is_admin_or_super):
+            log_activity(request.user, "UPDATE_DOC_DATA_DENIED",
+                         f"Încercare neautorizată de actualizare date pentru doc ID: {doc_id}")
+            StandardMessages.access_denied(request)
+            return redirect('generated_documents_list')
+
+        # Verifică dacă documentul are status valid pentru actualizare
+        if doc.status not in ['finalizat', 'in procesare']:
+            messages.warning(request,
+                             "Actualizarea poate fi efectuată doar pentru documente finalizate sau în procesare.")
+            log_activity(request.user, "UPDATE_DOC_DATA_INVALID_STATUS",
+                         f"Încercare actualizare doc ID: {doc_id} cu status invalid: {doc.status}")
+            return redirect('generated_documents_list')
+
+        # Obține context-ul original
+        old_context = {}
+        if doc.context_json:
+            try:
+                old_context = json.loads(doc.context_json)
+            except json.JSONDecodeError:
+                messages.error(request, "Contextul documentului este invalid și nu poate fi actualizat.")
+                log_activity(request.user, "UPDATE_DOC_DATA_INVALID_JSON",
+                             f"Context JSON invalid pentru doc ID: {doc_id}")
+                return redirect('generated_documents_list')
+
+        # Extrage avizul și seriile din context
+        aviz_number = doc.aviz_number
+        series_list = []
+
+        # Extrage serii din pozițiile 1-3
+        for i in range(1, 4):
+            pos_key = f"pozitie{i}"
+            if pos_key in old_context and isinstance(old_context[pos_key], dict):
+                serie = old_context[pos_key].get("serie", "")
+                if serie:
+                    series_list.append(serie)
+
+        if not series_list:
+            messages.warning(request, "Nu s-au găsit serii în document pentru actualizare.")
+            log_activity(request.user, "UPDATE_DOC_DATA_NO_SERIES", f"Nicio serie găsită pentru doc ID: {doc_id}")
+            return redirect('generated_documents_list')
+
+        # Preluăm datele noi din sursa externă
+        try:
+            data_list = fetch_feed(timeout=20)
+
+            # Filtrăm datele pentru avizul nostru
+            aviz_records = [item for item in data_list if
+                            int(float(item.get("AVIZ", 0))) == int(float(aviz_number))]
+
+            if not aviz_records:
+                messages.warning(request, f"Nu s-au găsit date noi pentru avizul {aviz_number} în sursa externă.")
+                log_activity(request.user, "UPDATE_DOC_DATA_NO_DATA",
+                             f"Nicio dată găsită în sursa externă pentru avizul {aviz_number}")
+                return redirect('generated_documents_list')
+
+            # Construim un dicționar cu datele actualizate pentru fiecare serie
+            updated_data = {}
+            for record in aviz_records:
+                serie = record.get("SERIE", "").strip()
+                if serie in series_list:
+                    if serie not in updated_data:
+                        updated_data[serie] = {
+                            "serie": serie,
+                            "articol": record.get("ARTICOL", "").strip(),
+                            "cantitate": float(record.get("CANT", 0)),
+                            "specia": record.get("SPECIE", "").strip(),
+                            "um": record.get("UM", "").strip(),
+                            "soi": record.get("soi", "").strip() or record.get("ARTICOL", "").strip(),
+                            "nr_referinta": record.get("nr_referinta", "").strip() or serie
+                        }
+                    else:
+                        # Adăugăm cantitățile dacă seria apare de mai multe ori
+                        updated_data[serie]["cantitate"] += float(record.get("CANT", 0))
+
+            # Verificăm dacă am găsit date pentru fiecare serie
+            missing_series = [s for s in series_list if s not in updated_data]
+            if missing_series:
+                messages.warning(request,
+                                 f"Nu s-au găsit date pentru următoarele serii: {', '.join(missing_series)}")
+                log_activity(request.user, "UPDATE_DOC_DATA_MISSING_SERIES",
+                             f"Serii negăsite în sursa externă: {missing_series} pentru doc ID: {doc_id}")
+
+            if not updated_data:
+                messages.warning(request, "Nu s-au găsit date pentru nicio serie din document.")
+                log_activity(request.user, "UPDATE_DOC_DATA_ALL_SERIES_MISSING",
+                             f"Toate seriile lipsesc din sursa externă pentru doc ID: {doc_id}")
+                return redirect('generated_documents_list')
+
+            # Actualizăm contextul cu noile date
+            new_context = old_context.copy()
+            changes = []
+
+            for i in range(1, 4):
+                pos_key = f"pozitie{i}"
+                if pos_key in new_context and isinstance(new_context[pos_key], dict):
+                    serie = new_context[pos_key].get("serie", "")
+                    if serie in updated_data:
+                        # Salvăm valorile vechi pentru a afișa modificările
+                        old_cantitate = new_context[pos_key].get("cantitate", 0)
+                        old_articol = new_context[pos_key].get("articol", "")
+                        old_um = new_context[pos_key].get("um", "")
+
+                        # Actualizăm cu noile valori
+                        new_context[pos_key].update(updated_data[serie])
+
+                        # Adăugăm modificările în lista de schimbări
+                        if old_cantitate != updated_data[serie]["cantitate"]:
+                            changes.append(
+                                f"Seria {serie}: Cantitate {old_cantitate} → {updated_data[serie]['cantitate']}")
+                        if old_articol != updated_data[serie]["articol"]:
+                            changes.append(
+                                f"Seria {serie}: Articol '{old_articol}' → '{updated_data[serie]['articol']}'")
+                        if old_um != updated_data[serie]["um"]:
+                            changes.append(f"Seria {serie}: UM '{old_um}' → '{updated_data[serie]['um']}'")
+
+            # Salvăm noul context
+            doc.context_json = json.dumps(new_context, ensure_ascii=False)
+            doc.save()
+
+            # Afișăm mesaj de succes cu modificările
+            if changes:
+                message = "Datele au fost actualizate cu succes. Modificări:"
+                for change in changes[:5]:  # Afișăm maximum 5 modificări
+                    message += f"\n- {change}"
+                if len(changes) > 5:
+                    message += f"\n... și încă {len(changes) - 5} modificări."
+                messages.success(request, message)
+                log_activity(request.user, "UPDATE_DOC_DATA_SUCCESS",
+                             f"Date actualizate pentru doc ID: {doc_id}. Modificări: {changes}")
+            else:
+                messages.success(request, "Datele documentului au fost verificate. Nu s-au găsit modificări.")
+                log_activity(request.user, "UPDATE_DOC_DATA_NO_CHANGES",
+                             f"Nicio modificare găsită la actualizarea doc ID: {doc_id}")
+
+        except FeedError as e:
+            messages.error(request, f"Eroare la comunicarea cu sursa externă: {str(e)}")
+            log_activity(request.user, "UPDATE_DOC_DATA_API_ERROR",
+                         f"Eroare API la actualizarea doc ID: {doc_id}. Error: {e}")
+        except (ValueError, json.JSONDecodeError) as e:
+            messages.error(request, f"Eroare la procesarea datelor: {str(e)}")
+            log_activity(request.user, "UPDATE_DOC_DATA_PROCESSING_ERROR",
+                         f"Eroare procesare la actualizarea doc ID: {doc_id}. Error: {e}")
+        except Exception as e:
+            messages.error(request, f"Eroare neașteptată: {str(e)}")
+            log_activity(request.user, "UPDATE_DOC_DATA_UNEXPECTED_ERROR",
+                         f"Eroare neașteptată la actualizarea doc ID: {doc_id}. Error: {e}")
+    except Http404:
+        messages.error(request, "Documentul specificat nu a fost găsit.")
+        log_activity(request.user, "UPDATE_DOC_DATA_DOC_NOT_FOUND", f"Document negăsit ID: {doc_id}")
+    except Exception as e:
+        messages.error(request, f"Eroare generală: {str(e)}")
+        log_activity(request.user, "UPDATE_DOC_DATA_GENERAL_ERROR",
+                     f"Eroare generală la actualizarea doc ID: {doc_id}. Error: {e}")
+
+    return redirect('generated_documents_list')
@@ -0,0 +1,153 @@
+"""
+Manualul utilizatorului: vizualizare, descărcare, încărcare și ștergere.
+"""
+import traceback
+
+from django.contrib.auth.decorators import login_required
+from django.core.files.storage import default_storage
+from django.http import Http404
+from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
+from django.views.decorators.http import require_POST
+from django.contrib import messages
+
+from ..models import UserManual
+from ..forms import UserManualForm
+from ..utils import log_activity
+from .. import downloads
+
+
+# --- Manual Views ---
+@login_required(login_url='/login/')
+def view_manual(request):
+    """ Afișează cel mai recent manual activ. """
+    manual = UserManual.objects.filter(is_active=True).order_by('-upload_date').first()
+    if manual:
+        log_activity(request.user, "ACCESS_MANUAL", f"A accesat manualul de utilizare (v{manual.version}).")
+    else:
+         log_activity(request.user, "ACCESS_MANUAL_NOT_FOUND", "A încercat să acceseze manualul (negăsit/inactiv).")
+         messages.info(request, "Momentan nu este disponibil niciun manual de utilizare activ.")
+    return render(request, "certificat/manual.html", {"manual": manual})
+
+
+@login_required(login_url='/login/')
+def download_manual(request, manual_id=None):
+    """ Descarcă un manual specific sau cel mai recent. """
+    manual_to_download = None
+    try:
+        if manual_id:
+            manual_to_download = get_object_or_404(UserManual, pk=manual_id, is_active=True)
+        else:
+            manual_to_download = UserManual.objects.filter(is_active=True).order_by('-upload_date').first()
+
+        if not manual_to_download:
+            messages.error(request, "Nu există un manual de utilizare activ disponibil pentru descărcare.")
+            log_activity(request.user, "DOWNLOAD_MANUAL_FAIL_NOT_FOUND", f"Încercare descărcare manual (ID: {manual_id or 'latest'}) - negăsit/inactiv.")
+            # Redirect la pagina manualului sau home?
+            return redirect('view_manual')
+
+        # Verificăm dacă fișierul există fizic
+        if not manual_to_download.file or not default_storage.exists(manual_to_download.file.name):
+             messages.error(request, "Fișierul manualului lipsește de pe server.")
+             log_activity(request.user, "DOWNLOAD_MANUAL_FAIL_MISSING_FILE", f"Încercare descărcare manual (ID: {manual_to_download.id}) - fișier lipsă: {manual_to_download.file.name}")
+             return redirect('view_manual')
+
+
+        log_activity(request.user, "DOWNLOAD_MANUAL", f"A descărcat manualul '{manual_to_download.title}' (v{manual_to_download.version}).")
+
+        # Transferul este predat proxy-ului (X-Accel-Redirect/X-Sendfile) sau trimis în bucăți, cu Range/ETag
+        filename = f"Manual_Utilizare_CertApp_v{manual_to_download.version}.docx"
+        return downloads.serve_file(
+            request, manual_to_download.file.name, filename=filename,
+            content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document')
+
+    except Http404:
+         messages.error(request, "Manualul specificat nu a fost găsit sau nu este activ.")
+         log_activity(request.user, "DOWNLOAD_MANUAL_FAIL_NOT_FOUND", f"Încercare descărcare manual ID: {manual_id} (404).")
+         return redirect('view_manual')
+    except Exception as e:
+         messages.error(request, f"A apărut o eroare la descărcarea manualului: {e}")
+         log_activity(request.user, "DOWNLOAD_MANUAL_FAIL_ERROR", f"Eroare descărcare manual (ID: {manual_id or 'latest'}). Eroare: {e}")
+         print(f"ERROR downloading manual: {e}\n{traceback.format_exc()}")
+         return redirect('view_manual')
+
+
+# --- Upload Manual Direct (Probabil redundant dacă e în Admin) ---
+@login_required(login_url='/login/')
+def upload_manual_direct(request):
+    """ View simplificat pt upload manual (dacă nu e în admin). """
+    if not request.caps.is_superadmin:
+        messages.error(request, "Acces neautorizat.")
+        log_activity(request.user, "ACCESS_UPLOAD_MANUAL_DENIED", "Acces neautorizat upload manual direct.")
+        return redirect('home')
+
+    if request.method == 'POST':
+        form = UserManualForm(request.POST, request.FILES) # Fără prefix aici
+        if form.is_valid():
+            try:
+                manual = form.save()
+                log_activity(request.user, "MANUAL_UPLOAD_DIRECT", f"Manual '{manual.title}' v{manual.version} încărcat (direct).")
+                messages.success(request, f"Manual '{manual.title}' v{manual.version} încărcat cu succes!")
+                return redirect('view_manual') # Redirect la vizualizare manual
+            except Exception as e_save:
+                 messages.error(request, f"Eroare la salvarea manualului: {e_save}")
+                 log_activity(request.user, "MANUAL_UPLOAD_DIRECT_FAIL", f"Salvare manual (direct) eșuată. Eroare: {e_save}")
+        else:
+            messages.error(request, f"Erori la validarea formularului: {form.errors}")
+            log_activity(request.user, "MANUAL_UPLOAD_DIRECT_INVALID", f"Formular upload manual (direct) invalid. Erori: {form.errors.as_json()}")
+    else:
+        form = UserManualForm()
+        log_activity(request.user, "ACCESS_UPLOAD_MANUAL_FORM", "Accesat formular upload manual (direct).")
+
+    return render(request, 'certificat/upload_manual.html', {'form': form})
+
+
+# --- Delete Manual ---
+@require_POST # Folosim POST pentru ștergere
+@login_required(login_url='/login/')
+def delete_manual(request, manual_id):
+    """ Șterge un manual specific. Doar Superadmin. """
+    if not request.caps.is_superadmin:
+        messages.error(request, "Acces neautorizat.")
+        log_activity(request.user, "MANUAL_DELETE_DENIED", f"Încercare ștergere manual ID: {manual_id} (neautorizat).")
+        # Redirect la pagina de unde a venit sau la vizualizare manual
+        referer = request.META.get('HTTP_REFERER', reverse('view_manual'))
+        return redirect(referer)
+
+    try:
+        manual = get_object_or_404(UserManual, pk=manual_id)
+        manual_info = f"Manual: '{manual.title}' (v{manual.version}, ID: {manual_id})"
+
+        # Ștergem fișierul asociat DUPĂ confirmarea ștergerii obiectului
+        file_path = manual.file.path if manual.file else None
+
+        # Ștergem obiectul din DB
+        manual.delete()
+
+        # Încercăm să ștergem fișierul fizic
+        if file_path and default_storage.exists(file_path):
+             try:
+                 default_storage.delete(file_path)
+                 print(f"INFO: Fișier manual șters: {file_path}")
+             except Exception as e_file_del:
+                 # Logăm eroarea, dar nu o considerăm critică pentru user
+                 print(f"WARN: Nu s-a putut șterge fișierul manualului {file_path}: {e_file_del}")
+                 log_activity(request.user, "MANUAL_DELETE_FILE_FAIL", f"Eroare ștergere fișier pentru {manual_info}. Eroare: {e_file_del}")
+
+        log_activity(request.user, "MANUAL_DELETE_SUCCESS", f"{manual_info} a fost șters cu succes.")
+        messages.success(request, f"Manualul a fost șters cu succes.")
+
+    except Http404:
+        messages.error(request, "Manualul specificat nu a fost găsit.")
+        log_activity(request.user, "MANUAL_DELETE_FAIL_NOT_FOUND", f"Încercare ștergere manual ID: {manual_id} (negăsit).")
+    except Exception as e:
+        messages.error(request, f"Eroare la ștergerea manualului: {str(e)}")
+        log_activity(request.user, "MANUAL_DELETE_FAIL_ERROR", f"Eroare la ștergerea manualului ID: {manual_id}. Eroare: {e}")
+        print(f"ERROR deleting manual {manual_id}: {e}\n{traceback.format_exc()}")
+
+    # Redirect la pagina de administrare dacă a venit de acolo, altfel la vizualizare manual
+    referer = request.META.get('HTTP_REFERER')
+    if referer and reverse('administrare') in referer:
+        return redirect('administrare')
+    else:
+        return redirect('view_manual')
@@ -0,0 +1,185 @@
+"""
+Plaje de numere (DocumentRange): alocarea următorului număr și view-urile de listare/editare/ștergere.
+"""
+from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.http import Http404
+from django.shortcuts import render, get_object_or_404, redirect
+from django.views.decorators.http import require_POST
+from django.contrib import messages
+
+from ..models import DocumentRange, TipologieProdus
+from ..forms import DocumentRangeForm
+from ..utils import StandardMessages, log_activity
+from .. import numbering
+
+
+"""Helper function to get the next document number across all ranges for a gestiune+tipologie.
+Selectează prima plajă disponibilă (ne-epuizată) în ordinea creării și returnează următorul număr.
+Dacă preview_only=False, alocă și salvează numărul pe plaja respectivă.
+"""
+def get_next_document_number(gestiune, tipologie_obj, preview_only=False):  # Adăugat preview_only
+    # 1) Încearcă pe tipologia specifică
+    ranges_qs = DocumentRange.objects.filter(gestiune=gestiune, tipologie=tipologie_obj)
+    # 2) Fallback pe "General" dacă nu există nicio plajă pe tipologia dată
+    if not ranges_qs.exists():
+        fallback_tip = TipologieProdus.objects.filter(nume__iexact="General").first()
+        if fallback_tip:
+            ranges_qs = DocumentRange.objects.filter(gestiune=gestiune, tipologie=fallback_tip)
+    if not ranges_qs.exists():
+        return ""
+
+    if preview_only:
+        available = ranges_qs.filter(remaining__gt=0).order_by('id').values_list('next_preview', flat=True).first()
+        if available:
+            return available
+    else:
+        # Plajele disponibile sunt blocate (SELECT ... FOR UPDATE) până la commit, deci două
+        # generări simultane nu pot primi același număr. Candidatul se recalculează din rândul
+        # blocat; proiecția (remaining) doar alege plajele.
+        with transaction.atomic():
+            for r in ranges_qs.select_for_update().filter(remaining__gt=0).order_by('id'):
+                candidate, _, _ = r.compute_next()
+                if candidate:
+                    # Alocare efectivă: setăm numar_curent pe plaja selectată
+                    r.numar_curent = candidate
+                    r.save()
+                    return candidate
+                # Proiecție depășită (modificare fără save()): o corectăm și trecem mai departe
+                r.save()
+
+    # Nicio plajă disponibilă: returnăm ultimul mesaj util (ordinea creării), ca înainte
+    return ranges_qs.exclude(next_preview='').order_by('-id').values_list('next_preview', flat=True).first() or ""
+
+
+# Helper specific: calculează următorul număr pentru O PLAJĂ anume (fără a considera alte plaje)
+def get_next_document_number_for_range(doc_range):
+    return numbering.preview(doc_range.numar_inceput, doc_range.numar_final, doc_range.numar_curent)
+
+
+# --- DocumentRange operations (List, Delete, Edit) ---
+@login_required(login_url='/login/')
+def my_document_ranges(request):
+    # Verifică permisiunea ok_plaje
+    if not request.caps.ok_plaje:
+        StandardMessages.access_denied(request)
+        log_activity(request.user, "PLAJE_DENIED", "Încercare acces plaje numere fără permisiune ok_plaje.")
+        return redirect('home')
+    
+    log_activity(request.user, "ACCESS_RANGE_LIST", "A accesat lista de plaje numere.")
+    is_superadmin = request.caps.is_superadmin
+
+    base_ranges_qs = DocumentRange.objects.none()
+    if is_superadmin:
+        base_ranges_qs = DocumentRange.objects.select_related('gestiune', 'tipologie').order_by('gestiune__nume', 'tipologie__nume')
+    elif request.caps.gestiune_id:
+        base_ranges_qs = DocumentRange.objects.select_related('gestiune', 'tipologie').filter(gestiune_id=request.caps.gestiune_id).order_by('tipologie__nume')
+    else:
+        if not is_superadmin: messages.warning(request, "Nu aveți o gestiune asignată pentru a vedea plaje de numere.")
+
+    # Filtrare/sortare după capacitatea rămasă (coloana remaining, direct în DB)
+    disponibil_filter = request.GET.get("disponibil", "")
+    if disponibil_filter == "yes":
+        base_ranges_qs = base_ranges_qs.filter(remaining__gt=0)
+    elif disponibil_filter == "no":
+        base_ranges_qs = base_ranges_qs.filter(remaining=0)
+    sort = request.GET.get("sort", "")
+    if sort == "remaining":
+        base_ranges_qs = base_ranges_qs.order_by('remaining', 'gestiune__nume', 'tipologie__nume')
+    elif sort == "-remaining":
+        base_ranges_qs = base_ranges_qs.order_by('-remaining', 'gestiune__nume', 'tipologie__nume')
+
+    # Pregătim lista de afișat cu informația extra (next_preview este precalculat la save)
+    ranges_with_next_number = []
+    for r in base_ranges_qs:
+        ranges_with_next_number.append({
+            'id': r.id, # pk
+            'gestiune_nume': r.gestiune.nume,
+            'tipologie_nume': r.tipologie.nume,
+            'numar_inceput': r.numar_inceput,
+            'numar_final': r.numar_final,
+            'numar_curent': r.numar_curent,
+            'urmatorul_numar': r.next_preview,
+            'remaining': r.remaining,
+        })
+
+    context = {'ranges_list': ranges_with_next_number, 'is_superadmin': is_superadmin, # Am schimbat 'ranges' in 'ranges_list'
+               'disponibil_filter': disponibil_filter, 'sort': sort}
+    return render(request, 'certificat/documentrange_list.html', context)
+
+
+@require_POST # Folosim POST pentru acțiuni de ștergere
+@login_required(login_url='/login/')
+def delete_document_range(request, pk):
+    # Verifică permisiunea ok_plaje
+    if not request.caps.ok_plaje:
+        StandardMessages.access_denied(request)
+        log_activity(request.user, "DELETE_RANGE_DENIED", f"Încercare ștergere plajă ID: {pk} (lipsă permisiune ok_plaje).")
+        return redirect('documentrange_list')
+    
+    try:
+        doc_range = get_object_or_404(DocumentRange, pk=pk)
+        is_superadmin = request.caps.is_superadmin
+
+        # Verificare permisiune (gestiune)
+        can_delete = is_superadmin or doc_range.gestiune_id == request.caps.gestiune_id
+        if not can_delete:
+            log_activity(request.user, "DELETE_RANGE_DENIED", f"Încercare ștergere plajă ID: {pk} (neautorizat/altă gestiune).")
+            StandardMessages.access_denied(request)
+            return redirect('documentrange_list')
+
+        log_details = f"Plajă numere ștearsă (ID: {doc_range.pk}, Gest: {doc_range.gestiune}, Tip: {doc_range.tipologie}, Range: {doc_range.numar_inceput}-{doc_range.numar_final}, Curent: {doc_range.numar_curent})."
+        doc_range.delete()
+        log_activity(request.user, "RANGE_DELETE", log_details)
+        StandardMessages.item_deleted(request, "Plaja de numere")
+    except Http404:
+         StandardMessages.item_not_found(request, "Plaja de numere")
+         log_activity(request.user, "DELETE_RANGE_FAIL_NOT_FOUND", f"Încercare ștergere plajă ID: {pk} (negăsit).")
+    except Exception as e:
+        StandardMessages.operation_failed(request, "ștergerea plajei de numere", str(e))
+        log_activity(request.user, "DELETE_RANGE_FAIL_ERROR", f"Ștergere plajă ID: {pk} eșuată. Eroare: {e}")
+
+    return redirect('documentrange_list')
+
+
+@login_required(login_url='/login/')
+def edit_document_range(request, pk):
+    # Verifică permisiunea ok_plaje
+    if not request.caps.ok_plaje:
+        StandardMessages.access_denied(request)
+        log_activity(request.user, "EDIT_RANGE_DENIED", f"Încercare acces editare plajă ID: {pk} (lipsă permisiune ok_plaje).")
+        return redirect('documentrange_list')
+    
+    doc_range = get_object_or_404(DocumentRange, pk=pk)
+    is_superadmin = request.caps.is_superadmin
+
+    # Verificare permisiune (gestiune)
+    can_edit = is_superadmin or doc_range.gestiune_id == request.caps.gestiune_id
+    if not can_edit:
+        log_activity(request.user, "EDIT_RANGE_DENIED", f"Încercare acces editare plajă ID: {pk} (neautorizat/altă gestiune).")
+        StandardMessages.access_denied(request)
+        return redirect('documentrange_list')
+
+    initial_data_str = f"Început: {doc_range.numar_inceput}, Final: {doc_range.numar_final}, Curent: {doc_range.numar_curent}"
+
+    if request.method == "POST":
+        # Trecem user-ul la formular pentru validare gestiune
+        form = DocumentRangeForm(request.POST, instance=doc_range, user=request.user)
+        if form.is_valid():
+            try:
+                updated_range = form.save()
+                final_data_str = f"Început: {updated_range.numar_inceput}, Final: {updated_range.numar_final}, Curent: {updated_range.numar_curent}"
+                log_activity(request.user, "RANGE_EDIT", f"Plajă numere (ID: {pk}) modificată. Inițial: [{initial_data_str}] -> Final: [{final_data_str}].")
+                StandardMessages.item_updated(request, "Plaja de numere")
+                return redirect('documentrange_list')
+            except Exception as e_save:
+                 StandardMessages.operation_failed(request, "actualizarea plajei de numere", str(e_save))
+                 log_activity(request.user, "EDIT_RANGE_FAIL_SAVE", f"Editare plajă ID: {pk} eșuată la salvare. Eroare: {e_save}")
+        else:
+            StandardMessages.operation_failed(request, "actualizarea plajei de numere", "Verifică datele introduse.")
+            log_activity(request.user, "EDIT_RANGE_FAIL_INVALID", f"Editare plajă ID: {pk} eșuată. Formular invalid. Erori: {form.errors.as_json()}")
+    else: # GET
+        form = DocumentRangeForm(instance=doc_range, user=request.user)
+        log_activity(request.user, "ACCESS_EDIT_RANGE_FORM", f"A accesat formular editare plajă ID: {pk}.")
+
+    return render(request, 'certificat/edit_document_range.html', {'form': form, 'doc_range': doc_range})
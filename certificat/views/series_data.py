@@ -0,0 +1,262 @@
+"""
+View-uri SerieExtraData: listare, ștergere (individuală și în bloc) și editare AJAX (Superadmin).
+"""
+import json
+from urllib.parse import urlencode
+
+from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
+from django.http import JsonResponse, Http404
+from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
+from django.views.decorators.http import require_POST
+from django.contrib import messages
+from django.forms.models import model_to_dict
+
+from ..models import GeneratedDocument, SerieExtraData
+from ..forms import SerieExtraDataForm
+from ..utils import StandardMessages, log_activity
+
+
+@login_required(login_url='/login/')
+def serie_extra_data_details_ajax(request, pk):
+    """
+    View AJAX pentru a prelua și actualiza detaliile unui SerieExtraData.
+    Doar Superadmin.
+    """
+    if not request.caps.is_superadmin:
+        return JsonResponse({'status': 'error', 'message': 'Acces nepermis.'}, status=403)
+
+    try:
+        serie_instance = get_object_or_404(SerieExtraData, pk=pk)
+    except (Http404, ValueError):
+        return JsonResponse({'status': 'error', 'message': 'Înregistrarea nu a fost găsită.'}, status=404)
+
+    if request.method == 'POST':
+        form = SerieExtraDataForm(request.POST, instance=serie_instance)
+        if form.is_valid():
+            try:
+                updated_instance = form.save()
+                log_activity(request.user, "SERIE_DATA_EDIT_AJAX",
+                             f"Datele extra pentru seria '{updated_instance.serie}' (PK: {pk}) au fost actualizate via AJAX.")
+                # Returnăm datele actualizate pentru a putea reîmprospăta UI-ul dacă e necesar
+                return JsonResponse({
+                    'status': 'success',
+                    'message': 'Datele au fost actualizate cu succes!',
+                    'serie_data': model_to_dict(updated_instance)  # Trimitem înapoi datele actualizate
+                })
+            except Exception as e:
+                log_activity(request.user, "SERIE_DATA_EDIT_AJAX_FAIL",
+                             f"Eroare AJAX la actualizarea seriei PK {pk}. Eroare: {e}")
+                return JsonResponse({'status': 'error', 'message': f'Eroare la salvare: {str(e)}'}, status=500)
+        else:
+            # Colectează erorile formularului pentru a le trimite înapoi
+            errors_dict = {field: [error for error in errors] for field, errors in form.errors.items()}
+            return JsonResponse({'status': 'error', 'message': 'Date invalide.', 'errors': errors_dict}, status=400)
+    else:  # GET request
+        # Pregătim datele pentru a fi trimise ca JSON, inclusiv pentru a popula formularul
+        # Sau, mai bine, trimitem direct HTML-ul formularului pre-populat?
+        # Pentru simplitate inițială, trimitem datele ca JSON. Clientul va popula formularul.
+        # Alternativ, putem randa un fragment de template cu formularul.
+
+        # Opțiunea 1: Trimitem datele ca JSON
+        data_for_form = model_to_dict(serie_instance)
+        # Poți adăuga și alte informații dacă e necesar, de ex., URL-ul pentru POST
+        data_for_form['post_url'] = reverse('serie_extra_data_details_ajax', kwargs={'pk': pk})
+
+        return JsonResponse({
+            'status': 'success',
+            'serie_data': data_for_form
+        })
+
+
+# --- SerieExtraData List & Delete (Superadmin) ---
+@login_required(login_url='/login/')
+def list_serie_extra_data(request):
+    """ Afișează lista paginată cu date extra serii, cu căutare. Doar Superadmin. """
+    if not request.caps.is_superadmin:
+        log_activity(request.user, "ACCESS_SERIE_DATA_DENIED", "Acces neautorizat la lista de date extra serii.")
+        StandardMessages.access_denied(request)
+        return redirect('administrare')
+
+    queryset = SerieExtraData.objects.all().order_by('serie')
+    search_query = request.GET.get('q', '').strip() # Filtru serie
+    articol_query = request.GET.get('articol', '').strip() # Filtru articol
+
+    # Optimizare: Construim maparea articol <-> serie o singură dată dacă e necesar
+    articole_map = {}
+    series_to_filter_by_articol = None # Inițial None
+
+    # Dacă filtrăm după articol, găsim seriile relevante
+    if articol_query:
+        series_to_filter_by_articol = set()
+        # Căutăm în JSON-ul TUTUROR documentelor (poate fi lent pe volume mari!)
+        # Consideră o denormalizare dacă performanța devine o problemă.
+        docs_json_data = GeneratedDocument.objects.filter(context_json__isnull=False).values_list('context_json', flat=True)
+        for context_json_str in docs_json_data:
+            try:
+                context_data = json.loads(context_json_str)
+                for i in range(1, 4):
+                    pos_key = f'pozitie{i}'
+                    if pos_key in context_data and isinstance(context_data[pos_key], dict):
+                        position_data = context_data[pos_key]
+                        serie = position_data.get('serie', '')
+                        if not serie: continue
+
+                        articol_found_in_pos = False
+                        for field in ['articol', 'ARTICOL', 'soi', 'specia']:
+                            articol_val = position_data.get(field, '')
+                            if articol_val:
+                                # Adăugăm în mapare (pentru afișare ulterioară, chiar dacă nu filtrăm)
+                                if serie not in articole_map: articole_map[serie] = articol_val
+                                # Verificăm potrivirea cu filtrul
+                                if articol_query.lower() in str(articol_val).lower():
+                                     series_to_filter_by_articol.add(serie)
+                                     articol_found_in_pos = True; break # Găsit articol relevant în poziție
+                        # Optimizare: dacă am găsit articol relevant în poziție, trecem la următoarea
+                        # if articol_found_in_pos: break # Comentat: vrem să populăm articole_map complet
+            except (json.JSONDecodeError, AttributeError) as e:
+                print(f"WARN: Eroare parsare JSON în list_serie_extra_data: {e}")
+                continue # Ignorăm JSON invalid
+
+    # Aplicăm filtrele la queryset
+    if search_query:
+        queryset = queryset.filter(serie__icontains=search_query)
+    if series_to_filter_by_articol is not None: # Am filtrat după articol
+        queryset = queryset.filter(serie__in=list(series_to_filter_by_articol))
+
+    # Construim maparea de articole dacă nu s-a filtrat pe articol (pt afișare)
+    if not articol_query:
+         series_in_queryset = list(queryset.values_list('serie', flat=True))
+         if series_in_queryset:
+              # Căutăm articole DOAR pentru seriile din queryset-ul curent (mai eficient)
+              docs_json_data = GeneratedDocument.objects.filter(
+                  context_json__icontains=any(s for s in series_in_queryset) # Optimizare JSONB? Sau căutare string
+              ).filter(context_json__isnull=False).values_list('context_json', flat=True) # Revizuieste filtrarea asta! Poate fi lenta.
+
+              for context_json_str in docs_json_data:
+                   try:
+                        context_data = json.loads(context_json_str)
+                        for i in range(1, 4):
+                             pos_key = f'pozitie{i}'
+                             if pos_key in context_data and isinstance(context_data[pos_key], dict):
+                                 position_data = context_data[pos_key]
+                                 serie = position_data.get('serie', '')
+                                 # Verificăm dacă seria e relevantă și nu avem deja articol pt ea
+                                 if serie and serie in series_in_queryset and serie not in articole_map:
+                                      for field in ['articol', 'ARTICOL', 'soi', 'specia']:
+                                           articol_val = position_data.get(field, '')
+                                           if articol_val:
+                                                articole_map[serie] = articol_val
+                                                break # Am găsit primul articol, e suficient
+                   except (json.JSONDecodeError, AttributeError) as e:
+                       continue
+
+
+    # Paginare
+    page_number = request.GET.get('page', 1)
+    paginator = Paginator(queryset, 25)
+    try:
+        page_obj = paginator.page(page_number)
+    except PageNotAnInteger: page_obj = paginator.page(1)
+    except EmptyPage: page_obj = paginator.page(paginator.num_pages)
+
+    if not search_query and not articol_query:
+        log_activity(request.user, "ACCESS_SERIE_DATA_LIST", "A accesat lista de date extra pentru serii.")
+
+    context = {
+        'page_obj': page_obj,
+        'search_query': search_query,
+        'articol_query': articol_query,
+        'total_results': paginator.count, # Folosim count de la paginator
+        'articole_map': articole_map
+    }
+    return render(request, 'certificat/serie_extra_data_list.html', context)
+
+
+@require_POST # Folosim POST pentru ștergere
+@login_required(login_url='/login/')
+def delete_serie_extra_data(request, pk):
+    """ Șterge o intrare specifică SerieExtraData. Doar Superadmin. """
+    if not request.caps.is_superadmin:
+        log_activity(request.user, "DELETE_SERIE_DATA_DENIED", f"Încercare ștergere date serie ID: {pk} (neautorizat).")
+        StandardMessages.access_denied(request)
+        # Răspuns JSON sau redirect? Redirect la listă e mai consistent
+        # return JsonResponse({'status': 'error', 'message': 'Acces nepermis'}, status=403)
+        return redirect('list_serie_extra_data')
+
+    try:
+        serie_data = get_object_or_404(SerieExtraData, pk=pk)
+        serie_val = serie_data.serie
+        serie_data.delete()
+        log_activity(request.user, "DELETE_SERIE_DATA_SUCCESS", f"Șters datele extra pentru seria '{serie_val}' (ID: {pk}).")
+        StandardMessages.item_deleted(request, f"Datele salvate pentru seria '{serie_val}'")
+        # Răspuns JSON pentru AJAX? Sau doar redirect? Presupunem redirect.
+        # return JsonResponse({'status': 'success', 'message': 'Intrare ștearsă.'})
+
+    except Http404:
+        log_activity(request.user, "DELETE_SERIE_DATA_NOT_FOUND", f"Încercare ștergere date serie ID: {pk} (negăsit).")
+        StandardMessages.item_not_found(request, "Intrarea de date pentru serie")
+        # return JsonResponse({'status': 'error', 'message': 'Intrarea nu a fost găsită.'}, status=404)
+    except Exception as e:
+        log_activity(request.user, "DELETE_SERIE_DATA_ERROR", f"Eroare la ștergerea datelor serie ID: {pk}. Eroare: {e}")
+        StandardMessages.operation_failed(request, f"ștergerea datelor pentru seria (ID: {pk})", str(e))
+        # return JsonResponse({'status': 'error', 'message': f'Eroare server: {e}'}, status=500)
+
+    # Redirect înapoi la listă, păstrând filtrele?
+    # Trebuie să preluăm filtrele din request-ul inițial (GET) sau din POST dacă sunt trimise
+    redirect_url = reverse('list_serie_extra_data')
+    # Ar trebui să adăugăm query params aici dacă vrem să păstrăm filtrele/pagina
+    # Exemplu: params = request.session.get('list_serie_extra_data_params', {})
+    # if params: redirect_url += '?' + urlencode(params)
+    return redirect(redirect_url)
+
+
+@require_POST
+@login_required(login_url='/login/')
+def bulk_delete_serie_data(request):
+    """ Gestionează ștergerea în masă a SerieExtraData. Doar Superadmin. """
+    if not request.caps.is_superadmin:
+        log_activity(request.user, "BULK_DELETE_SERIE_DATA_DENIED", "Încercare ștergere în masă date serie (neautorizat).")
+        StandardMessages.access_denied(request)
+        # Construim redirect-ul cu parametrii existenți
+        redirect_url = reverse('list_serie_extra_data')
+        query_params_dict = {k: v for k, v in request.POST.items() if k in ['q', 'articol', 'page']}
+        if query_params_dict: redirect_url += '?' + urlencode(query_params_dict)
+        return redirect(redirect_url)
+
+    selected_pks = request.POST.getlist('selected_pks')
+    deleted_count = 0
+    object_type = "înregistrări date serie"
+
+    if selected_pks:
+        try:
+            valid_pks = [int(pk) for pk in selected_pks] # Validăm că sunt numere
+            queryset_to_delete = SerieExtraData.objects.filter(pk__in=valid_pks)
+            # delete() returnează (număr total șters, dicționar {'app.Model': count})
+            deleted_info = queryset_to_delete.delete()
+            deleted_count = deleted_info[0]
+
+            if deleted_count > 0:
+                log_activity(request.user, "BULK_DELETE_SERIE_DATA_SUCCESS", f"Șters în masă {deleted_count} {object_type}. PKs: {valid_pks}")
+                messages.success(request, f"{deleted_count} {object_type} au fost șterse cu succes.")
+            else:
+                messages.warning(request, "Nicio înregistrare validă nu a fost găsită pentru ștergere.")
+                log_activity(request.user, "BULK_DELETE_SERIE_DATA_NO_MATCH", f"Ștergere masă: Niciun PK valid găsit din {selected_pks}")
+
+        except ValueError:
+            messages.error(request, "Eroare: Selecția conține ID-uri invalide.")
+            log_activity(request.user, "BULK_DELETE_SERIE_DATA_INVALID_PK", f"Încercare ștergere masă cu PK-uri invalide: {selected_pks}")
+        except Exception as e:
+            messages.error(request, f"A apărut o eroare la ștergerea în masă: {e}")
+            log_activity(request.user, "BULK_DELETE_SERIE_DATA_ERROR", f"Eroare ștergere masă date serie. PKs: {selected_pks}. Eroare: {e}")
+    else:
+        messages.warning(request, "Nu ați selectat nicio înregistrare pentru ștergere.")
+        log_activity(request.user, "BULK_DELETE_SERIE_DATA_NO_SELECTION", "Încercare ștergere masă fără selecție.")
+
+    # Redirect înapoi la listă, păstrând filtrele și pagina din POST
+    redirect_url = reverse('list_serie_extra_data')
+    query_params_dict = {k: v for k, v in request.POST.items() if k in ['q', 'articol', 'page'] and v} # Doar params cu valoare
+    if query_params_dict:
+        redirect_url += '?' + urlencode(query_params_dict)
+    return redirect(redirect_url)
@@ -0,0 +1,83 @@
+"""
+Autentificare: logout, schimbare parolă și SSO cu Moldova Farming Agricultura (ddcf-mfa).
+"""
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.forms import PasswordChangeForm
+from django.contrib.auth.models import User
+from django.contrib.auth import logout, login, update_session_auth_hash
+from django.shortcuts import render, redirect
+from django.contrib import messages
+
+from ..utils import StandardMessages, log_activity
+
+
+# --- View logout_view (rămâne la fel) ---
+def logout_view(request):
+    user = request.user # Get user before logout for logging if needed (signals handle this)
+    logout(request)
+    # log_activity is handled by signal user_logged_out
+    return redirect('login')
+
+
+@login_required(login_url='/login/')
+def change_password(request):
+    if request.method == 'POST':
+        form = PasswordChangeForm(request.user, request.POST)
+        if form.is_valid():
+            user = form.save()
+            # Actualizăm sesiunea pentru a păstra utilizatorul autentificat
+            update_session_auth_hash(request, user)
+            log_activity(request.user, "PASSWORD_CHANGE", "Și-a schimbat parola cu succes.")
+            StandardMessages.operation_success(request, "Parola a fost schimbată cu succes.")
+            return redirect('home')
+        else:
+            StandardMessages.operation_failed(request, "schimbarea parolei", "Verificați datele introduse")
+            log_activity(request.user, "PASSWORD_CHANGE_FAIL", f"Schimbare parolă eșuată. Erori: {form.errors.as_json()}")
+    else:
+        form = PasswordChangeForm(request.user)
+        log_activity(request.user, "ACCESS_PASSWORD_CHANGE", "A accesat pagina de schimbare parolă.")
+
+    return render(request, 'certificat/change_password.html', {
+        'form': form
+    })
+
+
+# =============================================
+# SSO Redirect catre Moldova Farming Agricultura
+# =============================================
+@login_required
+def redirect_to_mfa(request):
+    """Genereaza un token semnat si redirectioneaza catre ddcf-mfa."""
+    from django.core.signing import TimestampSigner
+    signer = TimestampSigner()
+    token = signer.sign(request.user.username)
+    target_url = f"https://ddcf-mfa.moldovafarming.ro/sso-login/?token={token}"
+    return redirect(target_url)
+
+
+# =============================================
+# SSO Login din Moldova Farming Agricultura (ddcf-mfa)
+# =============================================
+def sso_login(request):
+    """Primeste un token semnat de pe ddcf-mfa si autentifica utilizatorul."""
+    from django.core.signing import TimestampSigner, BadSignature, SignatureExpired
+    token = request.GET.get('token')
+    if not token:
+        return redirect('/login/')
+
+    signer = TimestampSigner()
+    try:
+        # Token-ul expira in 30 de secunde
+        username = signer.unsign(token, max_age=30)
+    except (BadSignature, SignatureExpired):
+        messages.error(request, 'Link-ul de autentificare a expirat sau este invalid. Te rugam sa te loghezi manual.')
+        return redirect('/login/')
+
+    try:
+        user = User.objects.get(username=username)
+    except User.DoesNotExist:
+        messages.error(request, 'Utilizatorul nu a fost gasit pe aceasta platforma.')
+        return redirect('/login/')
+
+    login(request, user)
+    return redirect('/')
@@ -56,15 +56,41 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'certificat.instrumentation.InstrumentationMiddleware',  # primul: măsoară întreaga cerere
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'certificat.permissions.PermissionContextMiddleware',  # request.caps (după autentificare)
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Numărul de cereri păstrate (per proces) pentru statisticile de instrumentare
+INSTRUMENTATION_BUFFER_SIZE = int(os.environ.get('INSTRUMENTATION_BUFFER_SIZE', 2000))
+
+# Cache Django, partajat între procesele gunicorn (implicit pe disc; ex. Redis:
+# DJANGO_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache, DJANGO_CACHE_LOCATION=redis://...)
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', str(BASE_DIR / '.django_cache')),
+    }
+}
+
+# Cât timp (secunde) sunt păstrate în cache permisiunile rezolvate ale unui utilizator (0 = fără cache).
+# Vezi certificat/permissions.py.
+PERMISSIONS_CACHE_TTL = int(os.environ.get('PERMISSIONS_CACHE_TTL', 300))
+
+# Cât timp (secunde) sunt păstrate panourile randate din pagina de administrare (0 = fără cache).
+# Vezi certificat/fragments.py.
+ADMIN_FRAGMENT_CACHE_TTL = int(os.environ.get('ADMIN_FRAGMENT_CACHE_TTL', 600))
+
+# Metrici Prometheus: director comun pentru toate procesele gunicorn și token pentru scrape (/metrics)
+METRICS_DIR = os.environ.get('METRICS_DIR', BASE_DIR / 'metrics_data')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
 ROOT_URLCONF = 'myproject.urls'
 
 LOGIN_URL = '/login/'
@@ -72,6 +98,42 @@ LOGIN_REDIRECT_URL = '/'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Descărcări protejate (certificat/downloads.py): "python" (implicit, Range/ETag în Django),
+# "nginx" (X-Accel-Redirect către locația internă PROTECTED_DOWNLOAD_PREFIX) sau "apache" (X-Sendfile)
+PROTECTED_DOWNLOAD_BACKEND = os.environ.get('PROTECTED_DOWNLOAD_BACKEND', 'python')
+PROTECTED_DOWNLOAD_PREFIX = os.environ.get('PROTECTED_DOWNLOAD_PREFIX', '/protected-media/')
+
+# Sursa externă (JSON) cu avizele, seriile și cantitățile
+AVIZ_FEED_URL = os.environ.get(
+    'AVIZ_FEED_URL',
+    'https://moldova.info-media.ro/surse/WebFormExportDate.aspx?token=wme_avize_serii_cant'
+)
+# Cât timp (secunde) este păstrat setul de specii din feed pentru importul mapărilor (0 = fără cache).
+# Vezi certificat/services/species.py.
+SPECIES_FEED_CACHE_TTL = int(os.environ.get('SPECIES_FEED_CACHE_TTL', 600))
+
+# Backend conversie PDF: rezultatul detecției e păstrat în acest fișier (TTL în secunde), ca workerii
+# noi să nu mai ruleze `soffice --version`. Gol = doar cache în memorie. Vezi comanda check_pdf_backend.
+PDF_BACKEND_CACHE_FILE = os.environ.get('PDF_BACKEND_CACHE_FILE', str(BASE_DIR / '.pdf_backend_cache.json'))
+PDF_BACKEND_CACHE_TTL = int(os.environ.get('PDF_BACKEND_CACHE_TTL', 24 * 3600))
+
+# Cache SQLite cu datele extrase din PDF-urile de backup (scan_series_from_pdfs, restore_generated_documents);
+# re-rulările extrag doar fișierele noi sau modificate. Vezi certificat/extraction_cache.py.
+PDF_EXTRACTION_CACHE_FILE = os.environ.get('PDF_EXTRACTION_CACHE_FILE', str(BASE_DIR / '.pdf_extraction_cache.sqlite3'))
+
+# PDF-urile combinate per aviz (generated_docs/bundles/) sunt refolosite cât timp părțile nu se schimbă;
+# cele mai vechi de atâtea zile se șterg la următoarea construire.
+BUNDLE_CACHE_MAX_AGE_DAYS = int(os.environ.get('BUNDLE_CACHE_MAX_AGE_DAYS', 7))
+
+# Ștergerea în masă a documentelor (certificat/purge.py): jobul pornește într-un thread al procesului web;
+# cu PURGE_RUN_IN_WEB=0 joburile sunt doar puse în coadă și preluate de comanda run_purge_jobs (cron/worker).
+PURGE_RUN_IN_WEB = os.environ.get('PURGE_RUN_IN_WEB', '1') == '1'
+PURGE_FILE_WORKERS = int(os.environ.get('PURGE_FILE_WORKERS', 8))
+
+# Jurnal activitate: retenție în tabela principală și directorul arhivelor NDJSON/gzip
+# (vezi comenzile archive_activity_logs și partition_activity_logs)
+ACTIVITY_LOG_RETENTION_DAYS = int(os.environ.get('ACTIVITY_LOG_RETENTION_DAYS', 180))
+ACTIVITY_LOG_ARCHIVE_DIR = os.environ.get('ACTIVITY_LOG_ARCHIVE_DIR', BASE_DIR / 'activity_archive')
 
 X_FRAME_OPTIONS = "SAMEORIGIN"
 
@@ -85,6 +147,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'certificat.permissions.capabilities_context',
             ],
         },
     },
@@ -106,6 +169,11 @@ DATABASES = {
         'PORT': os.environ.get('DB_PORT', ''),
         'CONN_MAX_AGE': 600,
         'CONN_HEALTH_CHECKS': True,
+        # Baza de test se creează direct din modele: ramurile 0015_* ale migrărilor adaugă
+        # amândouă GeneratedDocument.deleted_at, deci lanțul complet nu rulează pe o bază goală
+        'TEST': {
+            'MIGRATE': os.environ.get('DB_TEST_MIGRATE', '0') == '1',
+        },
     }
 }
 